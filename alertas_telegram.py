@@ -5,25 +5,36 @@ Sistema de notificações via Telegram
 """
 
 import os
-import requests
 from datetime import datetime
 import logging
+import threading
+
+from despachante_telegram import obter_despachante
+from estado_alertas import EstadoAlertas, chave_contrato, faixa_vencimento
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def enviar_alerta_telegram(mensagem: str, bot_token: str = None, chat_id: str = None) -> bool:
+def enviar_alerta_telegram(mensagem: str, bot_token: str = None, chat_id: str = None,
+                           aguardar: bool = False, ao_entregar=None) -> bool:
     """
     Envia mensagem via Telegram
     
+    Por padrão a mensagem vai para a fila do despachante (despachante_telegram.py)
+    e o envio acontece em segundo plano, com pool de conexões, rate limit,
+    retry e agrupamento de rajadas.
+    
     Args:
         mensagem: Texto a enviar
-        bot_token: 8687997771:AAFDgl8SRdyzWt7w8p3-IEq-4GlZKbrf_eg
-        chat_id: 47849458
+        bot_token: Token do bot (padrão: TELEGRAM_BOT_TOKEN)
+        chat_id: Chat de destino (padrão: TELEGRAM_CHAT_ID)
+        aguardar: True para enviar já e esperar a resposta do Telegram
+        ao_entregar: Função chamada com True/False quando o Telegram
+            confirmar (ou recusar) a entrega
     
     Returns:
-        True se enviou com sucesso
+        True se enviou (aguardar=True) ou se entrou na fila
     """
     
     # Pegar credenciais
@@ -35,33 +46,65 @@ def enviar_alerta_telegram(mensagem: str, bot_token: str = None, chat_id: str =
         logger.warning("Telegram não configurado (TOKEN ou CHAT_ID ausente)")
         return False
     
-    # Montar URL
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    
-    # Dados
-    payload = {
-        'chat_id': chat,
-        'text': mensagem,
-        'parse_mode': 'HTML'
-    }
-    
-    try:
-        response = requests.post(url, data=payload, timeout=10)
-        
-        if response.status_code == 200:
-            logger.info("✅ Alerta Telegram enviado")
-            return True
-        else:
-            logger.error(f"❌ Telegram erro: {response.status_code} - {response.text}")
+    despachante = obter_despachante(token, chat)
+    
+    if aguardar:
+        entregue = despachante.enviar_sincrono(mensagem, chat)
+        if ao_entregar:
+            ao_entregar(entregue)
+        return entregue
+    return despachante.enviar(mensagem, chat, ao_entregar=ao_entregar)
+
+
+# Alertas na fila do despachante que ainda não tiveram a entrega confirmada
+_pendentes = set()
+_lock_pendentes = threading.Lock()
+
+
+def _enviar_com_estado(mensagem: str, estado: EstadoAlertas, tipo: str, chave: str,
+                       faixa: str = '', score: float = None) -> bool:
+    """
+    Envia e, se houver `estado`, registra o envio para deduplicação
+    
+    O registro só acontece quando o Telegram confirma a entrega; se o envio
+    falhar, o alerta volta a ser elegível no próximo ciclo. Enquanto a entrega
+    não é confirmada, o mesmo alerta não entra de novo na fila.
+    """
+    if not estado:
+        return enviar_alerta_telegram(mensagem)
+    
+    identificador = (tipo, chave, faixa)
+    with _lock_pendentes:
+        if identificador in _pendentes:
             return False
-            
-    except Exception as e:
-        logger.error(f"❌ Erro ao enviar Telegram: {e}")
-        return False
+        _pendentes.add(identificador)
+    
+    def ao_entregar(entregue: bool):
+        try:
+            if entregue:
+                estado.registrar(tipo, chave, faixa, score)
+        finally:
+            with _lock_pendentes:
+                _pendentes.discard(identificador)
+    
+    enviado = enviar_alerta_telegram(mensagem, ao_entregar=ao_entregar)
+    if not enviado:
+        with _lock_pendentes:
+            _pendentes.discard(identificador)
+    return enviado
 
 
-def alerta_oportunidade(oportunidade: dict) -> bool:
-    """Alerta quando encontrar oportunidade"""
+def alerta_oportunidade(oportunidade: dict, estado: EstadoAlertas = None) -> bool:
+    """
+    Alerta quando encontrar oportunidade
+    
+    Com `estado`, o mesmo contrato só é alertado de novo após o cooldown
+    e se o score mudou de forma relevante.
+    """
+    
+    chave = chave_contrato(oportunidade)
+    if estado and not estado.deve_alertar('OPORTUNIDADE', chave, score=oportunidade.get('score')):
+        return False
     
     ativo = oportunidade.get('ativo', '')
     estrategia = oportunidade.get('estrategia', '').replace('_', ' ')
@@ -96,55 +139,65 @@ def alerta_oportunidade(oportunidade: dict) -> bool:
     
     mensagem += f"\n⏰ {datetime.now().strftime('%d/%m/%Y %H:%M')}"
     
-    return enviar_alerta_telegram(mensagem)
+    return _enviar_com_estado(mensagem, estado, 'OPORTUNIDADE', chave, score=oportunidade.get('score'))
 
 
-def alerta_fechar_60_lucro(posicao: dict) -> bool:
-    """Alerta quando atingir 60% lucro"""
+def alerta_fechar_60_lucro(posicao: dict, estado: EstadoAlertas = None) -> bool:
+    """Alerta quando atingir o lucro alvo (60% por padrão; limites em regras_alerta.py)"""
+    
+    if estado and not estado.deve_alertar('LUCRO_60', str(posicao.get('id'))):
+        return False
     
     mensagem = f"""🔥 <b>ALERTA - FECHAR AGORA!</b>
 
 💜 <b>UNO INVEST</b>
 
 📈 <b>{posicao['ativo']}</b> - {posicao['estrategia'].replace('_', ' ')}
-✅ Lucro: <b>{posicao.get('lucro_percentual', 0):.1f}%</b>
+✅ Lucro: <b>{(posicao.get('lucro_percentual') or 0):.1f}%</b>
 
 ⚡ <b>Hora de fechar a posição!</b>
 
-Entrada: R$ {posicao.get('resultado_entrada', 0):.2f}
-Atual: R$ {posicao.get('resultado_atual', 0):.2f}
-Lucro: <b>+R$ {posicao.get('resultado_atual', 0) - posicao.get('resultado_entrada', 0):.2f}</b>
+Entrada: R$ {(posicao.get('resultado_entrada') or 0):.2f}
+Atual: R$ {(posicao.get('resultado_atual') or 0):.2f}
+Lucro: <b>+R$ {(posicao.get('resultado_atual') or 0) - (posicao.get('resultado_entrada') or 0):.2f}</b>
 
 ⏰ {datetime.now().strftime('%d/%m/%Y %H:%M')}
 """
     
-    return enviar_alerta_telegram(mensagem)
+    return _enviar_com_estado(mensagem, estado, 'LUCRO_60', str(posicao.get('id')))
 
 
-def alerta_stop_loss(posicao: dict) -> bool:
+def alerta_stop_loss(posicao: dict, estado: EstadoAlertas = None) -> bool:
     """Alerta stop loss"""
     
+    if estado and not estado.deve_alertar('STOP_LOSS', str(posicao.get('id'))):
+        return False
+    
     mensagem = f"""⚠️ <b>STOP LOSS ACIONADO</b>
 
 💜 <b>UNO INVEST</b>
 
 📉 <b>{posicao['ativo']}</b> - {posicao['estrategia'].replace('_', ' ')}
-❌ Prejuízo: <b>{posicao.get('lucro_percentual', 0):.1f}%</b>
+❌ Prejuízo: <b>{(posicao.get('lucro_percentual') or 0):.1f}%</b>
 
 🛑 <b>Considere fechar para limitar perdas</b>
 
-Entrada: R$ {posicao.get('resultado_entrada', 0):.2f}
-Atual: R$ {posicao.get('resultado_atual', 0):.2f}
-Perda: <b>R$ {posicao.get('resultado_atual', 0) - posicao.get('resultado_entrada', 0):.2f}</b>
+Entrada: R$ {(posicao.get('resultado_entrada') or 0):.2f}
+Atual: R$ {(posicao.get('resultado_atual') or 0):.2f}
+Perda: <b>R$ {(posicao.get('resultado_atual') or 0) - (posicao.get('resultado_entrada') or 0):.2f}</b>
 
 ⏰ {datetime.now().strftime('%d/%m/%Y %H:%M')}
 """
     
-    return enviar_alerta_telegram(mensagem)
+    return _enviar_com_estado(mensagem, estado, 'STOP_LOSS', str(posicao.get('id')))
 
 
-def alerta_vencimento_proximo(posicao: dict, dias_restantes: int) -> bool:
-    """Alerta vencimento próximo"""
+def alerta_vencimento_proximo(posicao: dict, dias_restantes: int, estado: EstadoAlertas = None) -> bool:
+    """Alerta vencimento próximo (com `estado`, uma vez por faixa: 7, 3 e 1 dia)"""
+    
+    faixa = faixa_vencimento(dias_restantes)
+    if estado and not estado.deve_alertar('VENCIMENTO', str(posicao.get('id')), faixa):
+        return False
     
     mensagem = f"""⏰ <b>VENCIMENTO PRÓXIMO</b>
 
@@ -155,12 +208,12 @@ def alerta_vencimento_proximo(posicao: dict, dias_restantes: int) -> bool:
 
 💡 Considere fechar ou ajustar a posição
 
-Lucro atual: {posicao.get('lucro_percentual', 0):.1f}%
+Lucro atual: {(posicao.get('lucro_percentual') or 0):.1f}%
 
 ⏰ {datetime.now().strftime('%d/%m/%Y %H:%M')}
 """
     
-    return enviar_alerta_telegram(mensagem)
+    return _enviar_com_estado(mensagem, estado, 'VENCIMENTO', str(posicao.get('id')), faixa)
 
 
 def alerta_scanner_completo(total_encontradas: int, top_3: list) -> bool:
@@ -189,7 +242,7 @@ if __name__ == "__main__":
     print("🧪 Testando Telegram...")
     
     # Teste simples
-    sucesso = enviar_alerta_telegram("🎉 Telegram configurado com sucesso!\n\n💜 UNO INVEST - Scanner RCO")
+    sucesso = enviar_alerta_telegram("🎉 Telegram configurado com sucesso!\n\n💜 UNO INVEST - Scanner RCO", aguardar=True)
     
     if sucesso:
         print("✅ Telegram funcionando!")
@@ -0,0 +1,247 @@
+"""
+Armazenamento - RCO Scanner
+============================
+Interface comum dos backends de persistência e seleção por configuração
+
+Backends:
+- supabase: SupabaseRCO (supabase_client.py) - PostgreSQL hospedado
+- sqlite:   SQLiteRCO (armazenamento_local.py) - arquivo local, sem rede
+
+Seleção: variável RCO_BACKEND (padrão: supabase)
+"""
+
+import abc
+import os
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from logs_em_lote import HandlerLogsEmLote
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BackendRCO(abc.ABC):
+    """Operações que todo backend de persistência implementa (faltando uma, a instância nem é criada)"""
+
+    handler_logs: Optional[HandlerLogsEmLote] = None
+
+    # ========================================================================
+    # OPORTUNIDADES
+    # ========================================================================
+
+    @abc.abstractmethod
+    def salvar_oportunidade(self, oportunidade: Dict) -> Dict:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def listar_oportunidades_recentes(self, limite: int = 10, score_min: int = 60) -> List[Dict]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def buscar_oportunidade_por_id(self, oportunidade_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    # ========================================================================
+    # POSIÇÕES ABERTAS
+    # ========================================================================
+
+    @abc.abstractmethod
+    def abrir_posicao(self, oportunidade_id: str, oportunidade: Dict) -> Dict:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def listar_posicoes_ativas(self) -> List[Dict]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def atualizar_posicao(self, posicao_id: str, dados: Dict) -> bool:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def fechar_posicao(self, posicao_id: str, motivo: str, resultado_final: float) -> bool:
+        raise NotImplementedError
+
+    # ========================================================================
+    # HISTÓRICO E PERFORMANCE
+    # ========================================================================
+
+    @abc.abstractmethod
+    def obter_performance(self) -> Dict:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def obter_melhores_setups(self) -> List[Dict]:
+        raise NotImplementedError
+
+    # ========================================================================
+    # CONFIGURAÇÕES
+    # ========================================================================
+
+    @abc.abstractmethod
+    def obter_config(self, chave: str) -> Optional[str]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def salvar_config(self, chave: str, valor: str) -> bool:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def obter_todas_configs(self) -> Dict:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def versao_configs(self) -> Optional[str]:
+        """Marca que muda a cada alteração da tabela (maior updated_at + total)"""
+        raise NotImplementedError
+
+    # ========================================================================
+    # ESTADO DOS ALERTAS
+    # ========================================================================
+
+    @abc.abstractmethod
+    def listar_estado_alertas(self) -> List[Dict]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def salvar_estado_alerta(self, registro: Dict) -> bool:
+        raise NotImplementedError
+
+    # ========================================================================
+    # REGRAS DE ALERTA
+    # ========================================================================
+
+    @abc.abstractmethod
+    def listar_regras_alerta(self) -> List[Dict]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def salvar_regra_alerta(self, regra: Dict) -> bool:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def remover_regra_alerta(self, escopo: str, alvo: str, tipo: str) -> bool:
+        raise NotImplementedError
+
+    # ========================================================================
+    # LOGS
+    # ========================================================================
+
+    @abc.abstractmethod
+    def inserir_logs(self, registros: List[Dict]) -> bool:
+        raise NotImplementedError
+
+    def log(self, nivel: str, categoria: str, mensagem: str, dados: Dict = None):
+        """Registra um log (bufferizado se `ativar_log_em_lote` foi chamado)"""
+        registro = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'nivel': nivel,
+            'categoria': categoria,
+            'mensagem': mensagem,
+            'dados': dados
+        }
+
+        if self.handler_logs is not None:
+            nivel_num = logging.getLevelName(nivel.upper())
+            if not isinstance(nivel_num, int):
+                nivel_num = logging.INFO
+            self.handler_logs.enfileirar(registro, nivel_num)
+            return
+
+        self.inserir_logs([registro])
+
+    def ativar_log_em_lote(self, **kwargs) -> HandlerLogsEmLote:
+        """
+        Passa a gravar logs em lote (ver logs_em_lote.HandlerLogsEmLote)
+
+        O handler retornado pode ser plugado no `logging`:
+            logging.getLogger().addHandler(db.ativar_log_em_lote())
+        """
+        if self.handler_logs is None:
+            self.handler_logs = HandlerLogsEmLote(self, **kwargs)
+        return self.handler_logs
+
+    # ========================================================================
+    # AUXILIARES COMUNS
+    # ========================================================================
+
+    @staticmethod
+    def _montar_posicao(oportunidade_id: str, oportunidade: Dict) -> Dict:
+        """Registro de posicoes_abertas a partir de uma oportunidade"""
+        return {
+            'oportunidade_id': oportunidade_id,
+            'ativo': oportunidade['ativo'],
+            'estrategia': oportunidade['estrategia'],
+            'vencimento': oportunidade['vencimento'],
+
+            # Perna 1
+            'codigo_opcao_1': oportunidade['codigo_opcao_1'],
+            'strike_1': oportunidade['strike_1'],
+            'preco_entrada_1': oportunidade['preco_1'],
+            'quantidade_1': oportunidade['quantidade_1'],
+            'direcao_1': oportunidade['direcao_1'],
+
+            # Perna 2 (se tiver)
+            'codigo_opcao_2': oportunidade.get('codigo_opcao_2'),
+            'strike_2': oportunidade.get('strike_2'),
+            'preco_entrada_2': oportunidade.get('preco_2'),
+            'quantidade_2': oportunidade.get('quantidade_2'),
+            'direcao_2': oportunidade.get('direcao_2'),
+
+            # Valores
+            'credito_entrada': oportunidade.get('credito_total', 0),
+            'debito_entrada': oportunidade.get('debito_total', 0),
+            'resultado_entrada': oportunidade.get('resultado_liquido', 0),
+            'risco_maximo': oportunidade.get('risco_maximo'),
+            'lucro_maximo': oportunidade.get('resultado_liquido', 0),  # Para vendas
+
+            # Status
+            'ativa': True,
+            'dias_aberta': 0
+        }
+
+    @staticmethod
+    def _montar_historico(posicao_id: str, posicao: Dict, motivo: str, resultado_final: float) -> Dict:
+        """Registro de historico_operacoes para uma posição fechada"""
+        agora = datetime.now(timezone.utc)
+        entrada = datetime.fromisoformat(posicao['created_at'].replace('Z', '+00:00'))
+        if entrada.tzinfo is None:
+            entrada = entrada.replace(tzinfo=timezone.utc)
+
+        resultado_entrada = posicao['resultado_entrada'] or 0
+
+        return {
+            'posicao_id': posicao_id,
+            'ativo': posicao['ativo'],
+            'estrategia': posicao['estrategia'],
+            'data_entrada': posicao['created_at'],
+            'data_saida': agora.isoformat(),
+            'dias_mantida': (agora - entrada).days,
+            'valor_entrada': resultado_entrada,
+            'valor_saida': resultado_final,
+            'resultado': resultado_final - resultado_entrada,
+            'retorno_percentual': ((resultado_final - resultado_entrada) / abs(resultado_entrada)) * 100 if resultado_entrada != 0 else 0,
+            'motivo': motivo
+        }
+
+
+def criar_backend(tipo: str = None, **kwargs) -> BackendRCO:
+    """
+    Cria o backend configurado
+
+    Args:
+        tipo: 'supabase' ou 'sqlite' (padrão: variável RCO_BACKEND ou 'supabase')
+        kwargs: repassados ao construtor (url/key para Supabase, caminho para SQLite)
+    """
+    tipo = (tipo or os.getenv('RCO_BACKEND') or 'supabase').strip().lower()
+
+    if tipo == 'supabase':
+        from supabase_client import SupabaseRCO
+        return SupabaseRCO(**kwargs)
+
+    if tipo == 'sqlite':
+        from armazenamento_local import SQLiteRCO
+        return SQLiteRCO(**kwargs)
+
+    raise ValueError(f"RCO_BACKEND inválido: {tipo} (use 'supabase' ou 'sqlite')")
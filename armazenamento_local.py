@@ -0,0 +1,666 @@
+"""
+Armazenamento Local (SQLite) - RCO Scanner
+===========================================
+Mesma interface do SupabaseRCO, gravando em um arquivo SQLite local
+
+Útil para rodar offline, em um único servidor com baixa latência,
+em testes e para análises locais sobre o histórico (`consultar`).
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import uuid
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from armazenamento import BackendRCO
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+SCHEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS oportunidades (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    ativo TEXT NOT NULL,
+    estrategia TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    vencimento TEXT NOT NULL,
+    dias_vencimento INTEGER,
+    codigo_opcao_1 TEXT NOT NULL,
+    tipo_opcao_1 TEXT,
+    strike_1 REAL,
+    preco_1 REAL,
+    quantidade_1 INTEGER,
+    direcao_1 TEXT,
+    codigo_opcao_2 TEXT,
+    tipo_opcao_2 TEXT,
+    strike_2 REAL,
+    preco_2 REAL,
+    quantidade_2 INTEGER,
+    direcao_2 TEXT,
+    credito_total REAL,
+    debito_total REAL,
+    resultado_liquido REAL,
+    risco_maximo REAL,
+    retorno_percentual REAL,
+    probabilidade_sucesso REAL,
+    delta REAL,
+    gamma REAL,
+    theta REAL,
+    vega REAL,
+    iv REAL,
+    preco_ativo_atual REAL,
+    tendencia_1m TEXT,
+    tendencia_1y TEXT,
+    alerta_enviado INTEGER DEFAULT 0,
+    dt_alerta TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_ativo ON oportunidades(ativo);
+CREATE INDEX IF NOT EXISTS idx_oport_created_score ON oportunidades(created_at DESC, score);
+
+CREATE TABLE IF NOT EXISTS posicoes_abertas (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    oportunidade_id TEXT REFERENCES oportunidades(id),
+    ativo TEXT NOT NULL,
+    estrategia TEXT NOT NULL,
+    data_entrada TEXT,
+    vencimento TEXT NOT NULL,
+    codigo_opcao_1 TEXT NOT NULL,
+    strike_1 REAL,
+    preco_entrada_1 REAL,
+    quantidade_1 INTEGER,
+    direcao_1 TEXT,
+    codigo_opcao_2 TEXT,
+    strike_2 REAL,
+    preco_entrada_2 REAL,
+    quantidade_2 INTEGER,
+    direcao_2 TEXT,
+    credito_entrada REAL,
+    debito_entrada REAL,
+    resultado_entrada REAL,
+    risco_maximo REAL,
+    lucro_maximo REAL,
+    preco_atual_1 REAL,
+    preco_atual_2 REAL,
+    resultado_atual REAL,
+    lucro_percentual REAL,
+    dias_aberta INTEGER,
+    delta_atual REAL,
+    alerta_60_lucro INTEGER DEFAULT 0,
+    dt_alerta_60_lucro TEXT,
+    alerta_stop_loss INTEGER DEFAULT 0,
+    dt_alerta_stop_loss TEXT,
+    alerta_vencimento INTEGER DEFAULT 0,
+    dt_alerta_vencimento TEXT,
+    alerta_delta_alto INTEGER DEFAULT 0,
+    dt_alerta_delta_alto TEXT,
+    ativa INTEGER DEFAULT 1,
+    data_fechamento TEXT,
+    motivo_fechamento TEXT,
+    resultado_final REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_pos_ativas_created ON posicoes_abertas(created_at) WHERE ativa = 1;
+
+CREATE TABLE IF NOT EXISTS historico_operacoes (
+    id TEXT PRIMARY KEY,
+    posicao_id TEXT REFERENCES posicoes_abertas(id),
+    ativo TEXT,
+    estrategia TEXT,
+    data_entrada TEXT,
+    data_saida TEXT,
+    dias_mantida INTEGER,
+    valor_entrada REAL,
+    valor_saida REAL,
+    resultado REAL,
+    retorno_percentual REAL,
+    motivo TEXT,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ativo_hist ON historico_operacoes(ativo);
+
+CREATE TABLE IF NOT EXISTS configuracoes (
+    id TEXT PRIMARY KEY,
+    chave TEXT UNIQUE NOT NULL,
+    valor TEXT,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS alertas_enviados (
+    id TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    faixa TEXT NOT NULL DEFAULT '',
+    score REAL,
+    ultimo_envio TEXT NOT NULL,
+    total_envios INTEGER DEFAULT 1,
+    UNIQUE (tipo, chave, faixa)
+);
+
+CREATE TABLE IF NOT EXISTS logs (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    nivel TEXT,
+    categoria TEXT,
+    mensagem TEXT,
+    dados TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_created_log ON logs(created_at DESC);
+
+CREATE TABLE IF NOT EXISTS regras_alerta (
+    id TEXT PRIMARY KEY,
+    escopo TEXT NOT NULL,
+    alvo TEXT NOT NULL DEFAULT '',
+    tipo TEXT NOT NULL,
+    limite REAL,
+    ativa INTEGER DEFAULT 1,
+    updated_at TEXT NOT NULL,
+    UNIQUE (escopo, alvo, tipo)
+);
+
+INSERT OR IGNORE INTO regras_alerta (id, escopo, alvo, tipo, limite, ativa, updated_at) VALUES
+    ('global-lucro_60', 'GLOBAL', '', 'LUCRO_60', 60, 1, datetime('now')),
+    ('global-stop_loss', 'GLOBAL', '', 'STOP_LOSS', -30, 1, datetime('now')),
+    ('global-vencimento', 'GLOBAL', '', 'VENCIMENTO', 7, 1, datetime('now'));
+
+-- Limites vêm de regras_alerta (posição > estratégia > global)
+DROP VIEW IF EXISTS v_posicoes_ativas;
+CREATE VIEW v_posicoes_ativas AS
+SELECT
+    p.*,
+    CASE
+        WHEN p.lucro_percentual >= (
+            SELECT CASE WHEN r.ativa THEN r.limite END FROM regras_alerta r
+            WHERE r.tipo = 'LUCRO_60' AND ((r.escopo = 'POSICAO' AND r.alvo = p.id)
+                OR (r.escopo = 'ESTRATEGIA' AND r.alvo = p.estrategia) OR r.escopo = 'GLOBAL')
+            ORDER BY CASE r.escopo WHEN 'POSICAO' THEN 0 WHEN 'ESTRATEGIA' THEN 1 ELSE 2 END
+            LIMIT 1
+        ) THEN 'FECHAR AGORA'
+        WHEN p.lucro_percentual <= (
+            SELECT CASE WHEN r.ativa THEN r.limite END FROM regras_alerta r
+            WHERE r.tipo = 'STOP_LOSS' AND ((r.escopo = 'POSICAO' AND r.alvo = p.id)
+                OR (r.escopo = 'ESTRATEGIA' AND r.alvo = p.estrategia) OR r.escopo = 'GLOBAL')
+            ORDER BY CASE r.escopo WHEN 'POSICAO' THEN 0 WHEN 'ESTRATEGIA' THEN 1 ELSE 2 END
+            LIMIT 1
+        ) THEN 'STOP LOSS'
+        WHEN julianday(p.vencimento) - julianday('now', 'localtime', 'start of day') <= (
+            SELECT CASE WHEN r.ativa THEN r.limite END FROM regras_alerta r
+            WHERE r.tipo = 'VENCIMENTO' AND ((r.escopo = 'POSICAO' AND r.alvo = p.id)
+                OR (r.escopo = 'ESTRATEGIA' AND r.alvo = p.estrategia) OR r.escopo = 'GLOBAL')
+            ORDER BY CASE r.escopo WHEN 'POSICAO' THEN 0 WHEN 'ESTRATEGIA' THEN 1 ELSE 2 END
+            LIMIT 1
+        ) THEN 'VENCIMENTO PRÓXIMO'
+        ELSE 'MONITORANDO'
+    END as status_alerta
+FROM posicoes_abertas p
+WHERE p.ativa = 1;
+
+CREATE VIEW IF NOT EXISTS v_performance AS
+SELECT
+    COUNT(*) as total_operacoes,
+    SUM(CASE WHEN resultado > 0 THEN 1 ELSE 0 END) as operacoes_lucrativas,
+    ROUND(AVG(retorno_percentual), 2) as retorno_medio_pct,
+    ROUND(SUM(resultado), 2) as resultado_total
+FROM historico_operacoes;
+
+CREATE VIEW IF NOT EXISTS v_melhores_setups AS
+SELECT
+    estrategia,
+    COUNT(*) as quantidade,
+    SUM(CASE WHEN resultado > 0 THEN 1 ELSE 0 END) as acertos,
+    ROUND(100.0 * SUM(CASE WHEN resultado > 0 THEN 1 ELSE 0 END) / COUNT(*), 1) as taxa_acerto
+FROM historico_operacoes
+GROUP BY estrategia
+HAVING COUNT(*) >= 3;
+"""
+
+CONFIGS_PADRAO = {
+    'ativos_monitorar': 'PETR4,VALE3,BBAS3,ITUB4,BOVA11',
+    'score_minimo_alerta': '80',
+    'capital_total': '5000',
+    'retencao_dias_oportunidades': '90',
+    'retencao_dias_logs': '30'
+}
+
+# Colunas booleanas (SQLite guarda 0/1)
+COLUNAS_BOOL = {
+    'ativa', 'alerta_enviado', 'alerta_60_lucro', 'alerta_stop_loss',
+    'alerta_vencimento', 'alerta_delta_alto'
+}
+
+
+def _agora() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class SQLiteRCO(BackendRCO):
+    """Backend local em SQLite com a mesma interface do SupabaseRCO"""
+
+    def __init__(self, caminho: str = None):
+        self.caminho = caminho or os.getenv('RCO_SQLITE_PATH') or 'dados/rco_scanner.db'
+
+        if self.caminho != ':memory:':
+            pasta = os.path.dirname(self.caminho)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._colunas: Dict[str, List[str]] = {}
+        self.handler_logs = None
+
+        with self._lock:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.execute('PRAGMA foreign_keys=ON')
+            self.conn.executescript(SCHEMA_SQLITE)
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO configuracoes (id, chave, valor, updated_at) VALUES (?, ?, ?, ?)',
+                [(uuid.uuid4().hex, k, v, _agora()) for k, v in CONFIGS_PADRAO.items()]
+            )
+            self.conn.commit()
+
+        logger.info(f"✅ Banco local: {self.caminho}")
+
+    # ========================================================================
+    # AUXILIARES
+    # ========================================================================
+
+    def _colunas_tabela(self, tabela: str) -> List[str]:
+        if tabela not in self._colunas:
+            self._colunas[tabela] = [r['name'] for r in self.conn.execute(f'PRAGMA table_info({tabela})')]
+        return self._colunas[tabela]
+
+    def _inserir(self, tabela: str, registro: Dict) -> Dict:
+        """Insere um registro (ignorando chaves que não são colunas) e devolve a linha"""
+        colunas = self._colunas_tabela(tabela)
+        dados = {k: self._para_sqlite(k, v) for k, v in registro.items() if k in colunas}
+        dados.setdefault('id', uuid.uuid4().hex)
+        if 'created_at' in colunas:
+            dados.setdefault('created_at', _agora())
+
+        nomes = ', '.join(dados)
+        marcadores = ', '.join('?' for _ in dados)
+        with self._lock:
+            self.conn.execute(f'INSERT INTO {tabela} ({nomes}) VALUES ({marcadores})', list(dados.values()))
+            self.conn.commit()
+            return self._buscar_um(tabela, dados['id'])
+
+    def _buscar_um(self, tabela: str, registro_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute(f'SELECT * FROM {tabela} WHERE id = ?', (registro_id,)).fetchone()
+        return self._de_sqlite(row) if row else None
+
+    def _selecionar(self, sql: str, params: tuple = ()) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._de_sqlite(r) for r in rows]
+
+    @staticmethod
+    def _para_sqlite(coluna: str, valor):
+        if isinstance(valor, bool):
+            return int(valor)
+        if isinstance(valor, datetime):
+            return valor.isoformat()
+        if isinstance(valor, (dict, list)):
+            return json.dumps(valor, ensure_ascii=False, default=str)
+        if hasattr(valor, 'item'):  # Escalares numpy
+            return valor.item()
+        return valor
+
+    @staticmethod
+    def _de_sqlite(row: sqlite3.Row) -> Dict:
+        registro = dict(row)
+        for coluna in COLUNAS_BOOL & registro.keys():
+            if registro[coluna] is not None:
+                registro[coluna] = bool(registro[coluna])
+        if isinstance(registro.get('dados'), str):
+            try:
+                registro['dados'] = json.loads(registro['dados'])
+            except ValueError:
+                pass
+        return registro
+
+    def consultar(self, sql: str, params: tuple = ()) -> List[Dict]:
+        """Consulta SQL livre (análises locais sobre histórico, oportunidades, etc)"""
+        try:
+            return self._selecionar(sql, params)
+        except Exception as e:
+            logger.error(f"❌ Erro na consulta local: {e}")
+            return []
+
+    # ========================================================================
+    # OPORTUNIDADES
+    # ========================================================================
+
+    def salvar_oportunidade(self, oportunidade: Dict) -> Dict:
+        """Salva uma oportunidade detectada"""
+        try:
+            salva = self._inserir('oportunidades', oportunidade)
+            logger.info(f"✅ Oportunidade salva: {oportunidade.get('estrategia')} {oportunidade.get('ativo')}")
+            return salva or {}
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar oportunidade: {e}")
+            return {}
+
+    def listar_oportunidades_recentes(self, limite: int = 10, score_min: int = 60) -> List[Dict]:
+        """Lista oportunidades recentes com score alto"""
+        try:
+            return self._selecionar(
+                'SELECT * FROM oportunidades WHERE score >= ? ORDER BY created_at DESC LIMIT ?',
+                (score_min, limite)
+            )
+        except Exception as e:
+            logger.error(f"❌ Erro ao listar oportunidades: {e}")
+            return []
+
+    def buscar_oportunidade_por_id(self, oportunidade_id: str) -> Optional[Dict]:
+        """Busca uma oportunidade específica"""
+        try:
+            return self._buscar_um('oportunidades', oportunidade_id)
+        except Exception as e:
+            logger.error(f"❌ Erro ao buscar oportunidade: {e}")
+            return None
+
+    # ========================================================================
+    # POSIÇÕES ABERTAS
+    # ========================================================================
+
+    def abrir_posicao(self, oportunidade_id: str, oportunidade: Dict) -> Dict:
+        """Marca que usuário ENTROU na operação"""
+        posicao = self._montar_posicao(oportunidade_id, oportunidade)
+        posicao['data_entrada'] = _agora()
+
+        try:
+            aberta = self._inserir('posicoes_abertas', posicao)
+            logger.info(f"✅ Posição aberta: {posicao['estrategia']} {posicao['ativo']}")
+            return aberta or {}
+        except Exception as e:
+            logger.error(f"❌ Erro ao abrir posição: {e}")
+            return {}
+
+    def listar_posicoes_ativas(self) -> List[Dict]:
+        """Lista todas as posições abertas e ativas"""
+        try:
+            return self._selecionar('SELECT * FROM posicoes_abertas WHERE ativa = 1 ORDER BY created_at')
+        except Exception as e:
+            logger.error(f"❌ Erro ao listar posições ativas: {e}")
+            return []
+
+    def atualizar_posicao(self, posicao_id: str, dados: Dict) -> bool:
+        """Atualiza dados de uma posição (preços atuais, lucro, etc)"""
+        colunas = self._colunas_tabela('posicoes_abertas')
+        dados = {k: self._para_sqlite(k, v) for k, v in dados.items() if k in colunas and k != 'id'}
+        if not dados:
+            return True
+
+        try:
+            atribuicoes = ', '.join(f'{k} = ?' for k in dados)
+            with self._lock:
+                self.conn.execute(
+                    f'UPDATE posicoes_abertas SET {atribuicoes} WHERE id = ?',
+                    list(dados.values()) + [posicao_id]
+                )
+                self.conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao atualizar posição: {e}")
+            return False
+
+    def fechar_posicao(self, posicao_id: str, motivo: str, resultado_final: float) -> bool:
+        """Marca posição como fechada e move para histórico (uma transação)"""
+        try:
+            with self._lock:
+                posicao = self._buscar_um('posicoes_abertas', posicao_id)
+                if not posicao:
+                    return False
+
+                historico = self._montar_historico(posicao_id, posicao, motivo, resultado_final)
+
+                self.conn.execute(
+                    'UPDATE posicoes_abertas SET ativa = 0, data_fechamento = ?, '
+                    'motivo_fechamento = ?, resultado_final = ? WHERE id = ?',
+                    (_agora(), motivo, resultado_final, posicao_id)
+                )
+                historico['id'] = uuid.uuid4().hex
+                historico['created_at'] = _agora()
+                nomes = ', '.join(historico)
+                marcadores = ', '.join('?' for _ in historico)
+                self.conn.execute(
+                    f'INSERT INTO historico_operacoes ({nomes}) VALUES ({marcadores})',
+                    list(historico.values())
+                )
+                self.conn.commit()
+
+            logger.info(f"✅ Posição fechada: {motivo}")
+            return True
+
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"❌ Erro ao fechar posição: {e}")
+            return False
+
+    # ========================================================================
+    # HISTÓRICO E PERFORMANCE
+    # ========================================================================
+
+    def obter_performance(self) -> Dict:
+        """Obtém estatísticas de performance"""
+        try:
+            linhas = self._selecionar('SELECT * FROM v_performance')
+            return linhas[0] if linhas else {}
+        except Exception as e:
+            logger.error(f"❌ Erro ao obter performance: {e}")
+            return {}
+
+    def obter_melhores_setups(self) -> List[Dict]:
+        """Obtém melhores estratégias por taxa de acerto"""
+        try:
+            return self._selecionar('SELECT * FROM v_melhores_setups')
+        except Exception as e:
+            logger.error(f"❌ Erro ao obter melhores setups: {e}")
+            return []
+
+    # ========================================================================
+    # CONFIGURAÇÕES
+    # ========================================================================
+
+    def obter_config(self, chave: str) -> Optional[str]:
+        """Obtém valor de uma configuração"""
+        try:
+            linhas = self._selecionar('SELECT valor FROM configuracoes WHERE chave = ?', (chave,))
+            return linhas[0]['valor'] if linhas else None
+        except Exception:
+            return None
+
+    def salvar_config(self, chave: str, valor: str) -> bool:
+        """Salva/atualiza uma configuração"""
+        try:
+            with self._lock:
+                self.conn.execute(
+                    'INSERT INTO configuracoes (id, chave, valor, updated_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor, updated_at = excluded.updated_at',
+                    (uuid.uuid4().hex, chave, valor, _agora())
+                )
+                self.conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar config: {e}")
+            return False
+
+    def obter_todas_configs(self) -> Dict:
+        """Obtém todas as configurações como dicionário"""
+        try:
+            return {item['chave']: item['valor'] for item in self._selecionar('SELECT chave, valor FROM configuracoes')}
+        except Exception as e:
+            logger.error(f"❌ Erro ao obter configs: {e}")
+            return {}
+
+    def versao_configs(self) -> Optional[str]:
+        """Maior updated_at + total de linhas (muda a cada alteração)"""
+        try:
+            linha = self._selecionar('SELECT MAX(updated_at) AS ultima, COUNT(*) AS total FROM configuracoes')[0]
+            return f"{linha['ultima']}|{linha['total']}"
+        except Exception as e:
+            logger.error(f"❌ Erro ao obter versão das configs: {e}")
+            return None
+
+    # ========================================================================
+    # ESTADO DOS ALERTAS
+    # ========================================================================
+
+    def listar_estado_alertas(self) -> List[Dict]:
+        """Lista o último envio de cada alerta (tipo, chave, faixa)"""
+        try:
+            return self._selecionar('SELECT * FROM alertas_enviados')
+        except Exception as e:
+            logger.error(f"❌ Erro ao listar estado dos alertas: {e}")
+            return []
+
+    def salvar_estado_alerta(self, registro: Dict) -> bool:
+        """Salva/atualiza o último envio de um alerta"""
+        try:
+            with self._lock:
+                self.conn.execute(
+                    'INSERT INTO alertas_enviados (id, tipo, chave, faixa, score, ultimo_envio, total_envios) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT(tipo, chave, faixa) DO UPDATE SET score = excluded.score, '
+                    'ultimo_envio = excluded.ultimo_envio, total_envios = excluded.total_envios',
+                    (
+                        uuid.uuid4().hex, registro['tipo'], registro['chave'], registro.get('faixa') or '',
+                        registro.get('score'), registro['ultimo_envio'], registro.get('total_envios', 1)
+                    )
+                )
+                self.conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar estado do alerta: {e}")
+            return False
+
+    # ========================================================================
+    # REGRAS DE ALERTA
+    # ========================================================================
+
+    def listar_regras_alerta(self) -> List[Dict]:
+        """Lista os limites de alerta (globais, por estratégia e por posição)"""
+        try:
+            return self._selecionar('SELECT * FROM regras_alerta')
+        except Exception as e:
+            logger.error(f"❌ Erro ao listar regras de alerta: {e}")
+            return []
+
+    def salvar_regra_alerta(self, regra: Dict) -> bool:
+        """Salva/atualiza o limite de um tipo de alerta num escopo"""
+        try:
+            with self._lock:
+                self.conn.execute(
+                    'INSERT INTO regras_alerta (id, escopo, alvo, tipo, limite, ativa, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT(escopo, alvo, tipo) DO UPDATE SET limite = excluded.limite, '
+                    'ativa = excluded.ativa, updated_at = excluded.updated_at',
+                    (
+                        uuid.uuid4().hex, regra['escopo'], regra.get('alvo') or '', regra['tipo'],
+                        regra.get('limite'), int(regra.get('ativa', True)), _agora()
+                    )
+                )
+                self.conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar regra de alerta: {e}")
+            return False
+
+    def remover_regra_alerta(self, escopo: str, alvo: str, tipo: str) -> bool:
+        """Apaga uma regra (passa a valer a do escopo menos específico)"""
+        try:
+            with self._lock:
+                self.conn.execute(
+                    'DELETE FROM regras_alerta WHERE escopo = ? AND alvo = ? AND tipo = ?',
+                    (escopo, alvo or '', tipo)
+                )
+                self.conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao remover regra de alerta: {e}")
+            return False
+
+    # ========================================================================
+    # LOGS
+    # ========================================================================
+
+    def inserir_logs(self, registros: List[Dict]) -> bool:
+        """Insere vários logs em uma única transação"""
+        if not registros:
+            return True
+        try:
+            with self._lock:
+                self.conn.executemany(
+                    'INSERT INTO logs (id, created_at, nivel, categoria, mensagem, dados) VALUES (?, ?, ?, ?, ?, ?)',
+                    [
+                        (
+                            uuid.uuid4().hex,
+                            r.get('created_at') or _agora(),
+                            r.get('nivel'),
+                            r.get('categoria'),
+                            r.get('mensagem'),
+                            self._para_sqlite('dados', r.get('dados'))
+                        )
+                        for r in registros
+                    ]
+                )
+                self.conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar lote de logs: {e}")
+            return False
+
+    def aplicar_retencao(self) -> Dict:
+        """Remove oportunidades (sem posição) e logs mais antigos que o prazo configurado"""
+        dias_oport = int(self.obter_config('retencao_dias_oportunidades') or 90)
+        dias_logs = int(self.obter_config('retencao_dias_logs') or 30)
+
+        with self._lock:
+            cur = self.conn.execute(
+                "DELETE FROM oportunidades WHERE julianday(created_at) < julianday('now', ?) "
+                "AND id NOT IN (SELECT oportunidade_id FROM posicoes_abertas WHERE oportunidade_id IS NOT NULL)",
+                (f'-{dias_oport} days',)
+            )
+            removidas = cur.rowcount
+            cur = self.conn.execute(
+                "DELETE FROM logs WHERE julianday(created_at) < julianday('now', ?)",
+                (f'-{dias_logs} days',)
+            )
+            self.conn.commit()
+
+        return {'oportunidades_removidas': removidas, 'logs_removidos': cur.rowcount}
+
+
+# Teste
+if __name__ == "__main__":
+    db = SQLiteRCO(':memory:')
+
+    opp = db.salvar_oportunidade({
+        'estrategia': 'VENDA_PUT', 'ativo': 'PETR4', 'score': 82,
+        'vencimento': '2030-01-18', 'dias_vencimento': 40,
+        'codigo_opcao_1': 'PETRM350', 'tipo_opcao_1': 'PUT', 'direcao_1': 'VENDA',
+        'strike_1': 35.0, 'preco_1': 0.85, 'quantidade_1': 100,
+        'credito_total': 85.0, 'resultado_liquido': 85.0, 'retorno_mensal': 1.9
+    })
+    pos = db.abrir_posicao(opp['id'], {**opp, 'preco_1': opp['preco_1']})
+    print(f"Posições ativas: {len(db.listar_posicoes_ativas())}")
+
+    db.fechar_posicao(pos['id'], 'Manual', 120.0)
+    print(f"Performance: {db.obter_performance()}")
+
+    db.log('INFO', 'teste', 'banco local ok', {'versao': 1})
+    print(f"Logs: {db.consultar('SELECT nivel, mensagem, dados FROM logs')}")
+    print(f"Configs: {db.obter_todas_configs()}")
@@ -0,0 +1,295 @@
+"""
+Backtest - RCO Scanner
+=======================
+Reexecuta os setups RCO sobre os snapshots de chains gravados
+
+Em cada data de entrada os setups_* do scanner rodam sobre a chain do
+dia e abrem posições simuladas. A marcação a mercado é uma matriz
+(dias × posições): saída no primeiro dia que bater o take-profit (60% do
+crédito) ou o stop, senão no vencimento pelo valor intrínseco. O
+resultado sai no formato de historico_operacoes.
+
+Uso:
+    python backtest.py PETR4 VALE3 [--inicio 2025-01-01] [--fim 2025-12-31]
+"""
+
+import argparse
+import logging
+from datetime import date, datetime
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from scanner_opcoes import ScannerOpcoesB3, ESTRATEGIAS
+from snapshots import ArmazemSnapshots, como_data
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUANTIDADE_PADRAO = 100  # Lote padrão (igual aos setups do scanner)
+
+
+class Backtester:
+    """Backtest vetorizado dos setups RCO"""
+
+    def __init__(self, armazem: ArmazemSnapshots = None, scanner: ScannerOpcoesB3 = None,
+                 take_profit: float = 0.60, stop_loss: float = 0.30, score_min: int = 60,
+                 por_estrategia: int = 1, intervalo_entrada: int = 5,
+                 estrategias=ESTRATEGIAS):
+        """
+        Args:
+            take_profit: fração do crédito que encerra com lucro (0.60 = 60%)
+            stop_loss: fração do crédito que encerra com prejuízo (0.30 = -30%,
+                       mesmo corte do status 'STOP LOSS' de v_posicoes_ativas)
+            score_min: score mínimo para abrir
+            por_estrategia: posições abertas por estratégia em cada entrada
+            intervalo_entrada: abre posições a cada N snapshots do ativo
+        """
+        self.armazem = armazem or ArmazemSnapshots()
+        self.scanner = scanner or ScannerOpcoesB3()
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        self.score_min = score_min
+        self.por_estrategia = por_estrategia
+        self.intervalo_entrada = intervalo_entrada
+        self.estrategias = estrategias
+
+    # ========================================================================
+    # ENTRADAS
+    # ========================================================================
+
+    def _abrir_posicoes(self, ativo: str, periodo: Dict[date, Dict]) -> List[Dict]:
+        """Roda os setups_* do scanner nas datas de entrada"""
+        buscadores = {
+            'VENDA_COBERTA': self.scanner.setups_venda_coberta,
+            'VENDA_PUT': self.scanner.setups_venda_put,
+            'TRAVA_ALTA_PUT': self.scanner.setups_trava_alta
+        }
+
+        posicoes = []
+        for data in sorted(periodo)[::self.intervalo_entrada]:
+            opcoes = self.armazem.carregar(ativo, data, periodo[data])
+            if 'erro' in opcoes:
+                continue
+            self.scanner.aplicar_smile(opcoes)
+            for estrategia in self.estrategias:
+                setups = [s for s in buscadores[estrategia](opcoes) if s['score'] >= self.score_min]
+                for setup in setups[:self.por_estrategia]:
+                    credito = setup['preco_1'] - (setup.get('preco_2') or 0)
+                    posicoes.append({
+                        'ativo': ativo,
+                        'estrategia': estrategia,
+                        'score': setup['score'],
+                        'data_entrada': data,
+                        'vencimento': date.fromisoformat(setup['vencimento']),
+                        'codigo_1': setup['codigo_opcao_1'],
+                        'codigo_2': setup.get('codigo_opcao_2') or '',
+                        'tipo_1': setup['tipo_opcao_1'],
+                        'strike_1': setup['strike_1'],
+                        'strike_2': setup.get('strike_2') or 0.0,
+                        'credito': credito,
+                        'spot_entrada': opcoes['preco_atual'],
+                        'quantidade': setup.get('quantidade_1', QUANTIDADE_PADRAO)
+                    })
+        return posicoes
+
+    # ========================================================================
+    # MARCAÇÃO A MERCADO (vetorizada)
+    # ========================================================================
+
+    def _simular_ativo(self, ativo: str, inicio: date = None, fim: date = None) -> List[Dict]:
+        periodo = self.armazem.carregar_periodo(ativo, inicio, fim)
+        if len(periodo) < 2:
+            return []
+
+        posicoes = self._abrir_posicoes(ativo, periodo)
+        if not posicoes:
+            return []
+
+        tabela = self.armazem.carregar_tabela(ativo, periodo=periodo)
+
+        # Preço para zerar: recompra a vendida no ask, vende a comprada no bid
+        # (último negócio quando não há oferta); dias sem cotação herdam o anterior
+        tabela['compra'] = tabela['ask'].where(tabela['ask'] > 0, tabela['ultimo_preco'])
+        tabela['venda'] = tabela['bid'].where(tabela['bid'] > 0, tabela['ultimo_preco'])
+        dias = pd.DatetimeIndex(sorted(tabela['data'].unique()))
+        compra = tabela.pivot_table(index='data', columns='codigo', values='compra', aggfunc='last').reindex(dias).ffill()
+        venda = tabela.pivot_table(index='data', columns='codigo', values='venda', aggfunc='last').reindex(dias).ffill()
+        spot = tabela.groupby('data')['preco_atual'].last().reindex(dias).ffill().to_numpy()
+
+        pos = pd.DataFrame(posicoes)
+        colunas = compra.columns
+        i1 = colunas.get_indexer(pos['codigo_1'])
+        i2 = colunas.get_indexer(pos['codigo_2'])
+        tem_2 = (pos['codigo_2'] != '').to_numpy()
+
+        # Matrizes (dias × posições)
+        matriz_compra = compra.to_numpy()
+        matriz_venda = venda.to_numpy()
+        custo = np.where(i1 >= 0, matriz_compra[:, np.maximum(i1, 0)], np.nan)
+        custo = custo - np.where(tem_2 & (i2 >= 0), matriz_venda[:, np.maximum(i2, 0)], 0.0)
+
+        # Valor intrínseco no vencimento
+        strike_1 = pos['strike_1'].to_numpy()
+        strike_2 = pos['strike_2'].to_numpy()
+        eh_call = (pos['tipo_1'] == 'CALL').to_numpy()
+        s = spot[:, None]
+        intrinseco = np.where(eh_call, np.maximum(s - strike_1, 0), np.maximum(strike_1 - s, 0))
+        intrinseco = intrinseco - np.where(tem_2, np.maximum(strike_2 - s, 0), 0.0)
+
+        dias_np = dias.to_numpy().astype('datetime64[D]')
+        entrada = pos['data_entrada'].to_numpy().astype('datetime64[D]')
+        vencimento = pos['vencimento'].to_numpy().astype('datetime64[D]')
+        # A vida da posição vai até o primeiro snapshot no vencimento ou depois dele
+        # (fim de semana, feriado ou dia sem dashboard deixam lacuna na data exata)
+        dia_liquidacao = np.searchsorted(dias_np, vencimento, side='left')
+        ativo_no_dia = (dias_np[:, None] > entrada) & (np.arange(len(dias))[:, None] <= dia_liquidacao)
+        no_vencimento = dias_np[:, None] >= vencimento
+
+        custo = np.where(no_vencimento, intrinseco, custo)
+        credito = pos['credito'].to_numpy()
+        pnl = credito - custo  # por ação
+
+        # Venda coberta inclui a ação: a alta que encarece a call valoriza o papel
+        coberta = (pos['estrategia'] == 'VENDA_COBERTA').to_numpy()
+        pnl = pnl + np.where(coberta, s - pos['spot_entrada'].to_numpy(), 0.0)
+
+        alvo = pnl >= self.take_profit * credito
+        stop = pnl <= -self.stop_loss * credito
+        saida = ativo_no_dia & (alvo | stop | no_vencimento)
+        saida &= ~np.isnan(pnl)
+
+        teve_saida = saida.any(axis=0)
+        ultimo_dia = np.where(ativo_no_dia, np.arange(len(dias))[:, None], -1).max(axis=0)
+        dia_saida = np.where(teve_saida, saida.argmax(axis=0), ultimo_dia)
+
+        colunas_pos = np.arange(len(pos))
+        valida = dia_saida >= 0
+        pnl_saida = np.where(valida, pnl[np.maximum(dia_saida, 0), colunas_pos], np.nan)
+        alvo_saida = alvo[np.maximum(dia_saida, 0), colunas_pos]
+        venc_saida = no_vencimento[np.maximum(dia_saida, 0), colunas_pos]
+
+        motivo = np.select(
+            [~teve_saida, alvo_saida, venc_saida],
+            ['FIM_DADOS', 'TAKE_PROFIT', 'VENCIMENTO'],
+            default='STOP_LOSS'
+        )
+
+        quantidade = pos['quantidade'].to_numpy()
+        valor_entrada = credito * quantidade
+        resultado = pnl_saida * quantidade
+
+        operacoes = []
+        for k in np.flatnonzero(valida & ~np.isnan(pnl_saida)):
+            data_saida = dias[dia_saida[k]].date()
+            data_entrada = pos.at[k, 'data_entrada']
+            operacoes.append({
+                'posicao_id': f"bt-{ativo}-{k}",
+                'ativo': ativo,
+                'estrategia': pos.at[k, 'estrategia'],
+                'data_entrada': datetime.combine(data_entrada, datetime.min.time()).isoformat(),
+                'data_saida': datetime.combine(data_saida, datetime.min.time()).isoformat(),
+                'dias_mantida': (data_saida - data_entrada).days,
+                'valor_entrada': round(float(valor_entrada[k]), 2),
+                'valor_saida': round(float(valor_entrada[k] + resultado[k]), 2),
+                'resultado': round(float(resultado[k]), 2),
+                'retorno_percentual': round(float(resultado[k] / valor_entrada[k] * 100), 2) if valor_entrada[k] else 0,
+                'motivo': str(motivo[k])
+            })
+        return operacoes
+
+    # ========================================================================
+    # EXECUÇÃO
+    # ========================================================================
+
+    def executar(self, ativos: List[str] = None, inicio=None, fim=None) -> List[Dict]:
+        """
+        Backtest nos ativos (padrão: todos com snapshot) entre `inicio` e `fim`
+
+        Returns:
+            Operações no formato de historico_operacoes
+        """
+        inicio = como_data(inicio) if inicio else None
+        fim = como_data(fim) if fim else None
+
+        operacoes = []
+        for ativo in ativos or self.armazem.ativos():
+            try:
+                operacoes.extend(self._simular_ativo(ativo, inicio, fim))
+            except Exception as e:
+                logger.error(f"❌ Erro no backtest de {ativo}: {e}")
+        return operacoes
+
+
+def resumir(operacoes: List[Dict]) -> Dict:
+    """Resumo no espírito de v_performance (por estratégia e total)"""
+    if not operacoes:
+        return {}
+
+    df = pd.DataFrame(operacoes)
+    df['vencedora'] = df['resultado'] > 0
+
+    def _linha(grupo: pd.DataFrame) -> Dict:
+        return {
+            'total_operacoes': int(len(grupo)),
+            'taxa_acerto': round(float(grupo['vencedora'].mean() * 100), 1),
+            'resultado_total': round(float(grupo['resultado'].sum()), 2),
+            'retorno_medio': round(float(grupo['retorno_percentual'].mean()), 2),
+            'dias_medio': round(float(grupo['dias_mantida'].mean()), 1),
+            'saidas': grupo['motivo'].value_counts().to_dict()
+        }
+
+    resumo = {'TOTAL': _linha(df)}
+    for estrategia, grupo in df.groupby('estrategia'):
+        resumo[estrategia] = _linha(grupo)
+    return resumo
+
+
+def _exemplo_lacuna_vencimento():
+    """Put vendida com snapshots em dias úteis e sem snapshot na data do vencimento"""
+    import tempfile
+    from datetime import timedelta
+
+    armazem = ArmazemSnapshots(tempfile.mkdtemp())
+    vencimento = date(2026, 11, 20)  # sexta-feira (feriado da Consciência Negra)
+    data = vencimento - timedelta(days=35)
+    while data <= vencimento + timedelta(days=5):
+        if data.weekday() < 5 and data != vencimento:
+            spot = 38.0 - 0.1 * (35 - (vencimento - data).days)  # cai até abaixo do strike
+            premio = max(36.0 - spot, 0) + 0.8 * max((vencimento - data).days, 0) / 35
+            armazem.salvar({'ativo': 'TEST3', 'preco_atual': spot, 'calls': [], 'puts': [{
+                'codigo': 'TESTW360', 'tipo': 'PUT', 'vencimento': vencimento.isoformat(), 'strike': 36.0,
+                'bid': premio, 'ask': premio + 0.02, 'ultimo_preco': premio,
+                'volume': 200, 'open_interest': 900, 'iv': 40.0, 'delta': -30.0
+            }]}, data)
+        data += timedelta(days=1)
+
+    backtester = Backtester(armazem, take_profit=10, stop_loss=10, score_min=0, intervalo_entrada=100)
+    for operacao in backtester.executar(['TEST3']):
+        print(f"Lacuna no vencimento: saída {operacao['data_saida'][:10]} por {operacao['motivo']} "
+              f"| resultado R$ {operacao['resultado']:.2f}")
+
+
+# Teste
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Backtest dos setups RCO sobre snapshots')
+    parser.add_argument('ativos', nargs='*', help='Ativos (padrão: todos com snapshot)')
+    parser.add_argument('--inicio', help='AAAA-MM-DD')
+    parser.add_argument('--fim', help='AAAA-MM-DD')
+    parser.add_argument('--exemplo', action='store_true', help='Roda o exemplo com lacuna no vencimento')
+    args = parser.parse_args()
+
+    if args.exemplo:
+        _exemplo_lacuna_vencimento()
+        raise SystemExit
+
+    backtester = Backtester()
+    operacoes = backtester.executar(args.ativos, args.inicio, args.fim)
+    print(f"📊 {len(operacoes)} operações simuladas")
+
+    for nome, linha in resumir(operacoes).items():
+        print(f"\n{nome}:")
+        print(f"  Operações: {linha['total_operacoes']} | Acerto: {linha['taxa_acerto']}%")
+        print(f"  Resultado: R$ {linha['resultado_total']:.2f} | Retorno médio: {linha['retorno_medio']:.1f}%")
+        print(f"  Saídas: {linha['saidas']}")
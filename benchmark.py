@@ -0,0 +1,283 @@
+"""
+Benchmark - RCO Scanner
+========================
+Medições de desempenho do projeto
+
+Uso:
+    python benchmark.py            # roda tudo e grava bench_output.txt
+    python benchmark.py startup    # só as medições escolhidas
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_SAIDA = os.path.join(DIRETORIO, 'bench_output.txt')
+
+# Módulos carregados na abertura do dashboard / scripts
+MODULOS_STARTUP = [
+    'scanner_opcoes',
+    'armazenamento',
+    'supabase_client',
+    'tarefas_scan',
+    'alertas_telegram',
+    'snapshots',
+    'busca_resiliente',
+]
+
+
+# ============================================================================
+# STARTUP (python -X importtime)
+# ============================================================================
+
+def _importtime(modulo: str) -> Tuple[float, float, List[Tuple[int, str]]]:
+    """
+    Importa `modulo` num processo novo com -X importtime
+
+    Retorna (tempo total do processo em ms, cumulativo do módulo em ms,
+    [(cumulativo_us, pacote)] dos imports diretos, sem os do interpretador)
+    """
+    inicio = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=DIRETORIO, capture_output=True, text=True
+    )
+    total_ms = (time.perf_counter() - inicio) * 1000
+
+    if proc.returncode != 0:
+        erro = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'erro'
+        raise RuntimeError(erro)
+
+    cumulativo_modulo = 0.0
+    primeiro_nivel = []
+    for linha in proc.stderr.splitlines():
+        m = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', linha)
+        if not m:
+            continue
+        cumulativo, indentacao, nome = int(m.group(2)), len(m.group(3)), m.group(4)
+        if nome == modulo:
+            cumulativo_modulo = cumulativo / 1000
+        if indentacao <= 3 and nome != modulo and nome.split('.')[0] not in ('site', 'encodings'):
+            primeiro_nivel.append((cumulativo, nome))
+
+    primeiro_nivel.sort(reverse=True)
+    return total_ms, cumulativo_modulo, primeiro_nivel
+
+
+def bench_startup() -> List[str]:
+    """Custo de import de cada módulo (processo novo, -X importtime)"""
+    linhas = [f"{'módulo':<22} {'processo':>10} {'import':>10}  imports mais pesados"]
+    for modulo in MODULOS_STARTUP:
+        try:
+            total_ms, modulo_ms, pesados = _importtime(modulo)
+        except RuntimeError as e:
+            linhas.append(f"{modulo:<22} {'-':>10} {'-':>10}  não importou ({e})")
+            continue
+
+        top = ', '.join(f"{nome} {us / 1000:.1f}ms" for us, nome in pesados[:3])
+        linhas.append(f"{modulo:<22} {total_ms:>8.0f}ms {modulo_ms:>8.1f}ms  {top}")
+    return linhas
+
+
+# ============================================================================
+# TABELA DE RESULTADOS
+# ============================================================================
+
+def _oportunidades_ficticias(n: int) -> List[Dict]:
+    """Oportunidades com o formato do scanner (valores determinísticos)"""
+    import random
+    rnd = random.Random(42)
+    estrategias = ['VENDA_COBERTA', 'VENDA_PUT', 'TRAVA_ALTA_PUT']
+    ops = []
+    for i in range(n):
+        estrategia = estrategias[i % 3]
+        strike = round(rnd.uniform(10, 80), 2)
+        ops.append({
+            'estrategia': estrategia,
+            'ativo': f"ATV{i % 30:02d}",
+            'score': rnd.randint(40, 100),
+            'codigo_opcao_1': f"ATVX{i:03d}",
+            'codigo_opcao_2': f"ATVX{i + 1:03d}" if estrategia == 'TRAVA_ALTA_PUT' else None,
+            'strike_1': strike,
+            'preco_1': round(rnd.uniform(0.1, 2), 2),
+            'quantidade_1': 100,
+            'vencimento': '2026-11-20',
+            'dias_vencimento': rnd.randint(5, 45),
+            'resultado_liquido': round(rnd.uniform(10, 200), 2),
+            'risco_maximo': round(rnd.uniform(50, 300), 2) if estrategia == 'TRAVA_ALTA_PUT' else None,
+            'retorno_percentual': round(rnd.uniform(0.5, 8), 2),
+            'probabilidade_sucesso': round(rnd.uniform(50, 90), 1),
+            'iv': round(rnd.uniform(20, 60), 1),
+        })
+    return ops
+
+
+def bench_tabela() -> List[str]:
+    """Tabela do Scanner Top 30: montar DataFrame + filtrar/ordenar/paginar"""
+    from tabela_resultados import montar_dataframe, filtrar_ordenar_paginar, formatar_pagina
+
+    linhas = [f"{'linhas':>7} {'montar':>10} {'página 1':>10} {'última':>10} {'filtrado':>10}"]
+    for n in (300, 3000):
+        ops = _oportunidades_ficticias(n)
+
+        inicio = time.perf_counter()
+        df = montar_dataframe(ops)
+        montar_ms = (time.perf_counter() - inicio) * 1000
+
+        def medir(**kwargs) -> float:
+            repeticoes = 20
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                pagina, _, _ = filtrar_ordenar_paginar(df, **kwargs)
+                formatar_pagina(pagina)
+            return (time.perf_counter() - inicio) * 1000 / repeticoes
+
+        primeira = medir(pagina=1)
+        ultima = medir(pagina=10 ** 6, ordenar_por='retorno_percentual')
+        filtrado = medir(ativos=['ATV01', 'ATV02'], estrategias=['VENDA PUT'], score_min=60)
+        linhas.append(f"{n:>7} {montar_ms:>8.1f}ms {primeira:>8.2f}ms {ultima:>8.2f}ms {filtrado:>8.2f}ms")
+    return linhas
+
+
+# ============================================================================
+# BACKTEST
+# ============================================================================
+
+def _gravar_snapshots_ficticios(armazem, ativo: str, dias: int):
+    """Chains diárias de um passeio aleatório (prêmio = intrínseco + valor no tempo)"""
+    import numpy as np
+    from datetime import date, timedelta
+
+    rnd = np.random.default_rng(7)
+    inicio = date(2024, 1, 1)
+    vencimentos = [inicio + timedelta(days=28 * k) for k in range(1, dias // 28 + 4)]
+    preco = 30.0
+
+    for i in range(dias):
+        data = inicio + timedelta(days=i)
+        preco *= float(np.exp(rnd.normal(0, 0.02)))
+        calls, puts = [], []
+        for venc in vencimentos:
+            prazo = (venc - data).days
+            if prazo < 1 or prazo > 90:
+                continue
+            tempo = 0.4 * preco * np.sqrt(prazo / 365) * 0.4
+            for strike in np.round(preco * np.arange(0.8, 1.21, 0.02), 2):
+                for tipo, lista in (('CALL', calls), ('PUT', puts)):
+                    intrinseco = max(preco - strike, 0) if tipo == 'CALL' else max(strike - preco, 0)
+                    premio = intrinseco + tempo * np.exp(-abs(strike / preco - 1) * 8)
+                    lista.append({
+                        'codigo': f"{ativo[:4]}{tipo[0]}{venc:%y%m%d}{int(strike * 100)}",
+                        'tipo': tipo, 'vencimento': venc.isoformat(), 'strike': float(strike),
+                        'bid': premio - 0.02, 'ask': premio + 0.02, 'ultimo_preco': premio,
+                        'volume': 200, 'open_interest': 900, 'iv': 40.0,
+                        'delta': 30.0 if tipo == 'CALL' else -30.0
+                    })
+        armazem.salvar({'ativo': ativo, 'preco_atual': preco, 'calls': calls, 'puts': puts}, data)
+
+
+def bench_backtest() -> List[str]:
+    """Backtest vetorizado sobre 2 anos de snapshots diários fictícios"""
+    import tempfile
+    from snapshots import ArmazemSnapshots
+    from backtest import Backtester, resumir
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazem = ArmazemSnapshots(diretorio)
+        inicio = time.perf_counter()
+        _gravar_snapshots_ficticios(armazem, 'TEST3', 730)
+        gravar_s = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        operacoes = Backtester(armazem, intervalo_entrada=1).executar()
+        backtest_s = time.perf_counter() - inicio
+
+    total = resumir(operacoes).get('TOTAL', {})
+    return [
+        f"snapshots gravados: 730 em {gravar_s:.1f}s",
+        f"backtest: {len(operacoes)} operações em {backtest_s:.2f}s | saídas {total.get('saidas', {})}",
+    ]
+
+
+def bench_varredura() -> List[str]:
+    """Varredura de 12 combinações de parâmetros sobre 1 ano de snapshots fictícios"""
+    import tempfile
+    from snapshots import ArmazemSnapshots
+    from varredura_parametros import preparar_dados, varrer
+
+    grade = {'iv_min': [25, 30, 35], 'score_min': [60, 70], 'desconto_min': [2, 3]}
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazem = ArmazemSnapshots(os.path.join(diretorio, 'snapshots'))
+        _gravar_snapshots_ficticios(armazem, 'TEST3', 365)
+
+        inicio = time.perf_counter()
+        dados = preparar_dados(armazem, diretorio=os.path.join(diretorio, 'consolidado'))
+        preparar_s = time.perf_counter() - inicio
+
+        linhas = [f"consolidação: {preparar_s:.2f}s"]
+        for processos in (1, None):
+            inicio = time.perf_counter()
+            resultados = varrer(grade, dados, processos=processos)
+            rotulo = 'sequencial' if processos == 1 else f"pool ({os.cpu_count()} processos)"
+            linhas.append(f"{rotulo}: {len(resultados)} combinações em {time.perf_counter() - inicio:.2f}s")
+    return linhas
+
+
+# ============================================================================
+# CARGA (chains sintéticas)
+# ============================================================================
+
+def bench_carga() -> List[str]:
+    """Scan completo sobre chains sintéticas: universo atual (30 ativos) e 10x"""
+    from gerador_sintetico import GeradorChains, ativos_sinteticos
+    from scanner_opcoes import ScannerOpcoesB3
+
+    linhas = [f"{'ativos':>7} {'opções':>8} {'setups':>7} {'tempo':>8} {'ativos/s':>9}"]
+    for quantidade in (30, 300):
+        scanner = ScannerOpcoesB3(fonte_dados=GeradorChains(), suavizar_iv=True)
+        ativos = ativos_sinteticos(quantidade)
+        inicio = time.perf_counter()
+        setups = sum(len(lote.setups) for lote in scanner.escanear_lotes(ativos))
+        segundos = time.perf_counter() - inicio
+        opcoes = sum(len(o['calls']) + len(o['puts']) for _, o in scanner.cache_opcoes.values())
+        linhas.append(f"{quantidade:>7} {opcoes:>8} {setups:>7} {segundos:>7.2f}s {quantidade / segundos:>9.1f}")
+    return linhas
+
+
+# ============================================================================
+# EXECUÇÃO
+# ============================================================================
+
+BENCHMARKS: Dict[str, Callable[[], List[str]]] = {
+    'startup': bench_startup,
+    'tabela': bench_tabela,
+    'backtest': bench_backtest,
+    'varredura': bench_varredura,
+    'carga': bench_carga,
+}
+
+
+def main(nomes: List[str] = None):
+    nomes = nomes or list(BENCHMARKS)
+    saida = [f"RCO Scanner - benchmark {time.strftime('%Y-%m-%d %H:%M:%S')} | Python {sys.version.split()[0]}"]
+
+    for nome in nomes:
+        funcao = BENCHMARKS[nome]
+        saida.append('')
+        saida.append(f"== {nome}: {funcao.__doc__}")
+        inicio = time.perf_counter()
+        saida.extend(funcao())
+        saida.append(f"({(time.perf_counter() - inicio):.1f}s)")
+
+    texto = '\n'.join(saida)
+    print(texto)
+    with open(ARQUIVO_SAIDA, 'w', encoding='utf-8') as f:
+        f.write(texto + '\n')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,96 @@
+"""
+Black-Scholes - RCO Scanner
+============================
+Preço e gregas de opções europeias, vetorizados com NumPy
+
+Todas as funções aceitam escalares ou arrays (com broadcasting).
+Prazo em anos, volatilidade e juros anuais em fração (0.35 = 35%).
+"""
+
+import numpy as np
+
+TAXA_JUROS_PADRAO = 0.10  # a.a., aproximação da Selic
+DIAS_ANO = 365
+
+# Coeficientes da aproximação de Abramowitz & Stegun 7.1.26 (erro < 1.5e-7)
+_P = 0.3275911
+_A = (0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429)
+
+
+def norm_cdf(x):
+    """Distribuição normal acumulada (sem SciPy)"""
+    x = np.asarray(x, dtype=np.float64)
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + _P * z)
+    poly = t * (_A[0] + t * (_A[1] + t * (_A[2] + t * (_A[3] + t * _A[4]))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+def norm_pdf(x):
+    x = np.asarray(x, dtype=np.float64)
+    return np.exp(-0.5 * x * x) / np.sqrt(2.0 * np.pi)
+
+
+def prazo_anos(dias) -> np.ndarray:
+    """Dias corridos → anos (mínimo de meio dia para evitar divisão por zero)"""
+    return np.maximum(np.asarray(dias, dtype=np.float64), 0.5) / DIAS_ANO
+
+
+def _d1_d2(S, K, T, sigma, r):
+    S, K, T, sigma = (np.asarray(v, dtype=np.float64) for v in (S, K, T, sigma))
+    sigma = np.maximum(sigma, 1e-6)
+    T = np.maximum(T, 1e-9)
+    K = np.maximum(K, 1e-9)
+    raiz = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / raiz
+    return d1, d1 - raiz
+
+
+def preco(S, K, T, sigma, eh_call, r: float = TAXA_JUROS_PADRAO):
+    """Prêmio teórico (eh_call: bool ou array de bool)"""
+    d1, d2 = _d1_d2(S, K, T, sigma, r)
+    desconto = np.exp(-r * np.asarray(T, dtype=np.float64))
+    call = S * norm_cdf(d1) - K * desconto * norm_cdf(d2)
+    put = K * desconto * norm_cdf(-d2) - S * norm_cdf(-d1)
+    return np.where(eh_call, call, put)
+
+
+def gregas(S, K, T, sigma, eh_call, r: float = TAXA_JUROS_PADRAO) -> dict:
+    """
+    Delta, gama, vega (por 1 ponto de vol) e theta (por dia corrido)
+    de uma opção comprada; para vendida, inverter o sinal
+    """
+    d1, d2 = _d1_d2(S, K, T, sigma, r)
+    S = np.asarray(S, dtype=np.float64)
+    T = np.maximum(np.asarray(T, dtype=np.float64), 1e-9)
+    sigma = np.maximum(np.asarray(sigma, dtype=np.float64), 1e-6)
+    desconto = np.exp(-r * T)
+    densidade = norm_pdf(d1)
+
+    delta = np.where(eh_call, norm_cdf(d1), norm_cdf(d1) - 1.0)
+    gama = densidade / (S * sigma * np.sqrt(T))
+    vega = S * densidade * np.sqrt(T) / 100
+    theta_comum = -S * densidade * sigma / (2 * np.sqrt(T))
+    theta = np.where(
+        eh_call,
+        theta_comum - r * K * desconto * norm_cdf(d2),
+        theta_comum + r * K * desconto * norm_cdf(-d2)
+    ) / DIAS_ANO
+
+    return {'delta': delta, 'gama': gama, 'vega': vega, 'theta': theta}
+
+
+def delta(S, K, T, sigma, eh_call, r: float = TAXA_JUROS_PADRAO):
+    """Delta (0 a 1 para call, -1 a 0 para put)"""
+    d1, _ = _d1_d2(S, K, T, sigma, r)
+    return np.where(eh_call, norm_cdf(d1), norm_cdf(d1) - 1.0)
+
+
+# Teste
+if __name__ == "__main__":
+    S, K, T, vol = 38.0, np.array([36.0, 38.0, 40.0]), prazo_anos(35), 0.35
+    print(f"Calls: {np.round(preco(S, K, T, vol, True), 3)}")
+    print(f"Puts:  {np.round(preco(S, K, T, vol, False), 3)}")
+    print(f"Delta call: {np.round(delta(S, K, T, vol, True), 3)}")
+    print(f"N(1.96) = {float(norm_cdf(1.96)):.5f}")
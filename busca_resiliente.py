@@ -0,0 +1,410 @@
+"""
+Busca Resiliente - RCO Scanner
+===============================
+Camada tolerante a falhas entre o scanner e o Yahoo Finance
+
+`FonteResiliente` faz o papel de `yf.Ticker` (ScannerOpcoesB3(fonte_dados=...))
+e cada chamada do ticker (history, options, option_chain) passa por:
+- prazo por chamada (a chamada travada é abandonada, não trava o scan);
+- prazo por ativo (soma do tempo gasto nas chamadas de um ticker);
+- retentativas com backoff exponencial e jitter total;
+- disjuntor por host: depois de N falhas seguidas as chamadas falham na
+  hora por `tempo_aberto` segundos, e uma chamada de teste decide se fecha;
+- requisição duplicada opcional (hedge): se a primeira passar do p95 das
+  latências recentes, uma segunda é disparada e vale a que voltar antes;
+- orçamento global (BaldeTokens): cada tentativa, retentativas e hedges
+  incluídos, gasta um token. Quem precisa de várias chamadas (monitor de
+  posições) reserva o lote antes com `reservar`.
+
+Quando a fonte não responde, o scanner serve o último snapshot do ativo
+marcado como desatualizado (ScannerOpcoesB3._chain_desatualizada).
+
+As latências (p50/p99) e os contadores saem em `metricas()`, que o scan
+publica junto com o progresso (TarefaScan.metricas).
+"""
+
+import random
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from despachante_telegram import BaldeTokens
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRAZO_CHAMADA = 15.0      # segundos por chamada ao Yahoo
+PRAZO_ATIVO = 60.0        # segundos somados por ativo (preço + vencimentos)
+TENTATIVAS = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+REQUISICOES_POR_MINUTO = 60.0  # orçamento global no Yahoo (rajada de até um minuto)
+FALHAS_PARA_ABRIR = 5
+TEMPO_ABERTO = 60.0       # segundos com o disjuntor aberto antes da chamada de teste
+JANELA_LATENCIAS = 500
+
+
+class CircuitoAberto(Exception):
+    """Host com o disjuntor aberto: chamada recusada sem ir à rede"""
+
+
+class PrazoEsgotado(TimeoutError):
+    """Prazo da chamada ou do ativo estourado"""
+
+
+class EstatisticasLatencia:
+    """Últimas latências (janela fixa) e percentis"""
+
+    def __init__(self, janela: int = JANELA_LATENCIAS):
+        self._valores = deque(maxlen=janela)
+        self._lock = threading.Lock()
+
+    def registrar(self, segundos: float):
+        with self._lock:
+            self._valores.append(segundos)
+
+    def percentil(self, p: float) -> Optional[float]:
+        import numpy as np  # só quando há latências (fora do import do dashboard)
+
+        with self._lock:
+            if not self._valores:
+                return None
+            return float(np.percentile(np.fromiter(self._valores, dtype=np.float64), p))
+
+    def __len__(self) -> int:
+        return len(self._valores)
+
+
+class Disjuntor:
+    """Circuit breaker de um host (FECHADO → ABERTO → SEMI_ABERTO → FECHADO)"""
+
+    def __init__(self, falhas_para_abrir: int = FALHAS_PARA_ABRIR, tempo_aberto: float = TEMPO_ABERTO):
+        self.falhas_para_abrir = falhas_para_abrir
+        self.tempo_aberto = tempo_aberto
+        self.estado = 'FECHADO'
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        """A chamada pode ir à rede? (no SEMI_ABERTO, só uma de teste por vez)"""
+        with self._lock:
+            if self.estado == 'FECHADO':
+                return True
+            if self.estado == 'ABERTO' and time.monotonic() - self._aberto_em >= self.tempo_aberto:
+                self.estado = 'SEMI_ABERTO'
+            if self.estado == 'SEMI_ABERTO' and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return True
+            return False
+
+    def sucesso(self):
+        with self._lock:
+            if self.estado != 'FECHADO':
+                logger.info("✅ Disjuntor fechado: fonte respondendo")
+            self.estado = 'FECHADO'
+            self._falhas = 0
+            self._teste_em_andamento = False
+
+    def falha(self):
+        with self._lock:
+            self._falhas += 1
+            self._teste_em_andamento = False
+            if self.estado == 'SEMI_ABERTO' or (self.estado == 'FECHADO' and self._falhas >= self.falhas_para_abrir):
+                if self.estado == 'FECHADO':
+                    logger.warning(f"⚠️ Disjuntor aberto após {self._falhas} falhas seguidas")
+                self.estado = 'ABERTO'
+                self._aberto_em = time.monotonic()
+
+
+class FonteResiliente:
+    """Fábrica de tickers (como yf.Ticker) com prazos, retentativas, disjuntor e hedge"""
+
+    def __init__(self, fonte: Callable = None, host: str = 'yahoo',
+                 prazo_chamada: float = PRAZO_CHAMADA, prazo_ativo: float = PRAZO_ATIVO,
+                 tentativas: int = TENTATIVAS, backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX, hedge: bool = False, atraso_hedge: float = None,
+                 disjuntor: Disjuntor = None, max_workers: int = 8,
+                 requisicoes_por_minuto: Optional[float] = REQUISICOES_POR_MINUTO,
+                 orcamento: 'BaldeTokens' = None):
+        """
+        Args:
+            fonte: fábrica de tickers de verdade (padrão: yf.Ticker, importado no primeiro uso)
+            host: nome do disjuntor (fontes do mesmo host compartilham o estado via `disjuntor`)
+            hedge: dispara uma segunda chamada quando a primeira demora
+            atraso_hedge: espera antes do hedge (padrão: p95 das latências recentes)
+            max_workers: threads para as chamadas (as abandonadas por prazo ocupam uma até voltar)
+            requisicoes_por_minuto: orçamento de chamadas ao host (None = sem limite)
+            orcamento: BaldeTokens já existente (fontes do mesmo host dividem o orçamento)
+        """
+        self.fonte = fonte
+        self.host = host
+        self.prazo_chamada = prazo_chamada
+        self.prazo_ativo = prazo_ativo
+        self.tentativas = tentativas
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.atraso_hedge = atraso_hedge
+        self.disjuntor = disjuntor or Disjuntor()
+        if orcamento is None and requisicoes_por_minuto:
+            from despachante_telegram import BaldeTokens
+            orcamento = BaldeTokens(requisicoes_por_minuto / 60.0, capacidade=max(requisicoes_por_minuto, 1.0))
+        self.orcamento = orcamento
+        self._reservas = threading.local()  # chamadas já pagas por `reservar`, por thread
+        self.latencias = EstatisticasLatencia()
+        self.contadores = {'chamadas': 0, 'falhas': 0, 'retentativas': 0, 'prazos': 0,
+                           'recusadas': 0, 'sem_orcamento': 0, 'hedges': 0, 'hedges_vencedores': 0}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'busca_{host}')
+        self._lock = threading.Lock()
+
+    def __call__(self, simbolo: str) -> 'TickerResiliente':
+        if self.fonte is None:
+            import yfinance as yf
+            self.fonte = yf.Ticker
+        return TickerResiliente(self, simbolo)
+
+    def _contar(self, chave: str, n: int = 1):
+        with self._lock:
+            self.contadores[chave] += n
+
+    # ========================================================================
+    # ORÇAMENTO
+    # ========================================================================
+
+    def reservar(self, n: int) -> float:
+        """
+        Paga adiantado `n` chamadas da thread atual (vale até a próxima reserva)
+
+        Returns:
+            0.0 se reservou; senão os segundos até haver saldo (nada é gasto)
+        """
+        espera = self.orcamento.tentar_consumir(n) if self.orcamento is not None else 0.0
+        if espera == 0.0:
+            self._reservas.saldo = n
+        return espera
+
+    def _pagar(self, prazo: float) -> bool:
+        """Um token para a próxima tentativa: da reserva da thread ou do balde (espera até `prazo`)"""
+        if getattr(self._reservas, 'saldo', 0) > 0:
+            self._reservas.saldo -= 1
+            return True
+        return self.orcamento is None or self.orcamento.consumir(1, timeout=prazo)
+
+    # ========================================================================
+    # EXECUÇÃO
+    # ========================================================================
+
+    def executar(self, funcao: Callable, descricao: str = '', prazo: float = None):
+        """
+        Chama `funcao()` com prazo, retentativas e disjuntor
+
+        Args:
+            prazo: tempo total disponível (inclui esperas entre tentativas)
+
+        Raises:
+            CircuitoAberto, PrazoEsgotado ou o último erro da função
+        """
+        limite = time.monotonic() + (self.prazo_chamada * self.tentativas if prazo is None else prazo)
+        ultimo_erro: Exception = PrazoEsgotado(f"Prazo esgotado: {descricao}")
+
+        for tentativa in range(self.tentativas):
+            if not self.disjuntor.permitir():
+                self._contar('recusadas')
+                raise CircuitoAberto(f"Disjuntor aberto ({self.host}): {descricao}")
+
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            if not self._pagar(restante):
+                self._contar('sem_orcamento')
+                ultimo_erro = PrazoEsgotado(f"Orçamento de requisições esgotado: {descricao}")
+                break
+            restante = limite - time.monotonic()
+            if tentativa:
+                self._contar('retentativas')
+
+            self._contar('chamadas')
+            inicio = time.monotonic()
+            try:
+                resultado = self._com_prazo(funcao, min(self.prazo_chamada, restante))
+            except Exception as e:
+                self.latencias.registrar(time.monotonic() - inicio)
+                self.disjuntor.falha()
+                self._contar('prazos' if isinstance(e, PrazoEsgotado) else 'falhas')
+                ultimo_erro = e
+            else:
+                self.latencias.registrar(time.monotonic() - inicio)
+                self.disjuntor.sucesso()
+                return resultado
+
+            # Jitter total: espera sorteada em [0, base * 2^tentativa]
+            espera = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** tentativa))
+            if time.monotonic() + espera >= limite:
+                break
+            time.sleep(espera)
+
+        logger.warning(f"⚠️ {descricao}: {ultimo_erro}")
+        raise ultimo_erro
+
+    def _com_prazo(self, funcao: Callable, prazo: float):
+        """Roda no pool e espera até `prazo` (com hedge, se ligado)"""
+        limite = time.monotonic() + prazo
+        futuros = [self._pool.submit(funcao)]
+
+        if self.hedge:
+            atraso = self.atraso_hedge
+            if atraso is None and len(self.latencias) >= 20:
+                atraso = self.latencias.percentil(95)
+            if atraso is not None and atraso < prazo:
+                feitos, _ = wait(futuros, timeout=atraso)
+                if not feitos and (self.orcamento is None or self.orcamento.tentar_consumir(1) == 0.0):
+                    futuros.append(self._pool.submit(funcao))
+                    self._contar('hedges')
+
+        pendentes = set(futuros)
+        erro = None
+        while pendentes:
+            feitos, pendentes = wait(pendentes, timeout=max(limite - time.monotonic(), 0),
+                                     return_when=FIRST_COMPLETED)
+            if not feitos:
+                break
+            for futuro in feitos:
+                if futuro.exception() is None:
+                    if futuro is not futuros[0]:
+                        self._contar('hedges_vencedores')
+                    return futuro.result()
+                erro = futuro.exception()
+
+        if erro is not None and not pendentes:
+            raise erro
+        raise PrazoEsgotado(f"Sem resposta em {prazo:.1f}s")
+
+    # ========================================================================
+    # MÉTRICAS
+    # ========================================================================
+
+    def metricas(self) -> Dict:
+        """Latência p50/p99 (s), contadores e estado do disjuntor"""
+        with self._lock:
+            contadores = dict(self.contadores)
+        return {
+            'latencia_p50': self.latencias.percentil(50),
+            'latencia_p99': self.latencias.percentil(99),
+            **contadores,
+            'disjuntor': self.disjuntor.estado
+        }
+
+
+class TickerResiliente:
+    """Mesma interface usada de yf.Ticker, com as chamadas passando pela FonteResiliente"""
+
+    def __init__(self, fonte: FonteResiliente, simbolo: str):
+        self._fonte = fonte
+        self.ticker = simbolo
+        self._ticker = None
+        self._gasto = 0.0  # segundos já consumidos do prazo do ativo
+
+    def _chamar(self, descricao: str, funcao: Callable):
+        restante = self._fonte.prazo_ativo - self._gasto
+        if restante <= 0:
+            raise PrazoEsgotado(f"Prazo do ativo {self.ticker} esgotado")
+
+        inicio = time.monotonic()
+        try:
+            return self._fonte.executar(funcao, f"{self.ticker} {descricao}", prazo=restante)
+        finally:
+            self._gasto += time.monotonic() - inicio
+
+    def _real(self):
+        if self._ticker is None:
+            self._ticker = self._fonte.fonte(self.ticker)
+        return self._ticker
+
+    def history(self, *args, **kwargs):
+        return self._chamar('history', lambda: self._real().history(*args, **kwargs))
+
+    @property
+    def options(self):
+        return self._chamar('options', lambda: self._real().options)
+
+    def option_chain(self, *args, **kwargs):
+        return self._chamar('option_chain', lambda: self._real().option_chain(*args, **kwargs))
+
+
+# Teste
+if __name__ == "__main__":
+    from gerador_sintetico import GeradorChains
+
+    class Instavel:
+        """GeradorChains com lentidão e falhas sorteadas"""
+
+        def __init__(self, lentas: float, falhas: float):
+            self.gerador = GeradorChains()
+            self.lentas, self.falhas = lentas, falhas
+            self.fora_do_ar = False
+
+        def __call__(self, simbolo):
+            real = self.gerador(simbolo)
+            fonte = self
+
+            class Ticker:
+                ticker = simbolo
+
+                def _atrasar(self):
+                    if fonte.fora_do_ar or random.random() < fonte.falhas:
+                        raise ConnectionError("Yahoo indisponível")
+                    time.sleep(2.0 if random.random() < fonte.lentas else 0.01)
+
+                def history(self, *a, **k):
+                    self._atrasar()
+                    return real.history(*a, **k)
+
+                @property
+                def options(self):
+                    self._atrasar()
+                    return real.options
+
+                def option_chain(self, *a, **k):
+                    self._atrasar()
+                    return real.option_chain(*a, **k)
+
+            return Ticker()
+
+    random.seed(1)
+    instavel = Instavel(lentas=0.05, falhas=0.05)
+    for hedge in (False, True):
+        fonte = FonteResiliente(instavel, prazo_chamada=1.0, backoff_base=0.05, hedge=hedge, atraso_hedge=0.1,
+                                requisicoes_por_minuto=None)
+        inicio = time.perf_counter()
+        for i in range(60):
+            ticker = fonte('PETR4.SA')
+            ticker.option_chain(ticker.options[i % 2])
+        m = fonte.metricas()
+        print(f"hedge={hedge}: {time.perf_counter() - inicio:.1f}s | p50 {m['latencia_p50'] * 1000:.0f}ms "
+              f"p99 {m['latencia_p99'] * 1000:.0f}ms | prazos {m['prazos']} falhas {m['falhas']} "
+              f"hedges {m['hedges']}/{m['hedges_vencedores']}")
+
+    instavel.fora_do_ar = True
+    fonte = FonteResiliente(instavel, backoff_base=0.01, disjuntor=Disjuntor(falhas_para_abrir=3))
+    for i in range(4):
+        try:
+            fonte('VALE3.SA').options
+        except Exception as e:
+            print(f"Chamada {i}: {type(e).__name__} | disjuntor {fonte.disjuntor.estado}")
+
+    instavel.fora_do_ar = False
+    fonte = FonteResiliente(instavel, prazo_ativo=0.5, requisicoes_por_minuto=6)
+    for i in range(8):
+        try:
+            fonte('ITUB4.SA').options
+        except PrazoEsgotado:
+            pass
+    m = fonte.metricas()
+    print(f"Orçamento de 6/min: {m['chamadas']} chamadas, {m['sem_orcamento']} sem orçamento | "
+          f"reservar(3) → esperar {fonte.reservar(3):.0f}s")
@@ -0,0 +1,144 @@
+"""
+Cenários - RCO Scanner
+=======================
+Superfície de P&L de cada setup: preço do ativo × dias até o vencimento
+
+Todos os setups exibidos são reprecificados numa única chamada
+(Black-Scholes sobre arrays setups × spots × dias). A grade de cada
+setup fica em cache; só os setups novos entram no lote seguinte.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from black_scholes import TAXA_JUROS_PADRAO, preco, prazo_anos
+
+QUANTIDADE_PADRAO = 100
+FRACOES_PRAZO = (1.0, 0.5, 0.25, 0.0)  # do prazo restante: hoje, metade, 1/4, vencimento
+
+
+class GradeCenario(NamedTuple):
+    """P&L (R$) do setup em cada spot (linhas) e dias restantes (colunas)"""
+    spots: np.ndarray
+    dias: np.ndarray
+    pnl: np.ndarray
+    breakevens: Tuple[float, ...]
+
+    @property
+    def no_vencimento(self) -> np.ndarray:
+        """Payoff no vencimento (última coluna)"""
+        return self.pnl[:, -1]
+
+
+def _breakevens(spots: np.ndarray, payoff: np.ndarray) -> Tuple[float, ...]:
+    """Pontos onde o payoff no vencimento cruza zero (interpolação linear)"""
+    sinal = np.sign(payoff)
+    cruzamentos = np.flatnonzero(sinal[:-1] * sinal[1:] < 0)
+    x0, x1 = spots[cruzamentos], spots[cruzamentos + 1]
+    y0, y1 = payoff[cruzamentos], payoff[cruzamentos + 1]
+    return tuple(float(v) for v in np.round(x0 - y0 * (x1 - x0) / (y1 - y0), 2))
+
+
+def calcular_cenarios(setups: List[Dict], n_spots: int = 41, faixa: float = 0.20,
+                      fracoes_prazo=FRACOES_PRAZO, r: float = TAXA_JUROS_PADRAO) -> List[GradeCenario]:
+    """
+    Grades de P&L de vários setups numa chamada vetorizada
+
+    Args:
+        n_spots: pontos da grade de preço
+        faixa: variação do spot em torno do atual (0.20 = ±20%)
+        fracoes_prazo: frações do prazo restante a simular (0 = vencimento)
+    """
+    if not setups:
+        return []
+
+    def coluna(chave, padrao=0.0):
+        return np.array([s.get(chave) or padrao for s in setups], dtype=np.float64)
+
+    spot = coluna('preco_ativo_atual')
+    credito = coluna('preco_1') - coluna('preco_2')
+    quantidade = coluna('quantidade_1', QUANTIDADE_PADRAO)
+    iv = np.where(coluna('iv') > 0, coluna('iv'), 35.0) / 100
+    strike_1, strike_2 = coluna('strike_1'), coluna('strike_2')
+    eh_call = np.array([s.get('tipo_opcao_1') == 'CALL' for s in setups])
+    tem_2 = np.array([bool(s.get('codigo_opcao_2')) for s in setups])
+    coberta = np.array([s['estrategia'] == 'VENDA_COBERTA' for s in setups])
+
+    # (N, S, 1) spots × (N, 1, D) prazos
+    spots = spot[:, None] * np.linspace(1 - faixa, 1 + faixa, n_spots)[None, :]
+    dias = np.round(coluna('dias_vencimento')[:, None] * np.asarray(fracoes_prazo)[None, :])
+    S = spots[:, :, None]
+    T = prazo_anos(dias)[:, None, :]
+    T = np.where(dias[:, None, :] <= 0, 1e-9, T)  # vencimento: intrínseco
+
+    def col(v):
+        return v[:, None, None]
+
+    valor = preco(S, col(strike_1), T, col(iv), col(eh_call), r)
+    valor_2 = preco(S, col(strike_2), T, col(iv), False, r)  # perna comprada das travas é put
+    valor = valor - np.where(col(tem_2), valor_2, 0.0)
+
+    pnl = (col(credito) - valor) * col(quantidade)
+    pnl = pnl + np.where(col(coberta), (S - col(spot)) * col(quantidade), 0.0)
+
+    return [
+        GradeCenario(spots[i], dias[i], pnl[i], _breakevens(spots[i], pnl[i, :, -1]))
+        for i in range(len(setups))
+    ]
+
+
+def _chave(setup: Dict) -> Tuple:
+    return (setup.get('codigo_opcao_1'), setup.get('codigo_opcao_2'), setup.get('preco_1'),
+            setup.get('preco_2'), setup.get('preco_ativo_atual'), setup.get('dias_vencimento'),
+            round(setup.get('iv') or 0, 2))
+
+
+class CacheCenarios:
+    """Grades em cache por setup; o que falta é calculado num só lote"""
+
+    def __init__(self, max_itens: int = 2000, **parametros):
+        self.max_itens = max_itens
+        self.parametros = parametros
+        self._cache: 'OrderedDict[Tuple, GradeCenario]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter_lote(self, setups: List[Dict]) -> List[GradeCenario]:
+        chaves = [_chave(s) for s in setups]
+        with self._lock:
+            faltando = [i for i, c in enumerate(chaves) if c not in self._cache]
+
+        if faltando:
+            novas = calcular_cenarios([setups[i] for i in faltando], **self.parametros)
+            with self._lock:
+                for i, grade in zip(faltando, novas):
+                    self._cache[chaves[i]] = grade
+                while len(self._cache) > self.max_itens:
+                    self._cache.popitem(last=False)
+
+        with self._lock:
+            return [self._cache[c] for c in chaves]
+
+    def obter(self, setup: Dict) -> GradeCenario:
+        return self.obter_lote([setup])[0]
+
+
+# Teste
+if __name__ == "__main__":
+    trava = {
+        'estrategia': 'TRAVA_ALTA_PUT', 'preco_ativo_atual': 38.0, 'dias_vencimento': 35, 'iv': 35.0,
+        'codigo_opcao_1': 'PETRW370', 'tipo_opcao_1': 'PUT', 'strike_1': 37.0, 'preco_1': 0.95,
+        'codigo_opcao_2': 'PETRW360', 'strike_2': 36.0, 'preco_2': 0.62, 'quantidade_1': 100
+    }
+    coberta = {
+        'estrategia': 'VENDA_COBERTA', 'preco_ativo_atual': 38.0, 'dias_vencimento': 35, 'iv': 33.0,
+        'codigo_opcao_1': 'PETRK400', 'tipo_opcao_1': 'CALL', 'strike_1': 40.0, 'preco_1': 0.80,
+        'quantidade_1': 100
+    }
+
+    cache = CacheCenarios()
+    for nome, grade in zip(('Trava', 'Coberta'), cache.obter_lote([trava, coberta])):
+        print(f"{nome}: breakevens {grade.breakevens} | "
+              f"vencimento min R$ {grade.no_vencimento.min():.0f} max R$ {grade.no_vencimento.max():.0f}")
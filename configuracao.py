@@ -0,0 +1,252 @@
+"""
+Configuração - RCO Scanner
+===========================
+Tabela `configuracoes` inteira em memória, como uma foto imutável
+
+A tabela é lida uma vez (uma consulta) e cada leitura depois disso é um
+acesso a dict. A foto é trocada inteira quando algo muda:
+- a cada `intervalo` segundos o serviço compara a versão da tabela
+  (maior updated_at + total de linhas, uma consulta pequena) e só relê
+  tudo se ela mudou;
+- `notificar()` força a checagem na hora (ligue aqui o realtime do
+  Supabase ou um LISTEN no canal 'configuracoes' - migração 004).
+
+Quem depende de configuração registra um ouvinte com `ao_mudar` e recebe
+a foto nova e as chaves alteradas (scanner, cooldowns de alerta, capital).
+"""
+
+import threading
+import logging
+from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Set
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INTERVALO_PADRAO = 60.0  # segundos entre checagens de versão
+
+PREFIXO_PARAMETRO = 'param_'        # param_iv_min -> ScannerOpcoesB3.parametros['iv_min']
+PREFIXO_COOLDOWN = 'cooldown_'      # cooldown_STOP_LOSS -> horas no EstadoAlertas
+
+VERDADEIROS = {'1', 'true', 'sim', 's', 'yes', 'on'}
+FALSOS = {'0', 'false', 'nao', 'não', 'n', 'no', 'off', ''}
+
+
+class Configuracao(Mapping):
+    """Foto imutável das configurações, com leitura tipada"""
+
+    __slots__ = ('_valores', 'versao', 'carregada_em')
+
+    def __init__(self, valores: Dict[str, str] = None, versao: str = None):
+        self._valores = MappingProxyType(dict(valores or {}))
+        self.versao = versao
+        self.carregada_em = datetime.now()
+
+    def __getitem__(self, chave: str) -> str:
+        return self._valores[chave]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._valores)
+
+    def __len__(self) -> int:
+        return len(self._valores)
+
+    def _converter(self, chave: str, padrao, conversor):
+        valor = self._valores.get(chave)
+        if valor is None or str(valor).strip() == '':
+            return padrao
+        try:
+            return conversor(str(valor).strip())
+        except (TypeError, ValueError):
+            logger.warning(f"⚠️ Configuração {chave}={valor!r} inválida, usando {padrao!r}")
+            return padrao
+
+    def texto(self, chave: str, padrao: str = None) -> Optional[str]:
+        return self._valores.get(chave, padrao)
+
+    def inteiro(self, chave: str, padrao: int = None) -> Optional[int]:
+        return self._converter(chave, padrao, lambda v: int(float(v)))
+
+    def decimal(self, chave: str, padrao: float = None) -> Optional[float]:
+        return self._converter(chave, padrao, lambda v: float(v.replace(',', '.')))
+
+    def booleano(self, chave: str, padrao: bool = False) -> bool:
+        def _bool(v: str) -> bool:
+            v = v.lower()
+            if v in VERDADEIROS:
+                return True
+            if v in FALSOS:
+                return False
+            raise ValueError(v)
+        return self._converter(chave, padrao, _bool)
+
+    def lista(self, chave: str, padrao: List[str] = None) -> List[str]:
+        """Valor separado por vírgulas (ex: ativos_monitorar)"""
+        return self._converter(chave, list(padrao or []),
+                               lambda v: [item.strip() for item in v.split(',') if item.strip()])
+
+
+class ServicoConfiguracao:
+    """Mantém a foto atual e avisa os ouvintes quando a tabela muda"""
+
+    def __init__(self, db=None, intervalo: float = INTERVALO_PADRAO):
+        """
+        Args:
+            db: backend com obter_todas_configs/versao_configs (None = foto vazia)
+            intervalo: segundos entre checagens de versão no modo contínuo
+        """
+        self.db = db
+        self.intervalo = intervalo
+        self.atual = Configuracao()
+        self._ouvintes: List[Callable[[Configuracao, Set[str]], None]] = []
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.recarregar(forcar=True)
+
+    # ========================================================================
+    # LEITURA
+    # ========================================================================
+
+    def recarregar(self, forcar: bool = False) -> bool:
+        """
+        Relê a tabela se a versão mudou (ou se `forcar`)
+
+        Returns:
+            True se a foto foi trocada
+        """
+        if self.db is None:
+            return False
+
+        versao = self.db.versao_configs()
+        if not forcar and versao is not None and versao == self.atual.versao:
+            return False
+
+        valores = self.db.obter_todas_configs()
+        if not valores and self.atual:
+            return False  # falha de leitura: mantém a foto anterior
+
+        with self._lock:
+            anterior = self.atual
+            self.atual = Configuracao(valores, versao)
+            ouvintes = list(self._ouvintes)
+
+        alteradas = {
+            chave for chave in set(anterior) | set(valores)
+            if anterior.get(chave) != valores.get(chave)
+        }
+        if alteradas and anterior.versao is not None:
+            logger.info(f"✅ Configurações alteradas: {', '.join(sorted(alteradas))}")
+        for ouvinte in ouvintes:
+            self._avisar(ouvinte, alteradas)
+        return bool(alteradas)
+
+    def salvar(self, chave: str, valor) -> bool:
+        """Grava na tabela e já troca a foto local"""
+        if self.db is None or not self.db.salvar_config(chave, str(valor)):
+            return False
+        self.recarregar(forcar=True)
+        return True
+
+    # ========================================================================
+    # OUVINTES
+    # ========================================================================
+
+    def ao_mudar(self, ouvinte: Callable[[Configuracao, Set[str]], None], imediato: bool = True):
+        """
+        Registra `ouvinte(config, chaves_alteradas)`
+
+        Com `imediato`, é chamado já com a foto atual (todas as chaves).
+        """
+        with self._lock:
+            self._ouvintes.append(ouvinte)
+        if imediato:
+            self._avisar(ouvinte, set(self.atual))
+
+    def _avisar(self, ouvinte, alteradas: Set[str]):
+        try:
+            ouvinte(self.atual, alteradas)
+        except Exception as e:
+            logger.error(f"❌ Erro no ouvinte de configuração: {e}")
+
+    # ========================================================================
+    # ATUALIZAÇÃO CONTÍNUA
+    # ========================================================================
+
+    def notificar(self):
+        """Pede checagem imediata (callback de realtime / LISTEN)"""
+        self._acordar.set()
+
+    def iniciar(self) -> 'ServicoConfiguracao':
+        """Thread em segundo plano que checa a versão a cada `intervalo`"""
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name='configuracao', daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, timeout: float = 5.0):
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._parar.is_set():
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            if self._parar.is_set():
+                break
+            try:
+                self.recarregar()
+            except Exception as e:
+                logger.error(f"❌ Erro ao atualizar configurações: {e}")
+
+
+# ============================================================================
+# CONFIGURAÇÕES CONSUMIDAS PELOS MÓDULOS
+# ============================================================================
+
+def parametros_scanner(config: Configuracao, padroes: Mapping) -> Dict:
+    """Sobrescritas de ScannerOpcoesB3.parametros (chaves param_*), no tipo do padrão"""
+    parametros = {}
+    for chave, padrao in padroes.items():
+        nome = PREFIXO_PARAMETRO + chave
+        if nome in config:
+            leitor = config.inteiro if isinstance(padrao, int) else config.decimal
+            parametros[chave] = leitor(nome, padrao)
+    return parametros
+
+
+def cooldowns_alerta(config: Configuracao) -> Dict[str, float]:
+    """Cooldown (horas) por tipo de alerta (chaves cooldown_*)"""
+    return {
+        chave[len(PREFIXO_COOLDOWN):].upper(): config.decimal(chave)
+        for chave in config
+        if chave.startswith(PREFIXO_COOLDOWN) and config.decimal(chave) is not None
+    }
+
+
+# Teste
+if __name__ == "__main__":
+    from armazenamento_local import SQLiteRCO
+
+    db = SQLiteRCO(':memory:')
+    servico = ServicoConfiguracao(db, intervalo=0.1)
+    servico.ao_mudar(lambda config, alteradas: print(f"  ouvinte: {sorted(alteradas)[:3]}..."))
+
+    config = servico.atual
+    print(f"capital_total: {config.decimal('capital_total')} | ativos: {config.lista('ativos_monitorar')}")
+
+    servico.iniciar()
+    db.salvar_config('param_iv_min', '25')
+    db.salvar_config('cooldown_stop_loss', '2')
+    servico.notificar()
+
+    import time
+    time.sleep(0.3)
+    print(f"Parâmetros: {parametros_scanner(servico.atual, {'iv_min': 30, 'score_min': 60})}")
+    print(f"Cooldowns: {cooldowns_alerta(servico.atual)}")
+    servico.parar()
@@ -5,11 +5,11 @@ Scanner de Opções B3 com automação
 """
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
 import os
 import sys
 import time
+import logging
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente
@@ -18,8 +18,10 @@ load_dotenv()
 # Adicionar diretório ao path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from scanner_opcoes import ScannerOpcoesB3
-from supabase_client import SupabaseRCO
+from scanner_opcoes import ScannerOpcoesB3, PARAMETROS_PADRAO
+from tarefas_scan import ExecutorScan
+from resultados_compartilhados import repositorio
+from armazenamento import criar_backend
 
 # Configuração da página
 st.set_page_config(
@@ -123,19 +125,37 @@ ATIVOS_TOP30 = [
 @st.cache_resource
 def init_components():
     try:
-        scanner = ScannerOpcoesB3()
-        db = SupabaseRCO(
-            url=os.getenv('SUPABASE_URL'),
-            key=os.getenv('SUPABASE_KEY')
-        )
+        # Cada chain buscada vira snapshot em dados/snapshots (histórico para o backtest);
+        # Yahoo com prazos, retentativas e disjuntor (sem resposta = último snapshot)
+        # (armazém criado no primeiro uso: snapshots/numpy não entram antes do título)
+        from busca_resiliente import FonteResiliente
+        scanner = ScannerOpcoesB3(diretorio_snapshots='', fonte_dados=FonteResiliente())
+        # RCO_BACKEND=supabase (padrão) ou sqlite (arquivo local, sem rede)
+        db = criar_backend()
+        # Logs da aplicação vão para a tabela `logs` em lote (não bloqueia o scan)
+        logging.getLogger().addHandler(db.ativar_log_em_lote(level=logging.INFO))
         return scanner, db
     except Exception as e:
         st.error(f"❌ Erro ao conectar: {e}")
-        st.info("Configure SUPABASE_URL e SUPABASE_KEY nas variáveis de ambiente")
+        st.info("Configure SUPABASE_URL e SUPABASE_KEY nas variáveis de ambiente (ou RCO_BACKEND=sqlite para banco local)")
         return None, None
 
 scanner, db = init_components()
 
+# Configurações: tabela lida uma vez e checada em segundo plano (configuracao.py);
+# mudanças em param_* chegam ao scanner sem reiniciar
+@st.cache_resource
+def obter_configuracao(_db, _scanner):
+    from configuracao import ServicoConfiguracao, parametros_scanner
+    servico = ServicoConfiguracao(_db)
+    if _scanner:
+        def aplicar_parametros(config, alteradas):
+            _scanner.parametros = {**PARAMETROS_PADRAO, **parametros_scanner(config, PARAMETROS_PADRAO)}
+        servico.ao_mudar(aplicar_parametros)
+    return servico.iniciar()
+
+configuracao = obter_configuracao(db, scanner) if db else None
+
 # Inicializar session state
 if 'auto_scan_enabled' not in st.session_state:
     st.session_state.auto_scan_enabled = False
@@ -186,9 +206,11 @@ if st.session_state.auto_scan_enabled:
     else:
         st.sidebar.markdown("⏰ Aguardando primeiro scan...")
 
-# Botão atualizar
+# Botão atualizar (invalida só o ativo selecionado, não todos os caches)
 if st.sidebar.button("🔄 Atualizar Agora", type="primary"):
-    st.cache_data.clear()
+    if ativo_selecionado and scanner:
+        scanner.invalidar_cache(ativo_selecionado)
+        repositorio.invalidar(f'ativo:{ativo_selecionado}')
     st.rerun()
 
 st.sidebar.markdown("---")
@@ -198,41 +220,118 @@ st.sidebar.markdown(f"**Última atualização:**  \n{datetime.now().strftime('%d
 st.title("🤖 UNO INVEST - Scanner de Opções B3")
 st.markdown(f"### 💜 Estratégia RCO | {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
 
-# Função para escanear múltiplos ativos
-def escanear_multiplos_ativos(ativos_lista, limite_por_ativo=2):
-    """Escaneia múltiplos ativos e retorna top oportunidades"""
-    todas_oportunidades = []
-    
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    total = len(ativos_lista)
-    
-    for i, ativo in enumerate(ativos_lista):
-        status_text.text(f"🔍 Escaneando {ativo}... ({i+1}/{total})")
-        progress_bar.progress((i + 1) / total)
-        
-        try:
-            # Buscar oportunidades
-            vendas_cob = scanner.identificar_venda_coberta(ativo)[:limite_por_ativo]
-            vendas_put = scanner.identificar_venda_put(ativo)[:limite_por_ativo]
-            travas = scanner.identificar_trava_alta(ativo)[:limite_por_ativo]
-            
-            todas_oportunidades.extend(vendas_cob)
-            todas_oportunidades.extend(vendas_put)
-            todas_oportunidades.extend(travas)
-            
-        except Exception as e:
-            st.warning(f"⚠️ Erro em {ativo}: {str(e)[:50]}")
-            continue
-    
-    progress_bar.empty()
-    status_text.empty()
-    
-    # Ordenar por score
-    todas_oportunidades.sort(key=lambda x: x['score'], reverse=True)
-    
-    return todas_oportunidades[:10]  # Top 10
+# Executor de scans compartilhado pelo processo (sobrevive a reruns e troca de aba)
+# O resultado vai para o repositório do processo: todas as sessões leem o mesmo scan
+@st.cache_resource
+def obter_executor_scan(_scanner):
+    return ExecutorScan(_scanner, repositorio=repositorio)
+
+executor_scan = obter_executor_scan(scanner) if scanner else None
+
+CAPITAL_PADRAO = 5000.0
+
+def orcamento_disponivel():
+    """capital_total (configurações) menos a margem das posições abertas"""
+    from otimizador_carteira import margem_posicao
+    capital = configuracao.atual.decimal('capital_total', CAPITAL_PADRAO) if configuracao else CAPITAL_PADRAO
+    return capital - sum(margem_posicao(p) for p in db.listar_posicoes_ativas())
+
+def salvar_top3(tarefa):
+    """
+    Pós-scan automático: salva a melhor carteira de até 3 setups que cabe
+    no capital livre, no máximo 1 por ativo (roda na thread do scan)
+    """
+    from otimizador_carteira import selecionar_carteira
+    carteira = selecionar_carteira(tarefa.resultados, orcamento_disponivel(), max_por_ativo=1, max_itens=3)
+    for opp in carteira:
+        db.salvar_oportunidade(opp)
+
+def carregar_resultados_scan():
+    """Traz para a sessão a versão mais recente do scan compartilhado"""
+    entrada = repositorio.obter('scan_multiplo')
+    if entrada is not None and st.session_state.get('scan_versao_exibida') != entrada.versao:
+        st.session_state.scan_results = entrada.valor
+        st.session_state.last_scan_time = entrada.atualizado_em
+        st.session_state.scan_versao_exibida = entrada.versao
+        return True
+    return False
+
+# Partida quente: antes do primeiro scan a tela sai dos snapshots (ou do banco),
+# com a idade dos dados; se estiverem velhos, o scan roda em segundo plano
+@st.cache_resource
+def obter_partida_quente(_scanner, _db, _executor):
+    from partida_quente import aquecer
+    resumo = aquecer(_scanner, repositorio, ATIVOS_TOP30, _db)
+    capturado_em = resumo['capturado_em']
+    if capturado_em is None or (datetime.now() - capturado_em).total_seconds() > 30 * 60:
+        _executor.iniciar(ATIVOS_TOP30, limite_por_ativo=1, top=None)
+    return resumo
+
+if scanner:
+    obter_partida_quente(scanner, db, executor_scan)
+
+carregar_resultados_scan()
+
+# Monte Carlo do processo: caminhos em cache por ativo/vencimento
+@st.cache_resource
+def obter_monte_carlo():
+    from probabilidade import MonteCarloGBM
+    return MonteCarloGBM()
+
+# Risco do portfólio: mantido entre reruns e atualizado de forma incremental
+@st.cache_resource
+def obter_agregador_risco():
+    from risco_portfolio import AgregadorRisco
+    return AgregadorRisco()
+
+# Cenários de P&L: grade em cache por setup, calculada em lote
+@st.cache_resource
+def obter_cache_cenarios():
+    from cenarios import CacheCenarios
+    return CacheCenarios()
+
+# Regras de alerta (limites por posição/estratégia) com deduplicação dos envios
+@st.cache_resource
+def obter_motor_regras(_db, _configuracao):
+    from configuracao import cooldowns_alerta
+    from estado_alertas import EstadoAlertas, COOLDOWNS_PADRAO
+    from regras_alerta import MotorRegras
+    estado = EstadoAlertas(_db)
+    if _configuracao:
+        def aplicar_cooldowns(config, alteradas):
+            estado.cooldowns = {**COOLDOWNS_PADRAO, **cooldowns_alerta(config)}
+        _configuracao.ao_mudar(aplicar_cooldowns)
+    return MotorRegras(_db, estado)
+
+# Cotação das posições abertas em segundo plano, mais frequente perto do alvo/stop/vencimento
+@st.cache_resource
+def obter_monitor(_db, _scanner, _motor):
+    from monitor_posicoes import MonitorPosicoes
+    return MonitorPosicoes(_db, _scanner, _motor).iniciar()
+
+monitor = obter_monitor(db, scanner, obter_motor_regras(db, configuracao)) if db and scanner else None
+
+def exibir_cenario(grade):
+    """Curvas de P&L por preço do ativo, uma por prazo restante"""
+    import pandas as pd
+    colunas = ["vencimento" if d <= 0 else f"{int(d)} dias" for d in grade.dias]
+    st.line_chart(pd.DataFrame(grade.pnl, index=grade.spots.round(2), columns=colunas))
+    if grade.breakevens:
+        st.caption("Breakeven no vencimento: " + " | ".join(f"R$ {b:.2f}" for b in grade.breakevens))
+
+# Scan de um ativo: compartilhado entre sessões e válido por TTL_ATIVO_UNICO
+# (reruns como "JÁ ENTREI" não buscam a chain de novo)
+TTL_ATIVO_UNICO = 300  # segundos
+
+def obter_scan_ativo(ativo):
+    def calcular():
+        return {
+            'VENDA_COBERTA': scanner.identificar_venda_coberta(ativo),
+            'VENDA_PUT': scanner.identificar_venda_put(ativo),
+            'TRAVA_ALTA_PUT': scanner.identificar_trava_alta(ativo)
+        }
+    # Vencido: mostra o último resultado e recalcula em segundo plano
+    return repositorio.obter_ou_revalidar(f'ativo:{ativo}', calcular, idade_max=TTL_ATIVO_UNICO)
 
 # Automação: checar se deve escanear
 if st.session_state.auto_scan_enabled and scanner and db:
@@ -246,18 +345,47 @@ if st.session_state.auto_scan_enabled and scanner and db:
         if minutos_desde_ultimo >= 30:
             deve_escanear = True
     
-    if deve_escanear:
-        st.info("🔄 Scanner automático executando...")
-        resultados = escanear_multiplos_ativos(ATIVOS_TOP30, limite_por_ativo=1)
-        st.session_state.scan_results = resultados
-        st.session_state.last_scan_time = datetime.now()
-        
-        # Salvar no banco
-        for opp in resultados[:3]:  # Top 3
-            db.salvar_oportunidade(opp)
-        
-        st.success(f"✅ Scan completo! {len(resultados)} oportunidades encontradas")
-        st.rerun()
+    if deve_escanear and not executor_scan.em_andamento():
+        executor_scan.iniciar(ATIVOS_TOP30, limite_por_ativo=1, top=None, ao_concluir=salvar_top3)
+        st.session_state.last_scan_time = agora
+
+# Progresso do scan: só este fragmento é reexecutado enquanto o scan roda
+@st.fragment(run_every=2 if executor_scan and executor_scan.em_andamento() else None)
+def painel_scan():
+    tarefa = executor_scan.tarefa_atual() if executor_scan else None
+    if tarefa is None:
+        return
+    
+    estado = tarefa.instantaneo()
+    
+    if tarefa.em_andamento:
+        st.info(f"🔄 Scan em segundo plano: {estado['ativo_atual'] or '...'} "
+                f"({estado['processados']}/{estado['total']}) | "
+                f"{estado['total_parciais']} oportunidades até agora")
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.progress(estado['progresso'])
+        with col2:
+            if st.button("⏹️ Cancelar", key="cancelar_scan"):
+                tarefa.cancelar()
+        for op in estado['parciais'][:3]:
+            st.caption(f"• {op['ativo']} {op['estrategia'].replace('_', ' ')} - Score {op['score']}")
+        metricas = estado['metricas']
+        if metricas.get('latencia_p50') is not None:
+            st.caption(f"⏱️ Yahoo p50 {metricas['latencia_p50']:.1f}s | p99 {metricas['latencia_p99']:.1f}s | "
+                       f"{metricas['retentativas']} retentativas | disjuntor {metricas['disjuntor']}"
+                       + (f" | {metricas['desatualizados']} ativos do último snapshot" if metricas['desatualizados'] else ""))
+    elif carregar_resultados_scan():
+        # Scan terminou: rerun completo para exibir os resultados
+        st.rerun(scope="app")
+    elif estado['status'] in ('cancelado', 'erro'):
+        if st.session_state.get('scan_id_encerrado') != tarefa.id:
+            # Para o polling do fragmento
+            st.session_state.scan_id_encerrado = tarefa.id
+            st.rerun(scope="app")
+        st.warning(f"⏹️ Scan {estado['status']} ({estado['processados']}/{estado['total']} ativos)")
+
+painel_scan()
 
 # ============================================================================
 # MODO: ATIVO ÚNICO
@@ -267,9 +395,20 @@ if modo == "🎯 Ativo Único" and scanner and db:
     st.subheader(f"🎯 Análise: {ativo_selecionado}")
     
     with st.spinner(f'🔍 Escaneando {ativo_selecionado}...'):
-        vendas_cob = scanner.identificar_venda_coberta(ativo_selecionado)
-        vendas_put = scanner.identificar_venda_put(ativo_selecionado)
-        travas = scanner.identificar_trava_alta(ativo_selecionado)
+        snapshot_ativo = obter_scan_ativo(ativo_selecionado)
+        vendas_cob = snapshot_ativo.valor['VENDA_COBERTA']
+        vendas_put = snapshot_ativo.valor['VENDA_PUT']
+        travas = snapshot_ativo.valor['TRAVA_ALTA_PUT']
+        
+        idade_min = snapshot_ativo.idade_segundos / 60
+        formato = '%H:%M:%S' if snapshot_ativo.atualizado_em.date() == datetime.now().date() else '%d/%m %H:%M'
+        desatualizado = any(op.get('desatualizado') for lista in snapshot_ativo.valor.values() for op in lista)
+        st.caption(
+            f"📸 Dados de {snapshot_ativo.atualizado_em.strftime(formato)} "
+            f"({'agora' if idade_min < 1 else f'há {idade_min:.0f} min'})"
+            f"{' do último snapshot' if desatualizado else ''} | "
+            f"atualiza a cada {TTL_ATIVO_UNICO // 60} min ou em 🔄 Atualizar Agora"
+        )
         
         total_ops = len(vendas_cob) + len(vendas_put) + len(travas)
         
@@ -296,8 +435,9 @@ if modo == "🎯 Ativo Único" and scanner and db:
             todas_ops.extend([(op, 'TRAVA_ALTA_PUT') for op in travas])
             todas_ops.sort(key=lambda x: x[0]['score'], reverse=True)
             
-            # Exibir top 5
-            for i, (op, tipo) in enumerate(todas_ops[:5], 1):
+            # Exibir top 5 (cenários dos 5 calculados num único lote)
+            cenarios = obter_cache_cenarios().obter_lote([op for op, _ in todas_ops[:5]])
+            for i, ((op, tipo), grade) in enumerate(zip(todas_ops[:5], cenarios), 1):
                 score = op['score']
                 classe_css = "oportunidade-high" if score >= 80 else "oportunidade-medium"
                 
@@ -308,6 +448,8 @@ if modo == "🎯 Ativo Único" and scanner and db:
                     with col1:
                         st.markdown(f"### #{i} - {op['estrategia'].replace('_', ' ')}")
                         st.markdown(f"**{op['ativo']}** | Score: **{score}/100** {'⭐' * (score // 20)}")
+                        if op.get('desatualizado'):
+                            st.caption(f"⚠️ Yahoo sem resposta: dados do snapshot de {op['capturado_em'][:16]}")
                     with col2:
                         st.markdown(f"**Vencimento:**  \n{datetime.strptime(op['vencimento'], '%Y-%m-%d').strftime('%d/%m/%Y')}  \n({op['dias_vencimento']} dias)")
                     
@@ -343,6 +485,9 @@ if modo == "🎯 Ativo Único" and scanner and db:
                             st.metric("Crédito", f"R$ {op['credito_total']:.2f}")
                             st.metric("Retorno", f"{op['retorno_percentual']:.1f}%")
                     
+                    with st.expander("📈 Cenários (P&L × preço do ativo)"):
+                        exibir_cenario(grade)
+                    
                     # Botões
                     col1, col2 = st.columns([1, 2])
                     with col1:
@@ -363,27 +508,111 @@ elif modo == "🔍 Scanner Top 30" and scanner and db:
     
     st.subheader("🔍 Scanner Top 30 Ativos")
     
-    if st.button("🚀 ESCANEAR TODOS OS ATIVOS", type="primary"):
-        resultados = escanear_multiplos_ativos(ATIVOS_TOP30, limite_por_ativo=2)
-        st.session_state.scan_results = resultados
-        st.session_state.last_scan_time = datetime.now()
+    if st.button("🚀 ESCANEAR TODOS OS ATIVOS", type="primary", disabled=executor_scan.em_andamento()):
+        executor_scan.iniciar(ATIVOS_TOP30, limite_por_ativo=2, top=None)
+        st.rerun()
     
-    # Mostrar resultados
+    # Mostrar resultados: tabela única, filtrada/ordenada/paginada no servidor
     if st.session_state.scan_results:
-        st.success(f"✅ {len(st.session_state.scan_results)} oportunidades encontradas")
+        from tabela_resultados import (montar_dataframe, filtrar_ordenar_paginar,
+                                       formatar_pagina, ORDENACOES)
         
-        for i, op in enumerate(st.session_state.scan_results[:10], 1):
-            score = op['score']
-            with st.expander(f"#{i} - {op['ativo']} {op['estrategia'].replace('_', ' ')} - Score: {score}/100"):
-                st.write(f"**Código:** {op['codigo_opcao_1']}")
-                st.write(f"**Strike:** R$ {op['strike_1']:.2f}")
-                st.write(f"**Retorno:** {op.get('retorno_percentual', 0):.1f}%")
-                
-                if st.button("✅ Entrei", key=f"multi_{i}"):
-                    opp_salva = db.salvar_oportunidade(op)
-                    if opp_salva:
-                        db.abrir_posicao(opp_salva['id'], op)
-                        st.success("✅ Posição registrada!")
+        # DataFrame montado uma vez por versão do scan
+        if st.session_state.get('scan_df_versao') != st.session_state.get('scan_versao_exibida'):
+            st.session_state.scan_df = montar_dataframe(st.session_state.scan_results)
+            st.session_state.scan_df_versao = st.session_state.get('scan_versao_exibida')
+        df = st.session_state.scan_df
+        
+        st.success(f"✅ {len(df)} oportunidades encontradas")
+        if st.session_state.scan_results[0].get('desatualizado') and st.session_state.last_scan_time:
+            st.caption(f"📸 Resultados do último snapshot salvo "
+                       f"({st.session_state.last_scan_time.strftime('%d/%m %H:%M')}); "
+                       f"o scan atualizado substitui esta lista ao terminar")
+        
+        # Carteira sugerida: o que cabe no capital livre, 1 setup por ativo
+        from otimizador_carteira import selecionar_carteira, resumo_carteira
+        orcamento = orcamento_disponivel()
+        carteira = selecionar_carteira(st.session_state.scan_results, orcamento, max_por_ativo=1, max_itens=5)
+        with st.expander(f"💼 Carteira sugerida (capital livre R$ {orcamento:,.2f})", expanded=bool(carteira)):
+            if carteira:
+                resumo = resumo_carteira(carteira)
+                st.caption(f"Margem R$ {resumo['margem']:,.2f} | Crédito R$ {resumo['credito']:,.2f} | "
+                           f"Esperado R$ {resumo['retorno_esperado']:,.2f}")
+                for op in carteira:
+                    st.markdown(f"• **{op['ativo']}** {op['estrategia'].replace('_', ' ')} "
+                                f"`{op['codigo_opcao_1']}` - Score {op['score']} | "
+                                f"Prob. {op['probabilidade_sucesso']:.0f}%")
+            else:
+                st.caption("Nenhum setup cabe no capital livre.")
+        
+        col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
+        with col1:
+            filtro_ativos = st.multiselect("Ativos", sorted(df['ativo'].unique()))
+        with col2:
+            filtro_estrategias = st.multiselect("Estratégias", sorted(df['estrategia'].unique()))
+        with col3:
+            score_min = st.slider("Score mínimo", 0, 100, 0, step=5)
+        with col4:
+            ordenar_por = st.selectbox("Ordenar por", list(ORDENACOES))
+        
+        col1, col2, col3 = st.columns([1, 1, 4])
+        with col1:
+            por_pagina = st.selectbox("Por página", [25, 50, 100])
+        with col2:
+            pagina = st.number_input("Página", min_value=1, value=1, step=1)
+        
+        pagina_df, total_filtrado, total_paginas = filtrar_ordenar_paginar(
+            df, filtro_ativos, filtro_estrategias, score_min,
+            ordenar_por=ORDENACOES[ordenar_por], crescente=(ordenar_por in ('Dias', 'Ativo')),
+            pagina=int(pagina), por_pagina=por_pagina
+        )
+        with col3:
+            st.caption(f"{total_filtrado} após filtros | página {min(int(pagina), total_paginas)}/{total_paginas}")
+        
+        selecao = st.dataframe(
+            formatar_pagina(pagina_df),
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            key="tabela_scan"
+        )
+        
+        # Detalhes só da linha selecionada
+        linhas = selecao.selection.rows
+        if linhas and linhas[0] < len(pagina_df):
+            indice = int(pagina_df.index[linhas[0]])
+            op = st.session_state.scan_results[indice]
+            
+            st.markdown(f"### {op['ativo']} {op['estrategia'].replace('_', ' ')} - Score: {op['score']}/100")
+            if op.get('desatualizado'):
+                st.caption(f"⚠️ Yahoo sem resposta: dados do snapshot de {op['capturado_em'][:16]}")
+            st.markdown(f'<p class="codigo-opcao">{op["quantidade_1"]}x {op["codigo_opcao_1"]}</p>', unsafe_allow_html=True)
+            st.markdown(f"Strike: **R$ {op['strike_1']:.2f}** | Preço: **R$ {op['preco_1']:.2f}**")
+            if op.get('codigo_opcao_2'):
+                st.markdown(f'<p class="codigo-opcao">{op["quantidade_2"]}x {op["codigo_opcao_2"]}</p>', unsafe_allow_html=True)
+                st.markdown(f"Strike: **R$ {op['strike_2']:.2f}** | Preço: **R$ {op['preco_2']:.2f}**")
+            
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                st.metric("Crédito", f"R$ {op['resultado_liquido']:.2f}")
+            with col2:
+                st.metric("Retorno", f"{op.get('retorno_percentual', 0):.1f}%")
+            with col3:
+                st.metric("Vencimento", f"{op['dias_vencimento']} dias")
+            with col4:
+                st.metric("Prob. lucro", f"{op['probabilidade_sucesso']:.0f}%")
+            with col5:
+                # Caminhos Monte Carlo compartilhados por ativo/vencimento
+                st.metric("Prob. tocar 60%", f"{obter_monte_carlo().prob_tocar_lucro(op):.0f}%")
+            
+            exibir_cenario(obter_cache_cenarios().obter(op))
+            
+            if st.button("✅ Entrei", key=f"multi_{indice}"):
+                opp_salva = db.salvar_oportunidade(op)
+                if opp_salva:
+                    db.abrir_posicao(opp_salva['id'], op)
+                    st.success("✅ Posição registrada!")
 
 # ============================================================================
 # MODO: POSIÇÕES
@@ -398,18 +627,77 @@ elif modo == "📊 Minhas Posições" and db:
         st.info("Você ainda não tem posições abertas.")
     else:
         st.markdown(f"**Total:** {len(posicoes)} posições")
+        if monitor and st.button("🔄 Atualizar cotações"):
+            monitor.agendar()
         
-        for pos in posicoes:
-            lucro = pos.get('lucro_percentual', 0)
-            status = "🔥 FECHAR AGORA" if lucro >= 60 else "📊 Monitorando"
+        # Risco agregado: só os ativos com posição aberta/fechada desde o último rerun são recalculados;
+        # spot/IVs das cotações do monitor (ou do último snapshot), que ele renova em segundo plano
+        from risco_portfolio import CHOQUES_SPOT_PADRAO, CHOQUES_VOL_PADRAO
+        import pandas as pd
+        
+        agregador = obter_agregador_risco()
+        agregador.sincronizar(posicoes)
+        if monitor:
+            for ativo in agregador.ativos():
+                codigos = [p[f'codigo_opcao_{n}'] for p in posicoes if p['ativo'] == ativo
+                           for n in (1, 2) if p.get(f'codigo_opcao_{n}')]
+                mercado = monitor.mercado(ativo, codigos)
+                if mercado:
+                    agregador.atualizar_mercado(ativo, mercado['spot'], mercado['ivs'])
+        
+        with st.expander("📐 Risco agregado", expanded=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**Gregas por ativo**")
+                st.dataframe(pd.DataFrame(agregador.gregas_por_ativo()).T.round(2), use_container_width=True)
+            with col2:
+                st.markdown("**P&L total (R$): spot × vol**")
+                grade = agregador.grade_choques()['TOTAL']
+                st.dataframe(pd.DataFrame(
+                    grade.round(0),
+                    index=[f"spot {c:+.0%}" for c in CHOQUES_SPOT_PADRAO],
+                    columns=[f"vol {v:+.0f}" for v in CHOQUES_VOL_PADRAO]
+                ), use_container_width=True)
+        
+        # Só o status na tela: os alertas saem do monitor, a cada marcação a mercado
+        motor = obter_motor_regras(db, configuracao)
+        icones = {'FECHAR AGORA': "🔥", 'STOP LOSS': "🛑", 'VENCIMENTO PRÓXIMO': "⏰", 'MONITORANDO': "📊"}
+        
+        for pos, status in zip(posicoes, motor.status(posicoes)):
+            lucro = pos.get('lucro_percentual') or 0
             
-            with st.expander(f"{status} - {pos['ativo']} {pos['estrategia']}"):
+            with st.expander(f"{icones[status]} {status} - {pos['ativo']} {pos['estrategia']}"):
                 st.write(f"**Código:** {pos['codigo_opcao_1']}")
                 st.write(f"**Lucro:** {lucro:.1f}%")
+                if monitor and pos['id'] in monitor.ultima_marcacao:
+                    idade = (datetime.now() - monitor.ultima_marcacao[pos['id']]).total_seconds()
+                    st.caption(f"Cotado há {idade / 60:.0f} min | próxima em até {monitor.intervalo(pos) / 60:.0f} min")
                 st.write(f"**Dias aberta:** {pos.get('dias_aberta', 0)}")
                 
+                # Limite efetivo (posição > estratégia > global); desligado mostra o valor padrão
+                iniciais = {}
+                for tipo, padrao in (('LUCRO_60', 60.0), ('STOP_LOSS', -30.0)):
+                    limite = motor.limite(pos, tipo)
+                    iniciais[tipo] = float(padrao if limite is None else limite)
+                
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    alvo = st.number_input("Alvo de lucro (%)", value=iniciais['LUCRO_60'],
+                                           step=5.0, key=f"alvo_{pos['id']}")
+                with col2:
+                    stop = st.number_input("Stop (%)", value=iniciais['STOP_LOSS'],
+                                           step=5.0, key=f"stop_{pos['id']}")
+                with col3:
+                    st.write("")
+                    if st.button("💾 Salvar limites", key=f"regras_{pos['id']}"):
+                        # Só o que mudou vira regra da posição (o resto segue a estratégia/global)
+                        for tipo, valor in (('LUCRO_60', alvo), ('STOP_LOSS', stop)):
+                            if valor != iniciais[tipo]:
+                                motor.definir('POSICAO', pos['id'], tipo, valor)
+                        st.rerun()
+                
                 if st.button("🚪 Fechar", key=f"close_{pos['id']}"):
-                    if db.fechar_posicao(pos['id'], "Manual", pos.get('resultado_atual', 0)):
+                    if motor.fechar_posicao(pos['id'], "Manual", pos.get('resultado_atual', 0)):
                         st.success("✅ Fechada!")
                         st.rerun()
 
@@ -0,0 +1,135 @@
+-- ============================================================================
+-- MIGRAÇÃO 001 - RETENÇÃO, ÍNDICES E VIEWS MATERIALIZADAS
+-- ============================================================================
+-- Para bancos criados com a versão anterior de supabase_schema.sql.
+-- Pode ser executada mais de uma vez (idempotente).
+--
+-- Supabase: SQL Editor → colar este arquivo → RUN
+-- psql:     psql "$DATABASE_URL" -f database/migrations/001_retencao_indices_views.sql
+-- ============================================================================
+
+BEGIN;
+
+-- ----------------------------------------------------------------------------
+-- 1. ÍNDICES CONFORME AS CONSULTAS DO CLIENTE
+-- ----------------------------------------------------------------------------
+
+-- listar_oportunidades_recentes: score >= X ORDER BY created_at DESC LIMIT N
+-- Varre em ordem de created_at e filtra score pelo próprio índice
+CREATE INDEX IF NOT EXISTS idx_oport_created_score ON oportunidades(created_at DESC, score);
+-- Caso padrão (score_min = 60) atendido por índice parcial menor
+CREATE INDEX IF NOT EXISTS idx_oport_recentes_60 ON oportunidades(created_at DESC) WHERE score >= 60;
+-- Substituídos pelos índices acima
+DROP INDEX IF EXISTS idx_score;
+DROP INDEX IF EXISTS idx_created;
+
+-- listar_posicoes_ativas: ativa = TRUE ORDER BY created_at
+CREATE INDEX IF NOT EXISTS idx_pos_ativas_created ON posicoes_abertas(created_at) WHERE ativa = TRUE;
+-- Booleano com baixa seletividade, substituído pelo índice parcial
+DROP INDEX IF EXISTS idx_ativa;
+
+-- Retenção de oportunidades consulta posições pela FK
+CREATE INDEX IF NOT EXISTS idx_pos_oportunidade ON posicoes_abertas(oportunidade_id);
+CREATE INDEX IF NOT EXISTS idx_hist_posicao ON historico_operacoes(posicao_id);
+
+-- ----------------------------------------------------------------------------
+-- 2. VIEWS DE PERFORMANCE MATERIALIZADAS
+-- ----------------------------------------------------------------------------
+-- v_performance / v_melhores_setups continuam com o mesmo nome e colunas,
+-- mas leem das views materializadas (sem varrer historico_operacoes a cada consulta)
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_performance AS
+SELECT 
+    COUNT(*) as total_operacoes,
+    COUNT(*) FILTER (WHERE resultado > 0) as operacoes_lucrativas,
+    ROUND(AVG(retorno_percentual), 2) as retorno_medio_pct,
+    ROUND(SUM(resultado), 2) as resultado_total
+FROM historico_operacoes;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_melhores_setups AS
+SELECT 
+    estrategia,
+    COUNT(*) as quantidade,
+    COUNT(*) FILTER (WHERE resultado > 0) as acertos,
+    ROUND(100.0 * COUNT(*) FILTER (WHERE resultado > 0) / COUNT(*), 1) as taxa_acerto
+FROM historico_operacoes
+GROUP BY estrategia
+HAVING COUNT(*) >= 3;
+
+CREATE OR REPLACE VIEW v_performance AS
+SELECT * FROM mv_performance;
+
+CREATE OR REPLACE VIEW v_melhores_setups AS
+SELECT * FROM mv_melhores_setups;
+
+-- Atualiza as views quando uma posição é fechada (insert no histórico)
+CREATE OR REPLACE FUNCTION atualizar_views_performance()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW mv_performance;
+    REFRESH MATERIALIZED VIEW mv_melhores_setups;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_historico_atualiza_performance ON historico_operacoes;
+CREATE TRIGGER trg_historico_atualiza_performance
+AFTER INSERT OR UPDATE OR DELETE ON historico_operacoes
+FOR EACH STATEMENT
+EXECUTE FUNCTION atualizar_views_performance();
+
+-- ----------------------------------------------------------------------------
+-- 3. RETENÇÃO DE OPORTUNIDADES E LOGS
+-- ----------------------------------------------------------------------------
+
+INSERT INTO configuracoes (chave, valor) VALUES
+    ('retencao_dias_oportunidades', '90'),
+    ('retencao_dias_logs', '30')
+ON CONFLICT (chave) DO NOTHING;
+
+-- Apaga oportunidades e logs antigos (prazos em `configuracoes`)
+-- Oportunidades ligadas a posições nunca são apagadas
+CREATE OR REPLACE FUNCTION aplicar_retencao()
+RETURNS TABLE (oportunidades_removidas BIGINT, logs_removidos BIGINT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    dias_oport INTEGER;
+    dias_logs INTEGER;
+BEGIN
+    SELECT COALESCE(NULLIF(valor, '')::INTEGER, 90) INTO dias_oport
+    FROM configuracoes WHERE chave = 'retencao_dias_oportunidades';
+    SELECT COALESCE(NULLIF(valor, '')::INTEGER, 30) INTO dias_logs
+    FROM configuracoes WHERE chave = 'retencao_dias_logs';
+
+    DELETE FROM oportunidades o
+    WHERE o.created_at < NOW() - make_interval(days => COALESCE(dias_oport, 90))
+      AND NOT EXISTS (SELECT 1 FROM posicoes_abertas p WHERE p.oportunidade_id = o.id);
+    GET DIAGNOSTICS oportunidades_removidas = ROW_COUNT;
+
+    DELETE FROM logs
+    WHERE created_at < NOW() - make_interval(days => COALESCE(dias_logs, 30));
+    GET DIAGNOSTICS logs_removidos = ROW_COUNT;
+
+    RETURN NEXT;
+END;
+$$;
+
+COMMIT;
+
+-- Agendamento diário (03:00) se a extensão pg_cron estiver habilitada
+-- (Supabase: Database → Extensions → pg_cron). Sem pg_cron, rode
+-- `SELECT * FROM aplicar_retencao();` manualmente ou por um job externo.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule('rco-retencao', '0 3 * * *', 'SELECT aplicar_retencao()');
+    END IF;
+END;
+$$;
@@ -0,0 +1,22 @@
+-- ============================================================================
+-- MIGRAÇÃO 002 - ESTADO DOS ALERTAS
+-- ============================================================================
+-- Último envio de cada alerta (tipo, posição/contrato, faixa), usado pelo
+-- estado_alertas.py para deduplicação e cooldown.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS alertas_enviados (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    tipo VARCHAR(30) NOT NULL,
+    chave VARCHAR(100) NOT NULL,
+    faixa VARCHAR(20) NOT NULL DEFAULT '',
+    score DECIMAL(6,2),
+    ultimo_envio TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    total_envios INTEGER DEFAULT 1,
+    UNIQUE (tipo, chave, faixa)
+);
+
+ALTER TABLE alertas_enviados ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Acesso público" ON alertas_enviados;
+CREATE POLICY "Acesso público" ON alertas_enviados FOR ALL USING (true);
@@ -0,0 +1,64 @@
+-- ============================================================================
+-- MIGRAÇÃO 003 - REGRAS DE ALERTA
+-- ============================================================================
+-- Limites de alerta (lucro alvo, stop, dias até o vencimento) configuráveis
+-- por posição, por estratégia ou globais, lidos pelo regras_alerta.py.
+-- v_posicoes_ativas passa a calcular o status_alerta com esses limites em
+-- vez dos literais 60 / -30 / 7 (que viram as regras globais semeadas).
+-- Pode ser executada mais de uma vez (idempotente).
+-- ============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS regras_alerta (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    escopo VARCHAR(20) NOT NULL CHECK (escopo IN ('GLOBAL', 'ESTRATEGIA', 'POSICAO')),
+    alvo VARCHAR(100) NOT NULL DEFAULT '',
+    tipo VARCHAR(30) NOT NULL,
+    limite DECIMAL(10,2),
+    ativa BOOLEAN DEFAULT TRUE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE (escopo, alvo, tipo)
+);
+
+INSERT INTO regras_alerta (escopo, alvo, tipo, limite) VALUES
+    ('GLOBAL', '', 'LUCRO_60', 60),
+    ('GLOBAL', '', 'STOP_LOSS', -30),
+    ('GLOBAL', '', 'VENCIMENTO', 7)
+ON CONFLICT (escopo, alvo, tipo) DO NOTHING;
+
+-- Limite efetivo de um alerta para a posição: posição > estratégia > global
+-- (NULL se não houver regra ou se a mais específica estiver desativada)
+CREATE OR REPLACE FUNCTION limite_alerta(p_tipo TEXT, p_posicao TEXT, p_estrategia TEXT)
+RETURNS DECIMAL
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT CASE WHEN r.ativa THEN r.limite END
+    FROM regras_alerta r
+    WHERE r.tipo = p_tipo
+      AND ((r.escopo = 'POSICAO' AND r.alvo = p_posicao)
+           OR (r.escopo = 'ESTRATEGIA' AND r.alvo = p_estrategia)
+           OR r.escopo = 'GLOBAL')
+    ORDER BY CASE r.escopo WHEN 'POSICAO' THEN 0 WHEN 'ESTRATEGIA' THEN 1 ELSE 2 END
+    LIMIT 1
+$$;
+
+CREATE OR REPLACE VIEW v_posicoes_ativas AS
+SELECT 
+    p.*,
+    CASE 
+        WHEN p.lucro_percentual >= limite_alerta('LUCRO_60', p.id::text, p.estrategia) THEN 'FECHAR AGORA'
+        WHEN p.lucro_percentual <= limite_alerta('STOP_LOSS', p.id::text, p.estrategia) THEN 'STOP LOSS'
+        WHEN (p.vencimento - CURRENT_DATE) <= limite_alerta('VENCIMENTO', p.id::text, p.estrategia) THEN 'VENCIMENTO PRÓXIMO'
+        ELSE 'MONITORANDO'
+    END as status_alerta
+FROM posicoes_abertas p
+WHERE p.ativa = TRUE;
+
+ALTER TABLE regras_alerta ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Acesso público" ON regras_alerta;
+CREATE POLICY "Acesso público" ON regras_alerta FOR ALL USING (true);
+
+COMMIT;
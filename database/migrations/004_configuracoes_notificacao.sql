@@ -0,0 +1,47 @@
+-- ============================================================================
+-- MIGRAÇÃO 004 - NOTIFICAÇÃO DE CONFIGURAÇÕES
+-- ============================================================================
+-- configuracao.py guarda a tabela `configuracoes` em memória e só relê
+-- quando a versão (maior updated_at + total de linhas) muda. Aqui:
+-- - updated_at passa a ser atualizado em todo INSERT/UPDATE (o upsert do
+--   cliente não envia a coluna);
+-- - cada alteração gera NOTIFY no canal 'configuracoes' (LISTEN);
+-- - a tabela entra na publicação do Supabase Realtime, se existir.
+-- Pode ser executada mais de uma vez (idempotente).
+-- ============================================================================
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION configuracoes_alteradas()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('configuracoes', OLD.chave);
+        RETURN OLD;
+    END IF;
+    NEW.updated_at := NOW();
+    PERFORM pg_notify('configuracoes', NEW.chave);
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_configuracoes_alteradas ON configuracoes;
+CREATE TRIGGER trg_configuracoes_alteradas
+BEFORE INSERT OR UPDATE OR DELETE ON configuracoes
+FOR EACH ROW EXECUTE FUNCTION configuracoes_alteradas();
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_publication WHERE pubname = 'supabase_realtime')
+       AND NOT EXISTS (
+           SELECT 1 FROM pg_publication_tables
+           WHERE pubname = 'supabase_realtime' AND tablename = 'configuracoes'
+       ) THEN
+        ALTER PUBLICATION supabase_realtime ADD TABLE configuracoes;
+    END IF;
+END;
+$$;
+
+COMMIT;
@@ -42,8 +42,9 @@ CREATE TABLE IF NOT EXISTS oportunidades (
 );
 
 CREATE INDEX IF NOT EXISTS idx_ativo ON oportunidades(ativo);
-CREATE INDEX IF NOT EXISTS idx_score ON oportunidades(score DESC);
-CREATE INDEX IF NOT EXISTS idx_created ON oportunidades(created_at DESC);
+-- listar_oportunidades_recentes: score >= X ORDER BY created_at DESC LIMIT N
+CREATE INDEX IF NOT EXISTS idx_oport_created_score ON oportunidades(created_at DESC, score);
+CREATE INDEX IF NOT EXISTS idx_oport_recentes_60 ON oportunidades(created_at DESC) WHERE score >= 60;
 
 -- 2. POSIÇÕES ABERTAS
 CREATE TABLE IF NOT EXISTS posicoes_abertas (
@@ -89,7 +90,9 @@ CREATE TABLE IF NOT EXISTS posicoes_abertas (
     resultado_final DECIMAL(10,2)
 );
 
-CREATE INDEX IF NOT EXISTS idx_ativa ON posicoes_abertas(ativa);
+-- listar_posicoes_ativas: ativa = TRUE ORDER BY created_at
+CREATE INDEX IF NOT EXISTS idx_pos_ativas_created ON posicoes_abertas(created_at) WHERE ativa = TRUE;
+CREATE INDEX IF NOT EXISTS idx_pos_oportunidade ON posicoes_abertas(oportunidade_id);
 CREATE INDEX IF NOT EXISTS idx_ativo_pos ON posicoes_abertas(ativo);
 CREATE INDEX IF NOT EXISTS idx_vencimento ON posicoes_abertas(vencimento);
 
@@ -112,6 +115,7 @@ CREATE TABLE IF NOT EXISTS historico_operacoes (
 
 CREATE INDEX IF NOT EXISTS idx_ativo_hist ON historico_operacoes(ativo);
 CREATE INDEX IF NOT EXISTS idx_resultado ON historico_operacoes(resultado DESC);
+CREATE INDEX IF NOT EXISTS idx_hist_posicao ON historico_operacoes(posicao_id);
 
 -- 4. CONFIGURAÇÕES
 CREATE TABLE IF NOT EXISTS configuracoes (
@@ -124,9 +128,44 @@ CREATE TABLE IF NOT EXISTS configuracoes (
 INSERT INTO configuracoes (chave, valor) VALUES
     ('ativos_monitorar', 'PETR4,VALE3,BBAS3,ITUB4,BOVA11'),
     ('score_minimo_alerta', '80'),
-    ('capital_total', '5000')
+    ('capital_total', '5000'),
+    ('retencao_dias_oportunidades', '90'),
+    ('retencao_dias_logs', '30')
 ON CONFLICT (chave) DO NOTHING;
 
+-- updated_at em toda alteração + NOTIFY 'configuracoes' (lidos por configuracao.py)
+CREATE OR REPLACE FUNCTION configuracoes_alteradas()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('configuracoes', OLD.chave);
+        RETURN OLD;
+    END IF;
+    NEW.updated_at := NOW();
+    PERFORM pg_notify('configuracoes', NEW.chave);
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_configuracoes_alteradas ON configuracoes;
+CREATE TRIGGER trg_configuracoes_alteradas
+BEFORE INSERT OR UPDATE OR DELETE ON configuracoes
+FOR EACH ROW EXECUTE FUNCTION configuracoes_alteradas();
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_publication WHERE pubname = 'supabase_realtime')
+       AND NOT EXISTS (
+           SELECT 1 FROM pg_publication_tables
+           WHERE pubname = 'supabase_realtime' AND tablename = 'configuracoes'
+       ) THEN
+        ALTER PUBLICATION supabase_realtime ADD TABLE configuracoes;
+    END IF;
+END;
+$$;
+
 -- 5. LOGS
 CREATE TABLE IF NOT EXISTS logs (
     id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
@@ -140,20 +179,68 @@ CREATE TABLE IF NOT EXISTS logs (
 CREATE INDEX IF NOT EXISTS idx_nivel ON logs(nivel);
 CREATE INDEX IF NOT EXISTS idx_created_log ON logs(created_at DESC);
 
+-- 6. ESTADO DOS ALERTAS (deduplicação / cooldown)
+CREATE TABLE IF NOT EXISTS alertas_enviados (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    tipo VARCHAR(30) NOT NULL,
+    chave VARCHAR(100) NOT NULL,
+    faixa VARCHAR(20) NOT NULL DEFAULT '',
+    score DECIMAL(6,2),
+    ultimo_envio TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    total_envios INTEGER DEFAULT 1,
+    UNIQUE (tipo, chave, faixa)
+);
+
+-- 7. REGRAS DE ALERTA (limites por posição, estratégia ou globais)
+CREATE TABLE IF NOT EXISTS regras_alerta (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    escopo VARCHAR(20) NOT NULL CHECK (escopo IN ('GLOBAL', 'ESTRATEGIA', 'POSICAO')),
+    alvo VARCHAR(100) NOT NULL DEFAULT '',
+    tipo VARCHAR(30) NOT NULL,
+    limite DECIMAL(10,2),
+    ativa BOOLEAN DEFAULT TRUE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE (escopo, alvo, tipo)
+);
+
+INSERT INTO regras_alerta (escopo, alvo, tipo, limite) VALUES
+    ('GLOBAL', '', 'LUCRO_60', 60),
+    ('GLOBAL', '', 'STOP_LOSS', -30),
+    ('GLOBAL', '', 'VENCIMENTO', 7)
+ON CONFLICT (escopo, alvo, tipo) DO NOTHING;
+
 -- VIEWS
+-- Limite efetivo de um alerta para a posição: posição > estratégia > global
+-- (NULL se não houver regra ou se a mais específica estiver desativada)
+CREATE OR REPLACE FUNCTION limite_alerta(p_tipo TEXT, p_posicao TEXT, p_estrategia TEXT)
+RETURNS DECIMAL
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT CASE WHEN r.ativa THEN r.limite END
+    FROM regras_alerta r
+    WHERE r.tipo = p_tipo
+      AND ((r.escopo = 'POSICAO' AND r.alvo = p_posicao)
+           OR (r.escopo = 'ESTRATEGIA' AND r.alvo = p_estrategia)
+           OR r.escopo = 'GLOBAL')
+    ORDER BY CASE r.escopo WHEN 'POSICAO' THEN 0 WHEN 'ESTRATEGIA' THEN 1 ELSE 2 END
+    LIMIT 1
+$$;
+
 CREATE OR REPLACE VIEW v_posicoes_ativas AS
 SELECT 
     p.*,
     CASE 
-        WHEN p.lucro_percentual >= 60 THEN 'FECHAR AGORA'
-        WHEN p.lucro_percentual <= -30 THEN 'STOP LOSS'
-        WHEN (p.vencimento - CURRENT_DATE) <= 7 THEN 'VENCIMENTO PRÓXIMO'
+        WHEN p.lucro_percentual >= limite_alerta('LUCRO_60', p.id::text, p.estrategia) THEN 'FECHAR AGORA'
+        WHEN p.lucro_percentual <= limite_alerta('STOP_LOSS', p.id::text, p.estrategia) THEN 'STOP LOSS'
+        WHEN (p.vencimento - CURRENT_DATE) <= limite_alerta('VENCIMENTO', p.id::text, p.estrategia) THEN 'VENCIMENTO PRÓXIMO'
         ELSE 'MONITORANDO'
     END as status_alerta
 FROM posicoes_abertas p
 WHERE p.ativa = TRUE;
 
-CREATE OR REPLACE VIEW v_performance AS
+-- Performance: views materializadas, atualizadas ao fechar posição
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_performance AS
 SELECT 
     COUNT(*) as total_operacoes,
     COUNT(*) FILTER (WHERE resultado > 0) as operacoes_lucrativas,
@@ -161,7 +248,7 @@ SELECT
     ROUND(SUM(resultado), 2) as resultado_total
 FROM historico_operacoes;
 
-CREATE OR REPLACE VIEW v_melhores_setups AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_melhores_setups AS
 SELECT 
     estrategia,
     COUNT(*) as quantidade,
@@ -171,15 +258,82 @@ FROM historico_operacoes
 GROUP BY estrategia
 HAVING COUNT(*) >= 3;
 
+CREATE OR REPLACE VIEW v_performance AS
+SELECT * FROM mv_performance;
+
+CREATE OR REPLACE VIEW v_melhores_setups AS
+SELECT * FROM mv_melhores_setups;
+
+CREATE OR REPLACE FUNCTION atualizar_views_performance()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW mv_performance;
+    REFRESH MATERIALIZED VIEW mv_melhores_setups;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_historico_atualiza_performance ON historico_operacoes;
+CREATE TRIGGER trg_historico_atualiza_performance
+AFTER INSERT OR UPDATE OR DELETE ON historico_operacoes
+FOR EACH STATEMENT
+EXECUTE FUNCTION atualizar_views_performance();
+
+-- RETENÇÃO (prazos em configuracoes; oportunidades com posição nunca são apagadas)
+CREATE OR REPLACE FUNCTION aplicar_retencao()
+RETURNS TABLE (oportunidades_removidas BIGINT, logs_removidos BIGINT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    dias_oport INTEGER;
+    dias_logs INTEGER;
+BEGIN
+    SELECT COALESCE(NULLIF(valor, '')::INTEGER, 90) INTO dias_oport
+    FROM configuracoes WHERE chave = 'retencao_dias_oportunidades';
+    SELECT COALESCE(NULLIF(valor, '')::INTEGER, 30) INTO dias_logs
+    FROM configuracoes WHERE chave = 'retencao_dias_logs';
+
+    DELETE FROM oportunidades o
+    WHERE o.created_at < NOW() - make_interval(days => COALESCE(dias_oport, 90))
+      AND NOT EXISTS (SELECT 1 FROM posicoes_abertas p WHERE p.oportunidade_id = o.id);
+    GET DIAGNOSTICS oportunidades_removidas = ROW_COUNT;
+
+    DELETE FROM logs
+    WHERE created_at < NOW() - make_interval(days => COALESCE(dias_logs, 30));
+    GET DIAGNOSTICS logs_removidos = ROW_COUNT;
+
+    RETURN NEXT;
+END;
+$$;
+
+-- Agendamento diário (03:00) se pg_cron estiver habilitado
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule('rco-retencao', '0 3 * * *', 'SELECT aplicar_retencao()');
+    END IF;
+END;
+$$;
+
 -- POLÍTICAS
 ALTER TABLE oportunidades ENABLE ROW LEVEL SECURITY;
 ALTER TABLE posicoes_abertas ENABLE ROW LEVEL SECURITY;
 ALTER TABLE historico_operacoes ENABLE ROW LEVEL SECURITY;
 ALTER TABLE configuracoes ENABLE ROW LEVEL SECURITY;
 ALTER TABLE logs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE alertas_enviados ENABLE ROW LEVEL SECURITY;
+ALTER TABLE regras_alerta ENABLE ROW LEVEL SECURITY;
 
 CREATE POLICY "Acesso público" ON oportunidades FOR ALL USING (true);
 CREATE POLICY "Acesso público" ON posicoes_abertas FOR ALL USING (true);
 CREATE POLICY "Acesso público" ON historico_operacoes FOR ALL USING (true);
 CREATE POLICY "Acesso público" ON configuracoes FOR ALL USING (true);
 CREATE POLICY "Acesso público" ON logs FOR ALL USING (true);
+CREATE POLICY "Acesso público" ON alertas_enviados FOR ALL USING (true);
+CREATE POLICY "Acesso público" ON regras_alerta FOR ALL USING (true);
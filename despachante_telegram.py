@@ -0,0 +1,371 @@
+"""
+Despachante Telegram - UNO INVEST
+==================================
+Envio de alertas em segundo plano, sem travar o scan
+
+- Sessão HTTP com pool de conexões (reaproveita TCP/TLS)
+- Fila de envio processada por uma thread própria
+- Limite de taxa (token bucket) conforme limites do Telegram:
+  30 msg/s no total, 1 msg/s por chat, 20 msg/min em grupos
+- Retry com backoff exponencial + jitter, respeitando `retry_after` (HTTP 429)
+- Rajadas de alertas para o mesmo chat viram uma única mensagem
+"""
+
+import atexit
+import os
+import queue
+import random
+import threading
+import time
+import logging
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+TELEGRAM_API_URL = 'https://api.telegram.org'
+TAMANHO_MAX_MENSAGEM = 4096  # Limite do Telegram por mensagem
+SEPARADOR_LOTE = '\n\n━━━━━━━━━━━━\n\n'
+
+
+class BaldeTokens:
+    """Token bucket thread-safe (taxa em tokens/segundo)"""
+
+    def __init__(self, taxa: float, capacidade: float = 1.0):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._tokens = capacidade
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def tentar_consumir(self, n: float = 1.0) -> float:
+        """Consome `n` tokens se houver; senão retorna quantos segundos faltam"""
+        with self._lock:
+            self._repor()
+            if self._tokens >= n:
+                self._tokens -= n
+                return 0.0
+            return (n - self._tokens) / self.taxa
+
+    def consumir(self, n: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Espera até ter `n` tokens (ou até o timeout)"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            espera = self.tentar_consumir(n)
+            if espera == 0.0:
+                return True
+            if limite is not None and time.monotonic() + espera > limite:
+                return False
+            time.sleep(espera)
+
+
+class DespachanteTelegram:
+    """Fila de envio para a API do Telegram com pool, rate limit, retry e lotes"""
+
+    def __init__(self, bot_token: str, chat_id: str = None, api_url: str = TELEGRAM_API_URL,
+                 taxa_global: float = 30.0, taxa_por_chat: float = 1.0, taxa_grupo: float = 20 / 60,
+                 max_tentativas: int = 5, backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 timeout: float = 10.0, capacidade_fila: int = 1000):
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.api_url = api_url.rstrip('/')
+        self.taxa_por_chat = taxa_por_chat
+        self.taxa_grupo = taxa_grupo
+        self.max_tentativas = max_tentativas
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._balde_global = BaldeTokens(taxa_global, capacidade=taxa_global)
+        self._baldes_chat: Dict[str, BaldeTokens] = {}
+        self._lock = threading.Lock()
+
+        self._fila: queue.Queue = queue.Queue(maxsize=capacidade_fila)
+        self._adiadas: deque = deque()  # Mensagens de outros chats retiradas durante um lote
+        self._encerrado = threading.Event()
+
+        # Métricas
+        self.enviadas = 0
+        self.falhas = 0
+        self.descartadas = 0
+        self.mensagens_agrupadas = 0
+
+        self._thread = threading.Thread(target=self._loop, name='despachante-telegram', daemon=True)
+        self._thread.start()
+
+    # ========================================================================
+    # API PÚBLICA
+    # ========================================================================
+
+    def enviar(self, mensagem: str, chat_id: str = None,
+               ao_entregar: Callable[[bool], None] = None) -> bool:
+        """
+        Coloca a mensagem na fila (não bloqueia). Retorna False se a fila estiver cheia
+
+        `ao_entregar(ok)` é chamado na thread do despachante depois da tentativa
+        de envio: True se o Telegram aceitou a mensagem, False se falhou.
+        """
+        chat = str(chat_id or self.chat_id)
+        try:
+            self._fila.put_nowait((chat, mensagem, ao_entregar))
+            return True
+        except queue.Full:
+            self.descartadas += 1
+            logger.error("❌ Fila do Telegram cheia, alerta descartado")
+            return False
+
+    def enviar_sincrono(self, mensagem: str, chat_id: str = None) -> bool:
+        """Envia já, na thread atual (respeita rate limit e retry)"""
+        chat = str(chat_id or self.chat_id)
+        self._aguardar_limite(chat)
+        return self._postar(chat, mensagem)
+
+    def aguardar_fila(self, timeout: float = 30.0) -> bool:
+        """Espera a fila esvaziar. Retorna False se estourar o timeout"""
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            if self._fila.unfinished_tasks == 0:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def fechar(self, timeout: float = 30.0):
+        """Envia o que estiver pendente e encerra a thread"""
+        self.aguardar_fila(timeout)
+        self._encerrado.set()
+        self._thread.join(timeout=5)
+        self.session.close()
+
+    def estatisticas(self) -> Dict:
+        return {
+            'enviadas': self.enviadas,
+            'falhas': self.falhas,
+            'descartadas': self.descartadas,
+            'mensagens_agrupadas': self.mensagens_agrupadas,
+            'pendentes': self._fila.unfinished_tasks
+        }
+
+    # ========================================================================
+    # LOOP DE ENVIO
+    # ========================================================================
+
+    def _proxima(self, timeout: float) -> Optional[Tuple[str, str, Optional[Callable]]]:
+        if self._adiadas:
+            return self._adiadas.popleft()
+        try:
+            return self._fila.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _loop(self):
+        while not self._encerrado.is_set():
+            item = self._proxima(timeout=0.5)
+            if item is None:
+                continue
+
+            chat, mensagem, callback = item
+            lote = [(mensagem, callback)]
+            entregue = False
+            try:
+                # Enquanto espera o limite do chat, novos alertas se acumulam na fila
+                self._aguardar_limite(chat)
+                lote.extend(self._coletar_rajada(chat, len(mensagem)))
+
+                texto = SEPARADOR_LOTE.join(m for m, _ in lote)
+                if len(lote) > 1:
+                    self.mensagens_agrupadas += len(lote)
+                    texto = f"📦 <b>{len(lote)} alertas</b>{SEPARADOR_LOTE}{texto}"
+
+                entregue = self._postar(chat, texto)
+            except Exception as e:
+                self.falhas += 1
+                logger.error(f"❌ Erro no despachante Telegram: {e}")
+            finally:
+                for _, callback in lote:
+                    self._notificar(callback, entregue)
+                    self._fila.task_done()
+
+    @staticmethod
+    def _notificar(callback: Optional[Callable[[bool], None]], entregue: bool):
+        if callback is None:
+            return
+        try:
+            callback(entregue)
+        except Exception as e:
+            logger.error(f"❌ Erro no retorno de entrega do Telegram: {e}")
+
+    def _coletar_rajada(self, chat: str, tamanho_atual: int) -> List[Tuple[str, Optional[Callable]]]:
+        """Retira da fila as mensagens já pendentes do mesmo chat que cabem numa mensagem"""
+        extras = []
+        tamanho = tamanho_atual + 40  # Cabeçalho do lote
+        while True:
+            try:
+                outro_chat, mensagem, callback = self._fila.get_nowait()
+            except queue.Empty:
+                break
+
+            novo_tamanho = tamanho + len(SEPARADOR_LOTE) + len(mensagem)
+            if outro_chat != chat or novo_tamanho > TAMANHO_MAX_MENSAGEM:
+                # Sai do lote mas continua contando como pendente (task_done no envio)
+                self._adiadas.append((outro_chat, mensagem, callback))
+                if outro_chat == chat:
+                    break
+                continue
+
+            extras.append((mensagem, callback))
+            tamanho = novo_tamanho
+        return extras
+
+    # ========================================================================
+    # HTTP
+    # ========================================================================
+
+    def _balde_chat(self, chat: str) -> BaldeTokens:
+        with self._lock:
+            if chat not in self._baldes_chat:
+                taxa = self.taxa_grupo if chat.startswith('-') else self.taxa_por_chat
+                self._baldes_chat[chat] = BaldeTokens(taxa, capacidade=1.0)
+            return self._baldes_chat[chat]
+
+    def _aguardar_limite(self, chat: str):
+        self._balde_chat(chat).consumir()
+        self._balde_global.consumir()
+
+    def _backoff(self, tentativa: int) -> float:
+        espera = min(self.backoff_base * (2 ** tentativa), self.backoff_max)
+        return espera * random.uniform(0.5, 1.5)
+
+    def _postar(self, chat: str, texto: str) -> bool:
+        url = f"{self.api_url}/bot{self.bot_token}/sendMessage"
+        payload = {'chat_id': chat, 'text': texto, 'parse_mode': 'HTML'}
+
+        for tentativa in range(self.max_tentativas):
+            try:
+                response = self.session.post(url, data=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                espera = self._backoff(tentativa)
+                logger.warning(f"⚠️ Telegram indisponível ({e}), nova tentativa em {espera:.1f}s")
+                time.sleep(espera)
+                continue
+
+            if response.status_code == 200:
+                self.enviadas += 1
+                logger.info("✅ Alerta Telegram enviado")
+                return True
+
+            if response.status_code == 429:
+                try:
+                    espera = float(response.json().get('parameters', {}).get('retry_after'))
+                except (ValueError, TypeError, AttributeError):
+                    espera = self._backoff(tentativa)
+                logger.warning(f"⚠️ Telegram limitou envio, aguardando {espera:.1f}s")
+                time.sleep(espera)
+                continue
+
+            if response.status_code >= 500:
+                espera = self._backoff(tentativa)
+                logger.warning(f"⚠️ Telegram erro {response.status_code}, nova tentativa em {espera:.1f}s")
+                time.sleep(espera)
+                continue
+
+            # 4xx (token/chat inválido, HTML mal formado): não adianta repetir
+            self.falhas += 1
+            logger.error(f"❌ Telegram erro: {response.status_code} - {response.text}")
+            return False
+
+        self.falhas += 1
+        logger.error(f"❌ Telegram: desistindo após {self.max_tentativas} tentativas")
+        return False
+
+
+# ============================================================================
+# INSTÂNCIA COMPARTILHADA
+# ============================================================================
+
+_despachantes: Dict[Tuple[str, str], DespachanteTelegram] = {}
+_despachantes_lock = threading.Lock()
+
+
+def obter_despachante(bot_token: str = None, chat_id: str = None, api_url: str = None) -> Optional[DespachanteTelegram]:
+    """Despachante do processo para o bot (criado na primeira chamada)"""
+    token = bot_token or os.getenv('TELEGRAM_BOT_TOKEN')
+    chat = chat_id or os.getenv('TELEGRAM_CHAT_ID')
+    url = api_url or os.getenv('TELEGRAM_API_URL') or TELEGRAM_API_URL
+
+    if not token:
+        return None
+
+    with _despachantes_lock:
+        chave = (token, url)
+        if chave not in _despachantes:
+            _despachantes[chave] = DespachanteTelegram(token, chat, api_url=url)
+            # Alertas ainda na fila são enviados antes do processo terminar
+            atexit.register(_despachantes[chave].fechar, 10.0)
+        return _despachantes[chave]
+
+
+# Teste (servidor Telegram falso local)
+if __name__ == "__main__":
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs
+
+    recebidas = []
+
+    class TelegramFalso(BaseHTTPRequestHandler):
+        def do_POST(self):
+            corpo = self.rfile.read(int(self.headers['Content-Length'])).decode()
+            dados = parse_qs(corpo)
+
+            # Primeira chamada simula o limite do Telegram
+            if not recebidas and not getattr(self.server, 'limitou', False):
+                self.server.limitou = True
+                resposta, status = {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 1}}, 429
+            else:
+                recebidas.append(dados['text'][0])
+                resposta, status = {'ok': True, 'result': {}}, 200
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps(resposta).encode())
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), TelegramFalso)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    despachante = DespachanteTelegram(
+        'TOKEN', '123', api_url=f"http://127.0.0.1:{servidor.server_port}"
+    )
+
+    entregues = []
+    inicio = time.monotonic()
+    for i in range(10):
+        despachante.enviar(f"Alerta {i}", ao_entregar=entregues.append)
+    print(f"Enfileirar 10 alertas: {(time.monotonic() - inicio) * 1000:.1f} ms")
+
+    despachante.fechar()
+    servidor.shutdown()
+
+    print(f"Mensagens recebidas pelo servidor: {len(recebidas)}")
+    print(f"Estatísticas: {despachante.estatisticas()}")
+    assert sum(m.count('Alerta ') for m in recebidas) == 10
+    assert entregues == [True] * 10
+    print("✅ Todos os alertas entregues")
@@ -0,0 +1,151 @@
+"""
+Estado dos Alertas - UNO INVEST
+================================
+Memória do que já foi alertado, para não repetir o mesmo alerta a cada scan
+
+Chave: (tipo do alerta, posição/contrato, faixa do limite)
+- Cooldown configurável por tipo
+- Alertas com score só repetem se o score mudou de forma relevante
+- Consulta em memória (dict); tabela `alertas_enviados` só é lida na carga
+"""
+
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Cooldown padrão por tipo de alerta (horas)
+COOLDOWNS_PADRAO = {
+    'OPORTUNIDADE': 6,
+    'LUCRO_60': 4,
+    'STOP_LOSS': 4,
+    'VENCIMENTO': 24,
+}
+
+# Variação mínima de score (pontos) para repetir um alerta de oportunidade
+VARIACAO_SCORE_MIN = 10
+
+
+def chave_contrato(oportunidade: Dict) -> str:
+    """Identificador do contrato/setup (ex: PETRP402/PETRP412)"""
+    pernas = [oportunidade.get('codigo_opcao_1'), oportunidade.get('codigo_opcao_2')]
+    return '/'.join(p for p in pernas if p)
+
+
+def faixa_vencimento(dias_restantes: int) -> str:
+    """Faixa de dias até o vencimento (cada faixa alerta uma vez)"""
+    for limite in (1, 3, 7):
+        if dias_restantes <= limite:
+            return f'D{limite}'
+    return f'D{dias_restantes}'
+
+
+class EstadoAlertas:
+    """Estado persistente dos alertas enviados, com lookup O(1) em memória"""
+
+    def __init__(self, db=None, cooldowns: Dict[str, float] = None,
+                 variacao_score_min: float = VARIACAO_SCORE_MIN):
+        self.db = db
+        self.cooldowns = {**COOLDOWNS_PADRAO, **(cooldowns or {})}
+        self.variacao_score_min = variacao_score_min
+        self._estado: Dict[Tuple[str, str, str], Dict] = {}
+        self._lock = threading.Lock()
+        self.carregar()
+
+    def carregar(self):
+        """Lê a tabela `alertas_enviados` uma vez para a memória"""
+        if self.db is None:
+            return
+
+        registros = self.db.listar_estado_alertas()
+        with self._lock:
+            self._estado = {
+                (r['tipo'], r['chave'], r.get('faixa') or ''): {
+                    'ultimo_envio': self._para_datetime(r['ultimo_envio']),
+                    'score': r.get('score'),
+                    'total_envios': r.get('total_envios') or 1
+                }
+                for r in registros
+            }
+        logger.info(f"✅ Estado de alertas carregado: {len(self._estado)} registros")
+
+    @staticmethod
+    def _para_datetime(valor) -> datetime:
+        if isinstance(valor, datetime):
+            data = valor
+        else:
+            data = datetime.fromisoformat(str(valor).replace('Z', '+00:00'))
+        return data if data.tzinfo else data.replace(tzinfo=timezone.utc)
+
+    def deve_alertar(self, tipo: str, chave: str, faixa: str = '', score: float = None,
+                     agora: datetime = None) -> bool:
+        """
+        True se o alerta deve sair
+
+        - Nunca enviado: sim
+        - Dentro do cooldown do tipo: não
+        - Com score: só se mudou pelo menos `variacao_score_min` pontos
+        """
+        agora = agora or datetime.now(timezone.utc)
+        with self._lock:
+            anterior = self._estado.get((tipo, chave, faixa))
+
+        if anterior is None:
+            return True
+
+        cooldown = timedelta(hours=self.cooldowns.get(tipo, 0))
+        if agora - anterior['ultimo_envio'] < cooldown:
+            return False
+
+        if score is not None and anterior['score'] is not None:
+            return abs(score - anterior['score']) >= self.variacao_score_min
+
+        return True
+
+    def registrar(self, tipo: str, chave: str, faixa: str = '', score: float = None,
+                  agora: datetime = None):
+        """Marca o alerta como enviado (memória + tabela)"""
+        agora = agora or datetime.now(timezone.utc)
+        with self._lock:
+            anterior = self._estado.get((tipo, chave, faixa))
+            registro = {
+                'ultimo_envio': agora,
+                'score': score,
+                'total_envios': (anterior['total_envios'] + 1) if anterior else 1
+            }
+            self._estado[(tipo, chave, faixa)] = registro
+
+        if self.db is not None:
+            self.db.salvar_estado_alerta({
+                'tipo': tipo,
+                'chave': chave,
+                'faixa': faixa,
+                'score': score,
+                'ultimo_envio': agora.isoformat(),
+                'total_envios': registro['total_envios']
+            })
+
+    def esquecer(self, chave: str):
+        """Remove da memória os alertas de uma posição/contrato (ex: posição fechada)"""
+        with self._lock:
+            for k in [k for k in self._estado if k[1] == chave]:
+                del self._estado[k]
+
+
+# Teste
+if __name__ == "__main__":
+    estado = EstadoAlertas()
+    t0 = datetime.now(timezone.utc)
+    opp = {'codigo_opcao_1': 'PETRP402', 'codigo_opcao_2': 'PETRP412'}
+
+    chave = chave_contrato(opp)
+    print(f"1º scan (score 85): {estado.deve_alertar('OPORTUNIDADE', chave, score=85, agora=t0)}")
+    estado.registrar('OPORTUNIDADE', chave, score=85, agora=t0)
+    print(f"2º scan 30min depois: {estado.deve_alertar('OPORTUNIDADE', chave, score=86, agora=t0 + timedelta(minutes=30))}")
+    print(f"7h depois, score 87: {estado.deve_alertar('OPORTUNIDADE', chave, score=87, agora=t0 + timedelta(hours=7))}")
+    print(f"7h depois, score 96: {estado.deve_alertar('OPORTUNIDADE', chave, score=96, agora=t0 + timedelta(hours=7))}")
+    print(f"Vencimento D7: {estado.deve_alertar('VENCIMENTO', 'pos-1', faixa_vencimento(6))}")
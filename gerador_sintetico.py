@@ -0,0 +1,214 @@
+"""
+Gerador Sintético - RCO Scanner
+================================
+Chains de opções falsas, no formato do yfinance, para testes de carga
+
+`GeradorChains` faz o papel de `yf.Ticker`: plugado em
+ScannerOpcoesB3(fonte_dados=GeradorChains()), o scanner roda sem rede e
+em qualquer escala (mais ativos, vencimentos ou strikes que o mercado).
+
+Cada chain tem:
+- códigos no padrão B3: raiz do ativo + letra da série (A-L calls e M-X
+  puts, de janeiro a dezembro) + strike × 10 (PETRC402, VALEP350);
+- vencimentos mensais na terceira sexta-feira;
+- IV de um smile (parábola na log-moneyness, skew de put, estrutura a
+  termo) com ruído pequeno, e prêmio Black-Scholes coerente com ela;
+- spread bid/ask maior nas opções baratas e ilíquidas;
+- volume e open interest concentrados perto do dinheiro e no primeiro
+  vencimento, com cauda lognormal e contratos sem negócio.
+
+Tudo é determinístico por (semente, ativo, vencimento): a mesma chamada
+devolve a mesma chain, em qualquer ordem.
+"""
+
+import zlib
+from collections import namedtuple
+from datetime import date, datetime
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from black_scholes import preco, prazo_anos
+from indice_contratos import codigo_b3, terceira_sexta
+
+# Spots de referência; outros ativos ganham um spot sorteado
+SPOTS_REFERENCIA = {
+    'PETR4': 38.0, 'VALE3': 62.0, 'BBAS3': 27.0, 'ITUB4': 35.0, 'BOVA11': 125.0,
+    'BBDC4': 15.0, 'ABEV3': 13.0, 'B3SA3': 12.0, 'WEGE3': 40.0, 'MGLU3': 9.0,
+}
+
+# Mesmo formato de yf.Ticker(...).option_chain(...)
+Options = namedtuple('Options', ['calls', 'puts', 'underlying'])
+
+
+def vencimentos_mensais(hoje: date, quantidade: int) -> List[date]:
+    """Próximos `quantidade` vencimentos mensais depois de `hoje`"""
+    vencimentos = []
+    ano, mes = hoje.year, hoje.month
+    while len(vencimentos) < quantidade:
+        venc = terceira_sexta(ano, mes)
+        if venc > hoje:
+            vencimentos.append(venc)
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return vencimentos
+
+
+def ativos_sinteticos(quantidade: int) -> List[str]:
+    """Tickers inventados (AAAA3, AAAB3, ...) para universos maiores que o real"""
+    ativos = []
+    for i in range(quantidade):
+        raiz = ''
+        n = i
+        for _ in range(4):
+            raiz = chr(ord('A') + n % 26) + raiz
+            n //= 26
+        ativos.append(f"{raiz}3")
+    return ativos
+
+
+def _semente(*partes) -> List[int]:
+    return [zlib.crc32(str(p).encode()) for p in partes]
+
+
+class TickerSintetico:
+    """Subconjunto de yf.Ticker usado pelo scanner: history, options, option_chain"""
+
+    def __init__(self, gerador: 'GeradorChains', simbolo: str):
+        self.gerador = gerador
+        self.ticker = simbolo
+        self.ativo = simbolo.replace('.SA', '')
+        self.spot = gerador.spot(self.ativo)
+        self._vencimentos = vencimentos_mensais(gerador.hoje, gerador.n_vencimentos)
+
+    def history(self, period: str = '1d', **kwargs) -> pd.DataFrame:
+        dias = max(1, int(''.join(c for c in period if c.isdigit()) or 1))
+        rng = np.random.default_rng(_semente(self.gerador.semente, self.ativo, 'historico'))
+        acumulado = rng.normal(0, 0.018, dias).cumsum()
+        fechamentos = self.spot * np.exp(acumulado - acumulado[-1])  # termina no spot
+        indice = pd.bdate_range(end=self.gerador.hoje, periods=dias)
+        return pd.DataFrame({'Open': fechamentos, 'High': fechamentos * 1.01, 'Low': fechamentos * 0.99,
+                             'Close': fechamentos, 'Volume': 1_000_000}, index=indice)
+
+    @property
+    def options(self) -> tuple:
+        return tuple(v.isoformat() for v in self._vencimentos)
+
+    def option_chain(self, date: str = None) -> Options:
+        vencimento = datetime.strptime(date, '%Y-%m-%d').date() if date else self._vencimentos[0]
+        calls, puts = self.gerador.chain(self.ativo, self.spot, vencimento)
+        return Options(calls, puts, {'regularMarketPrice': self.spot})
+
+
+class GeradorChains:
+    """Fábrica de tickers sintéticos (use no lugar de yf.Ticker)"""
+
+    def __init__(self, semente: int = 42, n_vencimentos: int = 4, strikes_por_vencimento: int = 40,
+                 hoje: date = None, iv_base: float = 0.35):
+        """
+        Args:
+            n_vencimentos: vencimentos mensais por ativo
+            strikes_por_vencimento: strikes de call e de put em cada vencimento
+            hoje: data base do calendário (padrão: hoje)
+            iv_base: IV no dinheiro do primeiro vencimento (fração)
+        """
+        self.semente = semente
+        self.n_vencimentos = n_vencimentos
+        self.strikes_por_vencimento = strikes_por_vencimento
+        self.hoje = hoje or date.today()
+        self.iv_base = iv_base
+
+    def __call__(self, simbolo: str) -> TickerSintetico:
+        return TickerSintetico(self, simbolo)
+
+    def spot(self, ativo: str) -> float:
+        if ativo in SPOTS_REFERENCIA:
+            return SPOTS_REFERENCIA[ativo]
+        rng = np.random.default_rng(_semente(self.semente, ativo, 'spot'))
+        return float(np.round(np.exp(rng.uniform(np.log(5), np.log(150))), 2))
+
+    def _strikes(self, spot: float) -> np.ndarray:
+        """Grade em torno do spot com passo "de bolsa" (0.50, 1.00, 2.00...)"""
+        passo = 0.5 if spot < 30 else 1.0 if spot < 80 else 2.0
+        centro = np.round(spot / passo) * passo
+        metade = self.strikes_por_vencimento // 2
+        strikes = centro + passo * np.arange(-metade, self.strikes_por_vencimento - metade)
+        return strikes[strikes > 0]
+
+    def chain(self, ativo: str, spot: float, vencimento: date):
+        """(calls, puts) DataFrames com as colunas de yfinance.option_chain"""
+        rng = np.random.default_rng(_semente(self.semente, ativo, vencimento.isoformat()))
+        dias = max((vencimento - self.hoje).days, 1)
+        T = prazo_anos(dias)
+        strikes = self._strikes(spot)
+        k = np.log(strikes / spot)
+
+        # Smile: nível do ativo + estrutura a termo + skew de put + curvatura
+        nivel = self.iv_base * np.exp(_semente(ativo)[0] % 1000 / 1000 * 0.6 - 0.3)
+        atm = nivel * (1 + 0.08 * np.exp(-dias / 45))
+        skew = -0.25 - 0.15 * rng.random()
+        curvatura = 0.6 + 0.8 * rng.random()
+        iv_smile = np.clip(atm + skew * k + curvatura * k * k, 0.08, 1.5)
+
+        # Liquidez: concentrada no dinheiro e no vencimento curto
+        peso = np.exp(-(k / 0.06) ** 2 / 2) * np.exp(-dias / 60)
+
+        partes = []
+        for eh_call in (True, False):
+            iv = np.clip(iv_smile + rng.normal(0, 0.008, len(strikes)), 0.05, None)
+            teorico = preco(spot, strikes, T, iv, eh_call)
+            meio = np.maximum(np.round(teorico, 2), 0.01)
+
+            volume = np.floor(rng.lognormal(np.log(1 + 3000 * peso), 0.8)).astype(np.int64)
+            volume[rng.random(len(strikes)) < 0.25 * (1 - peso)] = 0
+            open_interest = np.floor(rng.lognormal(np.log(50 + 20000 * peso), 0.6)).astype(np.int64)
+
+            # Spread relativo maior em prêmio baixo e pouca liquidez; tick de R$ 0.01
+            relativo = 0.02 + 0.08 / np.sqrt(1 + meio * 10) + 0.10 * (1 - peso)
+            meio_spread = np.maximum(np.round(meio * relativo / 2, 2), 0.01)
+            bid = np.maximum(meio - meio_spread, 0.0)
+            bid[(meio < 0.03) & (rng.random(len(strikes)) < 0.5)] = 0.0
+            ask = meio + meio_spread
+            ultimo = np.round(np.clip(meio + rng.normal(0, 1, len(strikes)) * meio_spread, 0.01, None), 2)
+
+            codigos = [codigo_b3(ativo, eh_call, vencimento, s) for s in strikes]
+            partes.append(pd.DataFrame({
+                'contractSymbol': [f"{c}.SA" for c in codigos],
+                'lastTradeDate': pd.Timestamp(self.hoje),
+                'strike': strikes,
+                'lastPrice': ultimo,
+                'bid': np.round(bid, 2),
+                'ask': np.round(ask, 2),
+                'change': 0.0,
+                'percentChange': 0.0,
+                'volume': volume,
+                'openInterest': open_interest,
+                'impliedVolatility': iv,
+                'inTheMoney': (strikes < spot) if eh_call else (strikes > spot),
+                'contractSize': 'REGULAR',
+                'currency': 'BRL',
+            }))
+        return partes[0], partes[1]
+
+
+# Teste
+if __name__ == "__main__":
+    import time
+    from scanner_opcoes import ScannerOpcoesB3
+
+    gerador = GeradorChains(hoje=date(2026, 10, 19))
+    ticker = gerador('PETR4.SA')
+    calls = ticker.option_chain(ticker.options[1]).calls
+    print(f"Vencimentos: {ticker.options}")
+    print(calls[['contractSymbol', 'strike', 'bid', 'ask', 'volume', 'openInterest', 'impliedVolatility']]
+          .iloc[18:23].to_string(index=False))
+
+    for quantidade in (5, 50):
+        ativos = ativos_sinteticos(quantidade)
+        scanner = ScannerOpcoesB3(fonte_dados=GeradorChains())
+        inicio = time.perf_counter()
+        total = 0
+        for lote in scanner.escanear_lotes(ativos):
+            total += len(lote.setups)
+        segundos = time.perf_counter() - inicio
+        print(f"{len(ativos)} ativos: {total} setups em {segundos:.2f}s")
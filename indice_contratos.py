@@ -0,0 +1,388 @@
+"""
+Índice de Contratos - RCO Scanner
+==================================
+Código B3 da opção → ativo, tipo, vencimento, strike e linha no snapshot
+
+Os códigos seguem o padrão da B3: raiz de 4 letras do ativo + letra da
+série + número + sufixo opcional (PETRK400, VALEW350, PETRK400W2):
+- A a L: calls de janeiro a dezembro;
+- M a X: puts de janeiro a dezembro;
+- sufixo W1..W5: opção semanal (sexta-feira da semana N do mês).
+
+O número NÃO é o strike (a B3 numera as séries na listagem e ajusta o
+strike em proventos), por isso o strike vem do índice, montado sobre os
+snapshots gravados: para cada código, o ativo, o vencimento exato, o
+strike e a linha no snapshot mais recente que o contém. O índice fica em
+<snapshots>/indice_contratos.json e é atualizado de forma incremental
+(só snapshots novos são lidos).
+
+Com ele o monitoramento resolve qualquer código num acesso a dict e busca
+no Yahoo só os vencimentos das posições abertas (buscar_cotacoes).
+"""
+
+import os
+import re
+import json
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LETRAS_CALL = 'ABCDEFGHIJKL'
+LETRAS_PUT = 'MNOPQRSTUVWX'
+
+ARQUIVO_INDICE = 'indice_contratos.json'
+VERSAO_INDICE = 1
+
+_PADRAO_CODIGO = re.compile(r'^([A-Z0-9]{4})([A-X])(\d{1,4})([A-Z]\d?)?$')
+
+
+class Contrato(NamedTuple):
+    """Entrada do índice (data/linha apontam para o snapshot; None/-1 se veio do Yahoo)"""
+    codigo: str
+    ativo: str
+    tipo: str
+    vencimento: str
+    strike: float
+    data: Optional[str] = None
+    linha: int = -1
+
+
+# ============================================================================
+# CÓDIGOS B3
+# ============================================================================
+
+def terceira_sexta(ano: int, mes: int) -> date:
+    """Vencimento mensal de opções na B3"""
+    return sexta_da_semana(ano, mes, 3)
+
+
+def sexta_da_semana(ano: int, mes: int, semana: int) -> date:
+    """N-ésima sexta-feira do mês (vencimento das semanais W1..W5)"""
+    primeiro = date(ano, mes, 1)
+    primeira_sexta = primeiro + timedelta(days=(4 - primeiro.weekday()) % 7)
+    return primeira_sexta + timedelta(days=7 * (semana - 1))
+
+
+def codigo_b3(ativo: str, eh_call: bool, vencimento: date, strike: float) -> str:
+    """Código no padrão B3 com o strike × 10 como número (PETR4, call de março, 40.20 → PETRC402)"""
+    letra = (LETRAS_CALL if eh_call else LETRAS_PUT)[vencimento.month - 1]
+    return f"{ativo[:4]}{letra}{int(round(strike * 10))}"
+
+
+def decodificar(codigo: str) -> Optional[Dict]:
+    """
+    Lê raiz, tipo, mês e semana do código
+
+    Returns:
+        {'raiz', 'tipo', 'mes', 'numero', 'semana'} ou None se não for código de opção B3
+    """
+    encontrado = _PADRAO_CODIGO.match(str(codigo).upper().replace('.SA', '').strip())
+    if not encontrado:
+        return None
+
+    raiz, letra, numero, sufixo = encontrado.groups()
+    eh_call = letra in LETRAS_CALL
+    semana = None
+    if sufixo and sufixo[0] == 'W' and len(sufixo) == 2:
+        semana = int(sufixo[1])
+
+    return {
+        'raiz': raiz,
+        'tipo': 'CALL' if eh_call else 'PUT',
+        'mes': (LETRAS_CALL if eh_call else LETRAS_PUT).index(letra) + 1,
+        'numero': numero,
+        'semana': semana
+    }
+
+
+def vencimento_estimado(codigo: str, hoje: date = None) -> Optional[date]:
+    """
+    Próximo vencimento compatível com a letra (e semana) do código
+
+    Estimativa pelo calendário (terceira sexta ou sexta da semana N, sem
+    feriados); o índice tem a data exata quando o código já foi visto.
+    """
+    info = decodificar(codigo)
+    if info is None:
+        return None
+
+    hoje = hoje or date.today()
+    semana = info['semana'] or 3
+    for ano in (hoje.year, hoje.year + 1):
+        try:
+            vencimento = sexta_da_semana(ano, info['mes'], semana)
+        except ValueError:
+            continue
+        if vencimento >= hoje and vencimento.month == info['mes']:
+            return vencimento
+    return None
+
+
+# ============================================================================
+# ÍNDICE
+# ============================================================================
+
+class IndiceContratos:
+    """Código → Contrato sobre os snapshots, persistido em JSON"""
+
+    def __init__(self, armazem=None, arquivo: str = None):
+        """
+        Args:
+            armazem: snapshots.ArmazemSnapshots (padrão: diretório configurado)
+            arquivo: caminho do JSON (padrão: <snapshots>/indice_contratos.json)
+        """
+        if armazem is None:
+            from snapshots import ArmazemSnapshots
+            armazem = ArmazemSnapshots()
+        self.armazem = armazem
+        self.arquivo = arquivo or os.path.join(armazem.diretorio, ARQUIVO_INDICE)
+        self.contratos: Dict[str, Contrato] = {}
+        self.raizes: Dict[str, str] = {}       # PETR -> PETR4
+        self._indexado: Dict[str, str] = {}    # ativo -> data do último snapshot lido
+        self._modificado: Dict[str, float] = {}  # ativo -> mtime do último snapshot lido (regravado = relê)
+        self._colunas: Dict[str, tuple] = {}   # ativo -> (data, colunas) do último snapshot aberto
+        self.carregar()
+
+    def __len__(self) -> int:
+        return len(self.contratos)
+
+    def __contains__(self, codigo: str) -> bool:
+        return self._normalizar(codigo) in self.contratos
+
+    @staticmethod
+    def _normalizar(codigo: str) -> str:
+        return str(codigo).upper().replace('.SA', '').strip()
+
+    # ========================================================================
+    # PERSISTÊNCIA
+    # ========================================================================
+
+    def carregar(self):
+        """Lê o JSON do índice (se existir)"""
+        try:
+            with open(self.arquivo, encoding='utf-8') as f:
+                dados = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"⚠️ Índice de contratos ilegível, recriando: {e}")
+            return
+
+        if dados.get('versao') != VERSAO_INDICE:
+            return
+        self._indexado = dados.get('indexado', {})
+        self._modificado = dados.get('modificado', {})
+        self.contratos = {codigo: Contrato(codigo, *campos) for codigo, campos in dados.get('contratos', {}).items()}
+        self.raizes = {c.ativo[:4]: c.ativo for c in self.contratos.values()}
+
+    def salvar(self) -> bool:
+        """Grava o índice (só entradas com linha de snapshot)"""
+        dados = {
+            'versao': VERSAO_INDICE,
+            'indexado': self._indexado,
+            'modificado': self._modificado,
+            'contratos': {
+                codigo: list(c[1:]) for codigo, c in self.contratos.items() if c.data is not None
+            }
+        }
+        try:
+            os.makedirs(os.path.dirname(self.arquivo) or '.', exist_ok=True)
+            temporario = self.arquivo + '.tmp'
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(dados, f)
+            os.replace(temporario, self.arquivo)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro gravando índice de contratos: {e}")
+            return False
+
+    # ========================================================================
+    # ATUALIZAÇÃO
+    # ========================================================================
+
+    def atualizar(self, ativos: Iterable[str] = None, hoje: date = None) -> int:
+        """
+        Lê os snapshots ainda não indexados e descarta contratos vencidos
+
+        O snapshot do dia é regravado a cada busca do scanner: o da última data
+        indexada é relido quando o arquivo muda (códigos novos, linhas trocadas).
+
+        Returns:
+            Quantidade de snapshots lidos
+        """
+        hoje = (hoje or date.today()).isoformat()
+        lidos = 0
+        for ativo in (ativos if ativos is not None else self.armazem.ativos()):
+            ultima = self._indexado.get(ativo)
+            novas = [d for d in self.armazem.datas(ativo) if ultima is None or d.isoformat() >= ultima]
+            for data in novas:
+                modificado = self.armazem.modificado_em(ativo, data)
+                if data.isoformat() == ultima and modificado == self._modificado.get(ativo):
+                    continue
+                colunas = self.armazem.carregar_colunas(ativo, data)
+                if colunas is not None:
+                    self.registrar(ativo, data, colunas)
+                    self._modificado[ativo] = modificado
+                    lidos += 1
+
+        vencidos = [codigo for codigo, c in self.contratos.items() if c.vencimento < hoje]
+        for codigo in vencidos:
+            del self.contratos[codigo]
+
+        if lidos or vencidos:
+            self.salvar()
+            logger.info(f"✅ Índice de contratos: {lidos} snapshots lidos, {len(self.contratos)} códigos")
+        return lidos
+
+    def registrar(self, ativo: str, data: date, colunas: Dict):
+        """Aponta cada código do snapshot cru para a sua linha"""
+        data = data.isoformat()
+        if data == self._indexado.get(ativo):
+            # Regravação do mesmo dia: linhas antigas desse arquivo deixam de valer
+            for codigo in [c.codigo for c in self.contratos.values() if c.ativo == ativo and c.data == data]:
+                del self.contratos[codigo]
+        codigos = colunas['codigo'].tolist()
+        tipos = colunas['tipo'].tolist()
+        vencimentos = colunas['vencimento'].tolist()
+        strikes = colunas['strike'].tolist()
+        for linha, codigo in enumerate(codigos):
+            if codigo:
+                self.contratos[codigo] = Contrato(codigo, ativo, tipos[linha], vencimentos[linha],
+                                                  strikes[linha], data, linha)
+        self.raizes[ativo[:4]] = ativo
+        if data >= self._indexado.get(ativo, ''):
+            self._indexado[ativo] = data
+            self._colunas.pop(ativo, None)
+
+    def registrar_chain(self, opcoes: Dict):
+        """Códigos de uma chain buscada ao vivo (sem linha de snapshot; não persiste)"""
+        ativo = opcoes['ativo']
+        for linha in opcoes.get('calls', []) + opcoes.get('puts', []):
+            codigo = linha['codigo']
+            if codigo not in self.contratos:
+                self.contratos[codigo] = Contrato(codigo, ativo, linha['tipo'], linha['vencimento'],
+                                                  float(linha['strike']))
+        self.raizes[ativo[:4]] = ativo
+
+    # ========================================================================
+    # CONSULTA
+    # ========================================================================
+
+    def resolver(self, codigo: str) -> Optional[Contrato]:
+        """Contrato do código (None se nunca visto)"""
+        return self.contratos.get(self._normalizar(codigo))
+
+    def cotacao(self, codigo: str) -> Optional[Dict]:
+        """Linha do código no snapshot mais recente que o contém (bid, ask, iv, ...)"""
+        from snapshots import COLUNAS_TEXTO, COLUNAS_NUMERICAS
+
+        contrato = self.resolver(codigo)
+        if contrato is None or contrato.data is None:
+            return None
+
+        em_memoria = self._colunas.get(contrato.ativo)
+        if em_memoria is None or em_memoria[0] != contrato.data:
+            colunas = self.armazem.carregar_colunas(contrato.ativo, contrato.data)
+            if colunas is None:
+                return None
+            em_memoria = (contrato.data, colunas)
+            self._colunas[contrato.ativo] = em_memoria
+
+        colunas = em_memoria[1]
+        if contrato.linha >= len(colunas['codigo']) or colunas['codigo'][contrato.linha] != contrato.codigo:
+            return None  # snapshot regravado depois da indexação
+        cotacao = {coluna: colunas[coluna][contrato.linha].item() for coluna in COLUNAS_TEXTO + COLUNAS_NUMERICAS}
+        cotacao.update(ativo=contrato.ativo, data=contrato.data, preco_atual=colunas['preco_atual'])
+        return cotacao
+
+    def ativo_do_codigo(self, codigo: str) -> Optional[str]:
+        """Ativo pelo índice ou pela raiz do código (PETRK400 → PETR4)"""
+        contrato = self.resolver(codigo)
+        if contrato is not None:
+            return contrato.ativo
+        info = decodificar(codigo)
+        return self.raizes.get(info['raiz']) if info else None
+
+    def vencimentos_necessarios(self, codigos: Iterable[str], ativos: Dict[str, str] = None,
+                                hoje: date = None) -> Dict[str, List[str]]:
+        """
+        {ativo: [vencimentos]} que cobrem os códigos
+
+        Args:
+            ativos: ativo conhecido por código (ex: da posição), para códigos fora do índice
+        """
+        necessarios: Dict[str, set] = {}
+        for codigo in codigos:
+            if not codigo:
+                continue
+            codigo = self._normalizar(codigo)
+            contrato = self.contratos.get(codigo)
+            if contrato is not None:
+                ativo, vencimento = contrato.ativo, contrato.vencimento
+            else:
+                ativo = (ativos or {}).get(codigo) or self.ativo_do_codigo(codigo)
+                estimado = vencimento_estimado(codigo, hoje)
+                if ativo is None or estimado is None:
+                    logger.warning(f"⚠️ Código {codigo} não resolvido")
+                    continue
+                vencimento = estimado.isoformat()
+            necessarios.setdefault(ativo, set()).add(vencimento)
+        return {ativo: sorted(vencimentos) for ativo, vencimentos in necessarios.items()}
+
+    def buscar_cotacoes(self, scanner, codigos: Iterable[str], ativos: Dict[str, str] = None) -> Dict[str, Dict]:
+        """
+        Cotações ao vivo só dos vencimentos dos códigos pedidos
+
+        Args:
+            scanner: ScannerOpcoesB3 (usa buscar_vencimentos/fonte_dados)
+            ativos: ativo por código, para códigos fora do índice
+
+        Returns:
+            {codigo: linha no formato de buscar_opcoes_disponiveis (+ 'preco_ativo')}
+        """
+        codigos = {self._normalizar(c) for c in codigos if c}
+        cotacoes = {}
+        for ativo, vencimentos in self.vencimentos_necessarios(codigos, ativos).items():
+            opcoes = scanner.buscar_vencimentos(ativo, vencimentos)
+            if 'erro' in opcoes:
+                continue
+            self.registrar_chain(opcoes)
+            for linha in opcoes['calls'] + opcoes['puts']:
+                if linha['codigo'] in codigos:
+                    cotacoes[linha['codigo']] = {**linha, 'preco_ativo': opcoes['preco_atual']}
+        return cotacoes
+
+
+# Teste
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from gerador_sintetico import GeradorChains
+    from scanner_opcoes import ScannerOpcoesB3
+    from snapshots import ArmazemSnapshots
+
+    for codigo in ('PETRK400', 'VALEW350', 'PETRC402W2', 'XPTO'):
+        print(f"{codigo}: {decodificar(codigo)} → {vencimento_estimado(codigo, date(2026, 10, 19))}")
+
+    armazem = ArmazemSnapshots(tempfile.mkdtemp())
+    scanner = ScannerOpcoesB3(fonte_dados=GeradorChains(), armazem_snapshots=armazem)
+    for ativo in ('PETR4', 'VALE3'):
+        scanner.buscar_opcoes_disponiveis(ativo)
+
+    indice = IndiceContratos(armazem)
+    indice.atualizar()
+    codigo = next(iter(indice.contratos))
+    print(f"{len(indice)} códigos | {indice.resolver(codigo)}")
+    print(f"Cotação do snapshot: {indice.cotacao(codigo)}")
+
+    reaberto = IndiceContratos(armazem)
+    inicio = time.perf_counter()
+    for c in reaberto.contratos:
+        reaberto.resolver(c)
+    print(f"Reaberto: {len(reaberto)} códigos resolvidos em {(time.perf_counter() - inicio) * 1000:.2f}ms")
+
+    cotacoes = indice.buscar_cotacoes(scanner, [codigo])
+    print(f"Ao vivo: {indice.vencimentos_necessarios([codigo])} → bid {cotacoes[codigo]['bid']}")
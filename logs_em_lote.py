@@ -0,0 +1,224 @@
+"""
+Logs em Lote - RCO Scanner
+===========================
+Handler do `logging` que acumula registros e grava na tabela `logs`
+em inserts agrupados (por tamanho ou intervalo), sem bloquear o scan.
+"""
+
+import atexit
+import json
+import logging
+import os
+import random
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class HandlerLogsEmLote(logging.Handler):
+    """
+    Handler bufferizado para a tabela `logs`
+
+    - Flush quando o buffer atinge `tamanho_lote` ou a cada `intervalo_flush` segundos
+    - Sob pressão (buffer cheio) registros abaixo de WARNING são amostrados,
+      WARNING+ sempre entram (descartando o registro mais antigo)
+    - Se o insert falhar, o lote vai para um arquivo local rotativo
+    - Flush garantido no encerramento do processo (atexit)
+    """
+
+    def __init__(self, db, tamanho_lote: int = 50, intervalo_flush: float = 5.0,
+                 capacidade_max: int = 5000, taxa_amostragem: float = 0.1,
+                 arquivo_fallback: str = 'logs/rco_scanner.log',
+                 max_bytes_fallback: int = 5 * 1024 * 1024, backups_fallback: int = 3,
+                 level: int = logging.NOTSET):
+        super().__init__(level)
+        self.db = db
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_flush = intervalo_flush
+        self.capacidade_max = capacidade_max
+        self.taxa_amostragem = taxa_amostragem
+        self.arquivo_fallback = arquivo_fallback
+        self.max_bytes_fallback = max_bytes_fallback
+        self.backups_fallback = backups_fallback
+
+        self._buffer: deque = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+        self._fallback: Optional[RotatingFileHandler] = None
+        self._encerrado = False
+
+        # Métricas
+        self.enviados = 0
+        self.descartados = 0
+        self.em_fallback = 0
+
+        self._thread = threading.Thread(target=self._loop, name='logs-em-lote', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ========================================================================
+    # ENTRADA
+    # ========================================================================
+
+    def emit(self, record: logging.LogRecord):
+        # Logs gerados pelo próprio envio (httpx, supabase...) não voltam ao buffer
+        if getattr(self._local, 'enviando', False) or threading.current_thread() is self._thread:
+            return
+
+        try:
+            registro = {
+                'created_at': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+                'nivel': record.levelname,
+                'categoria': getattr(record, 'categoria', record.name),
+                'mensagem': self.format(record),
+                'dados': getattr(record, 'dados', None)
+            }
+        except Exception:
+            self.handleError(record)
+            return
+
+        self.enfileirar(registro, record.levelno)
+
+    def enfileirar(self, registro: Dict, nivel: int = logging.INFO) -> bool:
+        """Coloca um registro no buffer. Retorna False se foi descartado"""
+        with self._cond:
+            if self._encerrado:
+                self._gravar_fallback([registro])
+                return False
+
+            if len(self._buffer) >= self.capacidade_max:
+                if nivel < logging.WARNING and random.random() >= self.taxa_amostragem:
+                    self.descartados += 1
+                    return False
+                self._buffer.popleft()
+                self.descartados += 1
+
+            self._buffer.append(registro)
+            if len(self._buffer) >= self.tamanho_lote:
+                self._cond.notify()
+        return True
+
+    # ========================================================================
+    # ENVIO
+    # ========================================================================
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if not self._encerrado and len(self._buffer) < self.tamanho_lote:
+                    self._cond.wait(self.intervalo_flush)
+                if self._encerrado:
+                    return
+            self._drenar()
+
+    def _drenar(self):
+        """Envia tudo o que está no buffer, em lotes de `tamanho_lote`"""
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    if not self._buffer:
+                        return
+                    n = min(len(self._buffer), self.tamanho_lote)
+                    lote = [self._buffer.popleft() for _ in range(n)]
+                self._enviar_lote(lote)
+
+    def _enviar_lote(self, lote: List[Dict]):
+        self._local.enviando = True
+        try:
+            ok = self.db.inserir_logs(lote)
+        except Exception:
+            ok = False
+        finally:
+            self._local.enviando = False
+
+        if ok:
+            self.enviados += len(lote)
+        else:
+            self._gravar_fallback(lote)
+
+    def _gravar_fallback(self, lote: List[Dict]):
+        """Grava o lote em arquivo local rotativo (JSON por linha)"""
+        try:
+            if self._fallback is None:
+                pasta = os.path.dirname(self.arquivo_fallback)
+                if pasta:
+                    os.makedirs(pasta, exist_ok=True)
+                self._fallback = RotatingFileHandler(
+                    self.arquivo_fallback,
+                    maxBytes=self.max_bytes_fallback,
+                    backupCount=self.backups_fallback,
+                    encoding='utf-8'
+                )
+            for registro in lote:
+                self._fallback.emit(logging.makeLogRecord({
+                    'msg': json.dumps(registro, ensure_ascii=False, default=str)
+                }))
+            self.em_fallback += len(lote)
+        except Exception:
+            self.descartados += len(lote)
+            # Caminho padrão do logging para falha de handler (stderr, respeita logging.raiseExceptions)
+            self.handleError(logging.makeLogRecord({'msg': f"Erro ao gravar {len(lote)} logs no arquivo local"}))
+
+    # ========================================================================
+    # CICLO DE VIDA
+    # ========================================================================
+
+    def flush(self):
+        """Envia imediatamente tudo o que está pendente (bloqueante)"""
+        self._drenar()
+
+    def close(self):
+        """Para a thread de envio e faz o flush final"""
+        with self._cond:
+            if self._encerrado:
+                return
+            self._encerrado = True
+            self._cond.notify_all()
+
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout=self.intervalo_flush + 5)
+        self._drenar()
+
+        if self._fallback is not None:
+            self._fallback.close()
+        super().close()
+
+    def estatisticas(self) -> Dict:
+        """Contadores do handler (enviados, descartados, fallback, pendentes)"""
+        with self._cond:
+            pendentes = len(self._buffer)
+        return {
+            'enviados': self.enviados,
+            'descartados': self.descartados,
+            'em_fallback': self.em_fallback,
+            'pendentes': pendentes
+        }
+
+
+# Teste
+if __name__ == "__main__":
+    class _BancoFake:
+        def __init__(self):
+            self.lotes = []
+
+        def inserir_logs(self, registros):
+            self.lotes.append(registros)
+            return True
+
+    banco = _BancoFake()
+    handler = HandlerLogsEmLote(banco, tamanho_lote=10, intervalo_flush=0.5)
+    log_teste = logging.getLogger('teste_lote')
+    log_teste.addHandler(handler)
+
+    for i in range(25):
+        log_teste.info(f"registro {i}", extra={'categoria': 'scanner', 'dados': {'i': i}})
+
+    handler.close()
+    print(f"Lotes enviados: {[len(l) for l in banco.lotes]}")
+    print(f"Estatísticas: {handler.estatisticas()}")
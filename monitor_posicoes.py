@@ -0,0 +1,313 @@
+"""
+Monitor de Posições - RCO Scanner
+==================================
+Cotação das posições abertas com frequência adaptativa
+
+Só os contratos de `posicoes_abertas` são consultados, e cada posição tem
+o seu intervalo:
+- perto do alvo de lucro ou do stop (limites do MotorRegras), ou perto do
+  vencimento → `intervalo_min`;
+- longe de tudo e com prazo folgado → até `intervalo_max` (o mesmo do
+  scan completo);
+- sem marcação ainda → imediatamente.
+
+Cada ciclo agrupa as posições vencidas por ativo e busca só os vencimentos
+delas (indice_contratos), gastando do orçamento global de requisições da
+camada de busca (FonteResiliente.orcamento, o mesmo BaldeTokens que o scan
+usa): 1 para o preço do ativo + 1 por vencimento, reservados antes da
+busca. Sem saldo, o resto fica para o próximo ciclo, na ordem de urgência.
+Posições no mesmo ativo/vencimento aproveitam a mesma busca.
+
+Depois de marcar a mercado (preco_atual_1/2, resultado_atual,
+lucro_percentual via db.atualizar_posicao) roda MotorRegras.processar.
+As últimas cotações ficam em memória (`mercado`) para o risco agregado
+do dashboard, que assim não busca chains na hora.
+"""
+
+import threading
+import time
+import logging
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+from despachante_telegram import BaldeTokens
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INTERVALO_MIN = 60.0          # segundos (posição "quente")
+INTERVALO_MAX = 30 * 60.0     # segundos (posição calma = cadência do scan)
+REQUISICOES_POR_MINUTO = 20   # orçamento próprio quando a fonte não tem um (ex.: chains sintéticas)
+DISTANCIA_CALMA = 30.0        # pontos percentuais até o alvo/stop a partir dos quais a distância não acelera
+PRAZO_CALMO = 21              # dias até o vencimento a partir dos quais o prazo não acelera
+
+
+class MonitorPosicoes:
+    """Marca as posições abertas a mercado, cada uma no seu ritmo"""
+
+    def __init__(self, db, scanner, motor=None, indice=None,
+                 requisicoes_por_minuto: float = REQUISICOES_POR_MINUTO,
+                 intervalo_min: float = INTERVALO_MIN, intervalo_max: float = INTERVALO_MAX,
+                 hoje: date = None):
+        """
+        Args:
+            db: backend com listar_posicoes_ativas/atualizar_posicao
+            scanner: ScannerOpcoesB3 (busca via buscar_vencimentos)
+            motor: regras_alerta.MotorRegras (limites + envio dos alertas)
+            indice: indice_contratos.IndiceContratos (padrão: sobre os snapshots do scanner)
+            requisicoes_por_minuto: orçamento próprio se scanner.fonte_dados não tiver `orcamento`
+            hoje: data base fixa (testes)
+        """
+        if indice is None:
+            from indice_contratos import IndiceContratos
+            indice = IndiceContratos(scanner.armazem_snapshots)
+        self.db = db
+        self.scanner = scanner
+        self.motor = motor
+        self.indice = indice
+        self.intervalo_min = intervalo_min
+        self.intervalo_max = intervalo_max
+        self._hoje = hoje
+        fonte = scanner.fonte_dados
+        if hasattr(fonte, 'reservar'):
+            # Orçamento da FonteResiliente: a reserva paga as chamadas da busca (retentativas à parte)
+            self.orcamento = fonte.orcamento
+            self._reservar = fonte.reservar
+        else:
+            self.orcamento = BaldeTokens(requisicoes_por_minuto / 60.0, capacidade=max(requisicoes_por_minuto, 1.0))
+            self._reservar = self.orcamento.tentar_consumir
+        self._proxima: Dict[str, float] = {}       # id -> instante (monotonic) da próxima cotação
+        self.ultima_marcacao: Dict[str, datetime] = {}
+        self.cotacoes: Dict[str, Dict[str, Dict]] = {}  # ativo -> código -> última cotação
+        self.metricas = {'ciclos': 0, 'requisicoes': 0, 'marcadas': 0, 'adiadas': 0}
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ========================================================================
+    # RITMO
+    # ========================================================================
+
+    def _dias_restantes(self, posicao: Dict) -> int:
+        hoje = self._hoje or date.today()
+        return (date.fromisoformat(str(posicao['vencimento'])[:10]) - hoje).days
+
+    def intervalo(self, posicao: Dict) -> float:
+        """Segundos até a próxima cotação da posição"""
+        lucro = posicao.get('lucro_percentual')
+        if lucro is None:
+            return 0.0
+
+        distancia = DISTANCIA_CALMA
+        if self.motor is not None:
+            for tipo in ('LUCRO_60', 'STOP_LOSS'):
+                limite = self.motor.limite(posicao, tipo)
+                if limite is not None:
+                    distancia = min(distancia, abs(lucro - limite))
+        fator_distancia = distancia / DISTANCIA_CALMA
+        fator_prazo = min(max(self._dias_restantes(posicao), 0) / PRAZO_CALMO, 1.0)
+
+        return self.intervalo_min + (self.intervalo_max - self.intervalo_min) * fator_distancia * fator_prazo
+
+    def agendar(self, posicao_id: str = None):
+        """Força a cotação na próxima rodada (de uma posição ou de todas)"""
+        if posicao_id is None:
+            self._proxima.clear()
+        else:
+            self._proxima.pop(posicao_id, None)
+        self._acordar.set()
+
+    # ========================================================================
+    # MARCAÇÃO A MERCADO
+    # ========================================================================
+
+    @staticmethod
+    def _preco_saida(cotacao: Optional[Dict], direcao: str) -> Optional[float]:
+        """Preço para zerar a perna: recompra no ask (vendida) ou venda no bid (comprada)"""
+        if not cotacao:
+            return None
+        preco = cotacao.get('ask') if direcao == 'VENDA' else cotacao.get('bid')
+        return float(preco) if preco and preco > 0 else (float(cotacao.get('ultimo_preco') or 0) or None)
+
+    def marcar(self, posicao: Dict, cotacoes: Dict[str, Dict]) -> Optional[Dict]:
+        """
+        Campos atualizados da posição a partir das cotações
+
+        Returns:
+            Dict para db.atualizar_posicao ou None se faltar cotação de alguma perna
+        """
+        dados = {}
+        custo_saida = 0.0
+        for n in (1, 2):
+            codigo = posicao.get(f'codigo_opcao_{n}')
+            if not codigo:
+                continue
+            direcao = posicao.get(f'direcao_{n}') or 'VENDA'
+            preco = self._preco_saida(cotacoes.get(codigo), direcao)
+            if preco is None:
+                return None
+            quantidade = posicao.get(f'quantidade_{n}') or 100
+            custo_saida += preco * quantidade * (1 if direcao == 'VENDA' else -1)
+            dados[f'preco_atual_{n}'] = round(preco, 2)
+
+        entrada = posicao.get('resultado_entrada') or 0
+        dados['resultado_atual'] = round(entrada - custo_saida, 2)
+        dados['lucro_percentual'] = round(dados['resultado_atual'] / abs(entrada) * 100, 2) if entrada else 0.0
+
+        cotacao_1 = cotacoes.get(posicao['codigo_opcao_1']) or {}
+        if cotacao_1.get('delta') is not None:
+            dados['delta_atual'] = round(float(cotacao_1['delta']), 2)
+        abertura = posicao.get('data_entrada') or posicao.get('created_at')
+        if abertura:
+            dados['dias_aberta'] = ((self._hoje or date.today()) - date.fromisoformat(str(abertura)[:10])).days
+        return dados
+
+    # ========================================================================
+    # CICLO
+    # ========================================================================
+
+    def ciclo(self) -> Dict:
+        """
+        Cota as posições cujo intervalo venceu, dentro do orçamento
+
+        Returns:
+            {'marcadas', 'adiadas', 'requisicoes', 'alertas'}
+        """
+        agora = time.monotonic()
+        posicoes = self.db.listar_posicoes_ativas()
+        ativas = {p['id'] for p in posicoes}
+        for posicao_id in list(self._proxima):
+            if posicao_id not in ativas:
+                del self._proxima[posicao_id]
+
+        vencidas = sorted(
+            (p for p in posicoes if self._proxima.get(p['id'], 0.0) <= agora),
+            key=lambda p: self._proxima.get(p['id'], 0.0)
+        )
+        resumo = {'marcadas': 0, 'adiadas': 0, 'requisicoes': 0, 'alertas': 0}
+        if not vencidas:
+            return resumo
+
+        # Por ativo, na ordem da posição mais atrasada; junta as outras posições do ativo
+        por_ativo: Dict[str, List[Dict]] = {}
+        for posicao in vencidas:
+            por_ativo.setdefault(posicao['ativo'], []).append(posicao)
+
+        self.indice.atualizar(por_ativo)  # snapshots gravados pelo scan desde o último ciclo
+        marcadas = []
+        for ativo, grupo in por_ativo.items():
+            codigos = {p[f'codigo_opcao_{n}']: ativo for p in grupo for n in (1, 2) if p.get(f'codigo_opcao_{n}')}
+            vencimentos = self.indice.vencimentos_necessarios(codigos, codigos).get(ativo, [])
+            custo = 1 + len(vencimentos)
+            if self._reservar(custo) > 0:
+                resumo['adiadas'] += len(grupo)
+                continue
+
+            resumo['requisicoes'] += custo
+            cotacoes = self.indice.buscar_cotacoes(self.scanner, codigos, codigos)
+            self.cotacoes[ativo] = {**self.cotacoes.get(ativo, {}), **cotacoes}
+            for posicao in grupo:
+                dados = self.marcar(posicao, cotacoes)
+                if dados is None:
+                    logger.warning(f"⚠️ Sem cotação para {posicao['codigo_opcao_1']} ({ativo})")
+                    self._proxima[posicao['id']] = agora + self.intervalo_min
+                    continue
+                if self.db.atualizar_posicao(posicao['id'], dados):
+                    posicao.update(dados)
+                    marcadas.append(posicao)
+                    self.ultima_marcacao[posicao['id']] = datetime.now()
+                self._proxima[posicao['id']] = agora + self.intervalo(posicao)
+
+        if marcadas and self.motor is not None:
+            resumo['alertas'] = len(self.motor.processar(marcadas))
+
+        resumo['marcadas'] = len(marcadas)
+        self.metricas['ciclos'] += 1
+        for chave in ('requisicoes', 'marcadas', 'adiadas'):
+            self.metricas[chave] += resumo[chave]
+        if marcadas:
+            logger.info(f"✅ Monitor: {len(marcadas)} posições marcadas, {resumo['requisicoes']} requisições"
+                        + (f", {resumo['adiadas']} adiadas" if resumo['adiadas'] else ""))
+        return resumo
+
+    def mercado(self, ativo: str, codigos: Iterable[str]) -> Optional[Dict]:
+        """
+        spot e IVs dos códigos (formato de risco_portfolio.mercado_da_chain), sem rede
+
+        Última cotação do monitor; antes dela, a linha do snapshot mais
+        recente (IndiceContratos.cotacao).
+        """
+        from risco_portfolio import mercado_das_cotacoes
+
+        vivas = self.cotacoes.get(ativo, {})
+        cotacoes = {}
+        for codigo in codigos:
+            cotacao = vivas.get(codigo) or self.indice.cotacao(codigo)
+            if cotacao:
+                cotacoes[codigo] = cotacao
+        return mercado_das_cotacoes(cotacoes)
+
+    def espera(self) -> float:
+        """Segundos até a próxima posição vencer (limitado a intervalo_min)"""
+        if not self._proxima:
+            return self.intervalo_min
+        return min(max(min(self._proxima.values()) - time.monotonic(), 1.0), self.intervalo_min)
+
+    # ========================================================================
+    # SEGUNDO PLANO
+    # ========================================================================
+
+    def iniciar(self) -> 'MonitorPosicoes':
+        """Thread em segundo plano que roda um ciclo sempre que alguma posição vence"""
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name='monitor_posicoes', daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, timeout: float = 5.0):
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                self.ciclo()
+            except Exception as e:
+                logger.error(f"❌ Erro no monitor de posições: {e}")
+            self._acordar.wait(self.espera())
+            self._acordar.clear()
+
+
+# Teste
+if __name__ == "__main__":
+    import tempfile
+    from armazenamento_local import SQLiteRCO
+    from busca_resiliente import FonteResiliente
+    from gerador_sintetico import GeradorChains
+    from regras_alerta import MotorRegras
+    from scanner_opcoes import ScannerOpcoesB3
+    from snapshots import ArmazemSnapshots
+
+    hoje = date.today()
+    fonte = FonteResiliente(GeradorChains(hoje=hoje), requisicoes_por_minuto=18)
+    scanner = ScannerOpcoesB3(fonte_dados=fonte, armazem_snapshots=ArmazemSnapshots(tempfile.mkdtemp()))
+    db = SQLiteRCO(':memory:')
+
+    for ativo in ('PETR4', 'VALE3', 'BBAS3'):
+        for setup in scanner.identificar_venda_put(ativo)[:2]:
+            salva = db.salvar_oportunidade(setup)
+            # Crédito de entrada maior que o prêmio atual: posição já no lucro
+            db.abrir_posicao(salva['id'], {**setup, 'resultado_liquido': setup['resultado_liquido'] * 1.5})
+
+    monitor = MonitorPosicoes(db, scanner, MotorRegras(hoje=hoje))
+    print(f"Primeiro ciclo: {monitor.ciclo()}")
+    print(f"Segundo ciclo (orçamento recomposto em parte): {monitor.ciclo()}")
+    time.sleep(1)
+    for posicao in db.listar_posicoes_ativas():
+        print(f"{posicao['codigo_opcao_1']}: lucro {posicao['lucro_percentual']}% | "
+              f"próxima em {monitor.intervalo(posicao):.0f}s")
+    print(f"Mercado PETR4 (sem rede): {monitor.mercado('PETR4', monitor.cotacoes.get('PETR4', {}))}")
+    print(f"Métricas: {monitor.metricas} | chamadas no Yahoo (scan + monitor): {fonte.metricas()['chamadas']}")
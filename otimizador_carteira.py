@@ -0,0 +1,154 @@
+"""
+Otimizador de Carteira - RCO Scanner
+=====================================
+Escolhe quais setups montar dentro do capital disponível
+
+Cada setup consome margem (venda de put e venda coberta: strike × lote;
+trava: risco máximo), a mesma base para setups e posições abertas, e rende
+em média o resultado esperado no vencimento (probabilidade.py: crédito
+menos o payoff esperado, na medida física). Setups com resultado esperado
+≤ 0 não são descartados, só ficam no fim da fila. A
+seleção é uma mochila gulosa por densidade (retorno esperado
+por real de margem) com limites por ativo e por estratégia, comparada
+com a mesma gulosa partindo do melhor item único (o limitante clássico).
+Milhares de candidatos levam poucos milissegundos.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from probabilidade import resultado_esperado, resultado_esperado_lote
+
+QUANTIDADE_PADRAO = 100
+
+
+def margem_setup(setup: Dict) -> float:
+    """
+    Capital comprometido ao montar o setup (R$)
+
+    Venda de put e venda coberta: strike × lote (a posição aberta não guarda
+    o preço do ativo, então o strike é a base comum); trava: risco máximo.
+    """
+    quantidade = setup.get('quantidade_1') or QUANTIDADE_PADRAO
+    if setup['estrategia'] in ('VENDA_PUT', 'VENDA_COBERTA'):
+        return (setup.get('strike_1') or 0) * quantidade
+    return setup.get('risco_maximo') or 0.0
+
+
+def margem_posicao(posicao: Dict) -> float:
+    """Capital comprometido por uma posição aberta (R$), na mesma base de margem_setup"""
+    return margem_setup(posicao)
+
+
+def retorno_esperado(setup: Dict) -> float:
+    """Resultado médio no vencimento (R$): crédito × p − perda média × (1 − p)"""
+    return resultado_esperado(setup)
+
+
+def selecionar_carteira(candidatos: List[Dict], orcamento: float, max_por_ativo: int = 1,
+                        max_por_estrategia: Optional[int] = None, max_itens: Optional[int] = None) -> List[Dict]:
+    """
+    Subconjunto de `candidatos` com maior retorno esperado dentro do orçamento
+
+    Args:
+        orcamento: margem disponível (R$)
+        max_por_ativo: setups por ativo (evita três variações de PETR4)
+        max_por_estrategia: setups por estratégia (None = sem limite)
+        max_itens: total de setups (None = sem limite)
+
+    Returns:
+        Setups escolhidos, em ordem de retorno esperado
+    """
+    if not candidatos or orcamento <= 0:
+        return []
+
+    margem = np.array([margem_setup(s) for s in candidatos], dtype=np.float64)
+    valor = resultado_esperado_lote(candidatos)
+    validos = (margem > 0) & (margem <= orcamento)
+    if not validos.any():
+        return []
+
+    densidade = np.where(validos, valor / np.where(margem > 0, margem, 1), -np.inf)
+    ordem = np.argsort(-densidade, kind='stable')
+    ordem = ordem[validos[ordem]]
+
+    ativos = [s['ativo'] for s in candidatos]
+    estrategias = [s['estrategia'] for s in candidatos]
+
+    def gulosa(primeiro: Optional[int] = None) -> List[int]:
+        por_ativo: Dict[str, int] = {}
+        por_estrategia: Dict[str, int] = {}
+        escolhidos = []
+        restante = orcamento
+        for i in ([primeiro] if primeiro is not None else []) + [i for i in ordem if i != primeiro]:
+            if max_itens is not None and len(escolhidos) >= max_itens:
+                break
+            if margem[i] > restante:
+                continue
+            if por_ativo.get(ativos[i], 0) >= max_por_ativo:
+                continue
+            if max_por_estrategia is not None and por_estrategia.get(estrategias[i], 0) >= max_por_estrategia:
+                continue
+            escolhidos.append(i)
+            restante -= margem[i]
+            por_ativo[ativos[i]] = por_ativo.get(ativos[i], 0) + 1
+            por_estrategia[estrategias[i]] = por_estrategia.get(estrategias[i], 0) + 1
+        return escolhidos
+
+    # Limitante: a gulosa pode perder para um único item grande; então também
+    # parte dele e completa com a gulosa. Só a parte positiva compara: itens
+    # de resultado ≤ 0 entram na sobra de capital, mas não decidem a escolha
+    escolhidos = gulosa()
+    melhor_unico = int(np.argmax(np.where(validos, valor, -np.inf)))
+    if melhor_unico not in escolhidos:
+        alternativa = gulosa(melhor_unico)
+        if np.maximum(valor[alternativa], 0).sum() > np.maximum(valor[escolhidos], 0).sum():
+            escolhidos = alternativa
+
+    escolhidos.sort(key=lambda i: -valor[i])
+    return [candidatos[i] for i in escolhidos]
+
+
+def resumo_carteira(carteira: List[Dict]) -> Dict:
+    """Margem total, crédito e retorno esperado da seleção"""
+    return {
+        'itens': len(carteira),
+        'margem': round(sum(margem_setup(s) for s in carteira), 2),
+        'credito': round(sum(s.get('resultado_liquido') or 0 for s in carteira), 2),
+        'retorno_esperado': round(float(resultado_esperado_lote(carteira).sum()), 2) if carteira else 0.0,
+    }
+
+
+# Teste
+if __name__ == "__main__":
+    import random
+    import time
+    from black_scholes import preco, prazo_anos
+
+    rnd = random.Random(3)
+    candidatos = []
+    for i in range(3000):
+        estrategia = rnd.choice(['VENDA_PUT', 'VENDA_COBERTA', 'TRAVA_ALTA_PUT'])
+        spot = rnd.uniform(8, 60)
+        strike = spot * (1.05 if estrategia == 'VENDA_COBERTA' else 0.95)
+        strike_2 = strike - 1.0 if estrategia == 'TRAVA_ALTA_PUT' else None
+        iv, dias = rnd.uniform(25, 60), rnd.randint(30, 60)
+        # Prêmio de mercado entre 15% abaixo e 25% acima do teórico
+        teorico = float(preco(spot, strike, prazo_anos(dias), iv / 100, estrategia == 'VENDA_COBERTA'))
+        if strike_2:
+            teorico -= float(preco(spot, strike_2, prazo_anos(dias), iv / 100, False))
+        credito = teorico * rnd.uniform(0.85, 1.25) * 100
+        candidatos.append({
+            'ativo': f"ATV{i % 40:02d}", 'estrategia': estrategia, 'score': rnd.randint(60, 100),
+            'strike_1': strike, 'strike_2': strike_2, 'preco_ativo_atual': spot, 'quantidade_1': 100,
+            'iv': iv, 'dias_vencimento': dias, 'resultado_liquido': credito,
+            'risco_maximo': 100.0 - credito if strike_2 else strike * 100
+        })
+
+    inicio = time.perf_counter()
+    carteira = selecionar_carteira(candidatos, orcamento=5000, max_por_ativo=1)
+    ms = (time.perf_counter() - inicio) * 1000
+    print(f"{len(candidatos)} candidatos → {resumo_carteira(carteira)} em {ms:.1f}ms")
+    for s in carteira[:5]:
+        print(f"  {s['ativo']} {s['estrategia']:<15} margem R$ {margem_setup(s):>8.2f} | esperado R$ {retorno_esperado(s):.2f}")
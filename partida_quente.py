@@ -0,0 +1,147 @@
+"""
+Partida Quente - RCO Scanner
+=============================
+Resultados na tela logo depois do boot, sem esperar o Yahoo
+
+Ao subir o processo, o RepositorioResultados começa vazio e a primeira
+página ou fica em branco ou dispara o scan dos 30 ativos. `aquecer`
+preenche o repositório a partir do que já está em disco:
+- setups recalculados sobre o snapshot mais recente de cada ativo
+  (scan_multiplo e ativo:<ATIVO>), marcados 'desatualizado' e com
+  `capturado_em`;
+- sem snapshots, as últimas oportunidades salvas no banco.
+
+Nos dois casos os prazos são recontados a partir de hoje, vencimentos já
+passados ficam de fora e nada mais velho que `idade_max` é publicado.
+
+A entrada é publicada com a data da captura (a mais antiga entre os
+ativos), então a idade que a interface mostra é a dos dados. O scan de
+verdade roda em segundo plano e substitui tudo ao terminar.
+"""
+
+import logging
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from scanner_opcoes import ESTRATEGIAS, IDADE_MAX_DESATUALIZADO
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHAVE_SCAN = 'scan_multiplo'
+LIMITE_BANCO = 30  # oportunidades lidas do banco quando não há snapshot
+
+
+def _como_datetime(valor) -> Optional[datetime]:
+    """datetime local sem fuso a partir de texto ISO (snapshot ou created_at do banco)"""
+    if not valor:
+        return None
+    try:
+        momento = datetime.fromisoformat(str(valor).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return momento.astimezone().replace(tzinfo=None) if momento.tzinfo else momento
+
+
+def _do_banco(db, idade_max: Optional[float]) -> List[Dict]:
+    agora = datetime.now()
+    oportunidades = []
+    for linha in db.listar_oportunidades_recentes(limite=LIMITE_BANCO):
+        criada = _como_datetime(linha.get('created_at'))
+        if idade_max is not None and (criada is None or (agora - criada).total_seconds() > idade_max):
+            continue
+        dias = (date.fromisoformat(str(linha['vencimento'])[:10]) - agora.date()).days
+        if dias < 0:
+            continue
+        oportunidades.append({**linha, 'dias_vencimento': dias, 'desatualizado': True,
+                              'capturado_em': linha.get('created_at')})
+    return oportunidades
+
+
+def aquecer(scanner, repositorio, ativos: List[str], db=None, limite_por_ativo: int = 1,
+            chave: str = CHAVE_SCAN, idade_max: Optional[float] = IDADE_MAX_DESATUALIZADO) -> Dict:
+    """
+    Publica no repositório os resultados dos snapshots (ou do banco)
+
+    Não sobrescreve uma chave que já tenha resultado. Snapshots e
+    oportunidades mais velhos que `idade_max` segundos são ignorados.
+
+    Returns:
+        {'origem': 'snapshots' | 'banco' | None, 'ativos', 'oportunidades', 'capturado_em'}
+    """
+    from tarefas_scan import _limitar_por_estrategia
+
+    resultados = []
+    capturas = []
+    ativos_lidos = 0
+    for ativo in ativos:
+        opcoes = scanner.chain_do_snapshot(ativo, idade_max)
+        if opcoes is None:
+            continue
+        try:
+            setups = scanner.setups(opcoes)
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot de {ativo} sem setups: {e}")
+            continue
+
+        capturado_em = _como_datetime(opcoes.get('capturado_em'))
+        capturas.append(capturado_em)
+        ativos_lidos += 1
+        resultados.extend(_limitar_por_estrategia(setups, limite_por_ativo))
+
+        chave_ativo = f'ativo:{ativo}'
+        if repositorio.obter(chave_ativo) is None:
+            repositorio.publicar(chave_ativo, {
+                estrategia: [s for s in setups if s['estrategia'] == estrategia][:5]
+                for estrategia in ESTRATEGIAS
+            }, capturado_em)
+
+    origem = 'snapshots' if ativos_lidos else None
+    if not resultados and db is not None:
+        resultados = _do_banco(db, idade_max)
+        capturas = [_como_datetime(op['capturado_em']) for op in resultados]
+        origem = 'banco' if resultados else None
+
+    capturas = [c for c in capturas if c is not None]
+    capturado_em = min(capturas) if capturas else None
+    if origem and repositorio.obter(chave) is None:
+        resultados.sort(key=lambda x: x['score'], reverse=True)
+        repositorio.publicar(chave, resultados, capturado_em)
+        logger.info(f"✅ Partida quente ({origem}): {len(resultados)} oportunidades de {capturado_em:%d/%m %H:%M}"
+                    if capturado_em else f"✅ Partida quente ({origem}): {len(resultados)} oportunidades")
+
+    return {
+        'origem': origem,
+        'ativos': ativos_lidos,
+        'oportunidades': len(resultados),
+        'capturado_em': capturado_em
+    }
+
+
+# Teste
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from gerador_sintetico import GeradorChains
+    from resultados_compartilhados import RepositorioResultados
+    from scanner_opcoes import ScannerOpcoesB3
+    from snapshots import ArmazemSnapshots
+
+    armazem = ArmazemSnapshots(tempfile.mkdtemp())
+    ativos = ['PETR4', 'VALE3', 'BBAS3', 'ITUB4', 'BOVA11']
+    anterior = ScannerOpcoesB3(fonte_dados=GeradorChains(), armazem_snapshots=armazem)
+    for ativo in ativos:
+        anterior.buscar_opcoes_disponiveis(ativo)
+
+    # "Reinício": scanner e repositório novos, sem rede
+    def sem_rede(simbolo):
+        raise ConnectionError("sem rede")
+
+    inicio = time.perf_counter()
+    repositorio = RepositorioResultados()
+    resumo = aquecer(ScannerOpcoesB3(fonte_dados=sem_rede, armazem_snapshots=armazem), repositorio, ativos)
+    entrada = repositorio.obter(CHAVE_SCAN)
+    print(f"{resumo} em {(time.perf_counter() - inicio) * 1000:.0f}ms")
+    print(f"Primeira tela: {len(entrada.valor)} oportunidades, idade {entrada.idade_segundos:.1f}s, "
+          f"desatualizado={entrada.valor[0]['desatualizado']}")
+    print(f"ativo:PETR4 → {[len(v) for v in repositorio.obter('ativo:PETR4').valor.values()]}")
@@ -0,0 +1,224 @@
+"""
+Probabilidade - RCO Scanner
+============================
+Probabilidade de lucro dos setups RCO
+
+- Fechada (lognormal): chance de terminar acima do breakeven no vencimento
+  e resultado médio no vencimento (medida física: drift com prêmio de risco
+  e volatilidade realizada abaixo da implícita)
+- Monte Carlo (GBM, semente fixa): caminhos compartilhados por ativo e
+  vencimento, para probabilidades que dependem do trajeto (ex: tocar 60%
+  de lucro antes do vencimento)
+"""
+
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from black_scholes import TAXA_JUROS_PADRAO, DIAS_ANO, norm_cdf, preco, prazo_anos
+
+VOL_PADRAO = 0.35  # quando o setup não traz IV
+PREMIO_RISCO_ACAO = 0.05    # retorno anual esperado da ação acima da taxa livre (resultado esperado)
+RAZAO_VOL_REALIZADA = 0.85  # vol realizada / implícita (prêmio de volatilidade histórico)
+
+
+# ============================================================================
+# FECHADA (LOGNORMAL)
+# ============================================================================
+
+def prob_acima(S, nivel, dias, sigma, r: float = TAXA_JUROS_PADRAO):
+    """P(S_T > nivel) com S lognormal (vetorizada)"""
+    S = np.asarray(S, dtype=np.float64)
+    nivel = np.maximum(np.asarray(nivel, dtype=np.float64), 1e-9)
+    T = prazo_anos(dias)
+    sigma = np.maximum(np.asarray(sigma, dtype=np.float64), 1e-6)
+    d2 = (np.log(S / nivel) + (r - 0.5 * sigma * sigma) * T) / (sigma * np.sqrt(T))
+    return norm_cdf(d2)
+
+
+def breakeven(setup: Dict) -> float:
+    """Preço do ativo no vencimento a partir do qual o setup lucra"""
+    credito = setup['preco_1'] - (setup.get('preco_2') or 0)
+    if setup['estrategia'] == 'VENDA_COBERTA':
+        return setup['preco_ativo_atual'] - credito
+    return setup['strike_1'] - credito
+
+
+def _vol(setup: Dict) -> float:
+    iv = setup.get('iv') or 0
+    return iv / 100 if iv > 0 else VOL_PADRAO
+
+
+def pop(setup: Dict, r: float = TAXA_JUROS_PADRAO) -> float:
+    """Probabilidade de lucro no vencimento, em % (todas as estratégias RCO são altistas)"""
+    p = prob_acima(setup['preco_ativo_atual'], breakeven(setup), setup['dias_vencimento'], _vol(setup), r)
+    return round(float(p) * 100, 1)
+
+
+def pop_lote(setups: List[Dict], r: float = TAXA_JUROS_PADRAO) -> np.ndarray:
+    """pop() de vários setups numa única chamada vetorizada (em %)"""
+    if not setups:
+        return np.array([])
+    S = np.array([s['preco_ativo_atual'] for s in setups], dtype=np.float64)
+    niveis = np.array([breakeven(s) for s in setups], dtype=np.float64)
+    dias = np.array([s['dias_vencimento'] for s in setups], dtype=np.float64)
+    vols = np.array([_vol(s) for s in setups], dtype=np.float64)
+    return np.round(prob_acima(S, niveis, dias, vols, r) * 100, 1)
+
+
+def resultado_esperado_lote(setups: List[Dict], r: float = TAXA_JUROS_PADRAO,
+                            premio: float = PREMIO_RISCO_ACAO,
+                            razao_vol: float = RAZAO_VOL_REALIZADA) -> np.ndarray:
+    """
+    Resultado médio no vencimento (R$) de vários setups, na medida física
+
+    Ação lognormal com drift r + `premio` e vol = IV da perna vendida × `razao_vol`
+    (a mesma para as duas pernas da trava). Crédito levado ao vencimento a r,
+    menos o payoff esperado das opções (mais o ganho esperado da ação acima
+    do custo de carregá-la, na venda coberta); equivale a
+    crédito × p − perda média nos casos de perda × (1 − p).
+
+    Na medida neutra ao risco com a IV de cada contrato o resultado seria só
+    −meio spread (sempre ≤ 0); aqui o que pesa é o prêmio de volatilidade.
+    """
+    if not setups:
+        return np.array([])
+    S = np.array([s['preco_ativo_atual'] for s in setups], dtype=np.float64)
+    K1 = np.array([s['strike_1'] for s in setups], dtype=np.float64)
+    K2 = np.array([s.get('strike_2') or 0.0 for s in setups], dtype=np.float64)
+    eh_call = np.array([s['estrategia'] == 'VENDA_COBERTA' for s in setups])
+    T = prazo_anos(np.array([s['dias_vencimento'] for s in setups], dtype=np.float64))
+    vols = np.array([_vol(s) for s in setups], dtype=np.float64)
+    quantidade = np.array([s.get('quantidade_1') or 100 for s in setups], dtype=np.float64)
+    credito = np.array([s.get('resultado_liquido') or 0.0 for s in setups], dtype=np.float64)
+
+    # E[payoff] com drift mu = preço de Black-Scholes com taxa mu, levado ao vencimento por e^(mu T)
+    mu = r + premio
+    sigma = vols * razao_vol
+    pago = preco(S, K1, T, sigma, eh_call, mu)
+    comprada = K2 > 0
+    if comprada.any():
+        pago = pago - np.where(comprada, preco(S, np.where(comprada, K2, K1), T, sigma, False, mu), 0.0)
+    pago = pago * np.exp(mu * T)
+    acao = np.where(eh_call, S * (np.exp(mu * T) - np.exp(r * T)), 0.0)
+    return credito * np.exp(r * T) + (acao - pago) * quantidade
+
+
+def resultado_esperado(setup: Dict, r: float = TAXA_JUROS_PADRAO) -> float:
+    """resultado_esperado_lote() de um setup (R$)"""
+    return round(float(resultado_esperado_lote([setup], r)[0]), 2)
+
+
+# ============================================================================
+# MONTE CARLO (GBM)
+# ============================================================================
+
+class MonteCarloGBM:
+    """
+    Caminhos GBM diários com semente fixa, em cache por ativo/vencimento
+
+    Setups do mesmo ativo e vencimento reaproveitam os mesmos caminhos;
+    a semente de cada chave deriva da semente base, então o resultado é
+    reprodutível entre execuções.
+    """
+
+    def __init__(self, n_caminhos: int = 4000, semente: int = 42,
+                 r: float = TAXA_JUROS_PADRAO, max_cache: int = 64):
+        self.n_caminhos = n_caminhos
+        self.semente = semente
+        self.r = r
+        self.max_cache = max_cache
+        self._cache: 'OrderedDict[Tuple, np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def caminhos(self, ativo: str, vencimento: str, S0: float, sigma: float, dias: int) -> np.ndarray:
+        """Matriz (n_caminhos × dias+1) de preços, coluna 0 = S0"""
+        dias = max(int(dias), 1)
+        chave = (ativo, vencimento, round(float(S0), 2), round(float(sigma), 3), dias)
+
+        with self._lock:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                return self._cache[chave]
+
+        rng = np.random.default_rng([self.semente, zlib.crc32(repr(chave).encode())])
+        dt = 1 / DIAS_ANO
+        choques = rng.standard_normal((self.n_caminhos, dias))
+        log_retornos = (self.r - 0.5 * sigma * sigma) * dt + sigma * np.sqrt(dt) * choques
+        matriz = np.empty((self.n_caminhos, dias + 1))
+        matriz[:, 0] = S0
+        matriz[:, 1:] = S0 * np.exp(np.cumsum(log_retornos, axis=1))
+
+        with self._lock:
+            self._cache[chave] = matriz
+            while len(self._cache) > self.max_cache:
+                self._cache.popitem(last=False)
+        return matriz
+
+    def _lucro_nos_caminhos(self, setup: Dict, caminhos: np.ndarray, sigma: float) -> np.ndarray:
+        """Lucro por ação em cada caminho e dia (n_caminhos × dias+1)"""
+        dias = caminhos.shape[1] - 1
+        restante = prazo_anos(np.arange(dias, -1, -1))
+        restante[-1] = 1e-9  # vencimento: valor intrínseco
+
+        eh_call = setup.get('tipo_opcao_1') == 'CALL'
+        valor = preco(caminhos, setup['strike_1'], restante, sigma, eh_call, self.r)
+        if setup.get('codigo_opcao_2'):
+            valor = valor - preco(caminhos, setup['strike_2'], restante, sigma,
+                                  setup.get('tipo_opcao_2') == 'CALL', self.r)
+
+        credito = setup['preco_1'] - (setup.get('preco_2') or 0)
+        lucro = credito - valor
+        if setup['estrategia'] == 'VENDA_COBERTA':
+            lucro = lucro + (caminhos - caminhos[:, :1])
+        return lucro
+
+    def prob_tocar_lucro_lote(self, setups: List[Dict], alvo: float = 0.60) -> List[float]:
+        """
+        Probabilidade (em %) de cada setup atingir `alvo` do crédito em
+        algum dia até o vencimento. Um conjunto de caminhos por ativo e
+        vencimento (vol = mediana das IVs do grupo).
+        """
+        grupos: Dict[Tuple[str, str], List[int]] = {}
+        for i, setup in enumerate(setups):
+            grupos.setdefault((setup['ativo'], setup['vencimento']), []).append(i)
+
+        resultado = [0.0] * len(setups)
+        for (ativo, vencimento), indices in grupos.items():
+            grupo = [setups[i] for i in indices]
+            sigma = float(np.median([_vol(s) for s in grupo]))
+            caminhos = self.caminhos(ativo, vencimento, grupo[0]['preco_ativo_atual'], sigma,
+                                     max(s['dias_vencimento'] for s in grupo))
+
+            for i, setup in zip(indices, grupo):
+                dias = max(int(setup['dias_vencimento']), 1)
+                lucro = self._lucro_nos_caminhos(setup, caminhos[:, :dias + 1], sigma)
+                credito = setup['preco_1'] - (setup.get('preco_2') or 0)
+                tocou = (lucro[:, 1:] >= alvo * credito).any(axis=1)
+                resultado[i] = round(float(tocou.mean()) * 100, 1)
+
+        return resultado
+
+    def prob_tocar_lucro(self, setup: Dict, alvo: float = 0.60) -> float:
+        """prob_tocar_lucro_lote() de um setup só"""
+        return self.prob_tocar_lucro_lote([setup], alvo)[0]
+
+
+# Teste
+if __name__ == "__main__":
+    venda_put = {
+        'estrategia': 'VENDA_PUT', 'ativo': 'PETR4', 'vencimento': '2026-11-20',
+        'codigo_opcao_1': 'PETRW360', 'tipo_opcao_1': 'PUT', 'strike_1': 36.0, 'preco_1': 0.75,
+        'codigo_opcao_2': None, 'preco_ativo_atual': 38.0, 'dias_vencimento': 35, 'iv': 35.0
+    }
+    trava = {
+        **venda_put, 'estrategia': 'TRAVA_ALTA_PUT',
+        'codigo_opcao_2': 'PETRW350', 'tipo_opcao_2': 'PUT', 'strike_2': 35.0, 'preco_2': 0.45
+    }
+
+    print(f"POP venda put: {pop(venda_put)}% | trava: {pop(trava)}%")
+    mc = MonteCarloGBM()
+    print(f"Tocar 60% (MC): {mc.prob_tocar_lucro_lote([venda_put, trava])}")
@@ -0,0 +1,241 @@
+"""
+Regras de Alerta - UNO INVEST
+==============================
+Limites de alerta por posição, por estratégia ou globais
+
+Cada regra é (escopo, alvo, tipo, limite): escopo POSICAO (alvo = id da
+posição), ESTRATEGIA (alvo = VENDA_PUT, ...) ou GLOBAL (alvo vazio). Vale
+a regra mais específica; regra desativada desliga o alerta naquele escopo.
+As regras ficam na tabela `regras_alerta` (a mesma que v_posicoes_ativas
+usa para o status_alerta) e em memória aqui.
+
+Depois de cada marcação a mercado, `processar(posicoes)` compara todas as
+posições com todos os limites de uma vez (arrays NumPy) e manda os
+disparos para alertas_telegram, que deduplica via EstadoAlertas e enfileira
+no despachante.
+"""
+
+import threading
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ESCOPOS = ('POSICAO', 'ESTRATEGIA', 'GLOBAL')  # do mais para o menos específico
+
+# tipo -> (métrica da posição, dispara quando métrica >= limite? senão <=)
+TIPOS_REGRA = {
+    'LUCRO_60': ('lucro_percentual', True),
+    'STOP_LOSS': ('lucro_percentual', False),
+    'VENCIMENTO': ('dias_restantes', False),
+}
+
+# Usadas quando a tabela não tem regra GLOBAL (mesmos valores semeados no schema)
+REGRAS_PADRAO = {
+    'LUCRO_60': 60.0,
+    'STOP_LOSS': -30.0,
+    'VENCIMENTO': 7.0,
+}
+
+# Status de v_posicoes_ativas, na mesma ordem de prioridade
+STATUS_POR_TIPO = {
+    'LUCRO_60': 'FECHAR AGORA',
+    'STOP_LOSS': 'STOP LOSS',
+    'VENCIMENTO': 'VENCIMENTO PRÓXIMO',
+}
+STATUS_NEUTRO = 'MONITORANDO'
+
+
+class MotorRegras:
+    """Regras em memória + avaliação vetorizada sobre as posições abertas"""
+
+    def __init__(self, db=None, estado=None, hoje: date = None):
+        """
+        Args:
+            db: backend com listar_regras_alerta/salvar_regra_alerta (None = só padrões)
+            estado: EstadoAlertas usado na deduplicação dos envios
+            hoje: data base fixa (testes); padrão: data do dia a cada avaliação
+        """
+        self.db = db
+        self.estado = estado
+        self._hoje = hoje
+        self._regras: Dict[Tuple[str, str, str], Optional[float]] = {}
+        self._lock = threading.Lock()
+        self.carregar()
+
+    # ========================================================================
+    # REGRAS
+    # ========================================================================
+
+    def carregar(self):
+        """Lê a tabela `regras_alerta` para a memória"""
+        if self.db is None:
+            return
+
+        regras = {}
+        for r in self.db.listar_regras_alerta():
+            if r['tipo'] not in TIPOS_REGRA or r['escopo'] not in ESCOPOS:
+                continue
+            ativa = r.get('ativa', True) and r.get('limite') is not None
+            regras[(r['escopo'], r.get('alvo') or '', r['tipo'])] = float(r['limite']) if ativa else None
+
+        with self._lock:
+            self._regras = regras
+        logger.info(f"✅ Regras de alerta carregadas: {len(regras)}")
+
+    def definir(self, escopo: str, alvo: str, tipo: str, limite: Optional[float], ativa: bool = True) -> bool:
+        """Cria/atualiza uma regra (memória + tabela); limite None ou ativa=False desliga"""
+        if escopo not in ESCOPOS or tipo not in TIPOS_REGRA:
+            logger.error(f"❌ Regra inválida: {escopo}/{tipo}")
+            return False
+
+        alvo = '' if escopo == 'GLOBAL' else str(alvo)
+        ativa = ativa and limite is not None
+        with self._lock:
+            self._regras[(escopo, alvo, tipo)] = float(limite) if ativa else None
+
+        if self.db is not None:
+            return self.db.salvar_regra_alerta({
+                'escopo': escopo, 'alvo': alvo, 'tipo': tipo,
+                'limite': limite, 'ativa': ativa
+            })
+        return True
+
+    def remover(self, escopo: str, alvo: str, tipo: str) -> bool:
+        """Apaga a regra; volta a valer a do escopo menos específico"""
+        alvo = '' if escopo == 'GLOBAL' else str(alvo)
+        with self._lock:
+            self._regras.pop((escopo, alvo, tipo), None)
+        if self.db is not None:
+            return self.db.remover_regra_alerta(escopo, alvo, tipo)
+        return True
+
+    def limite(self, posicao: Dict, tipo: str) -> Optional[float]:
+        """Limite efetivo de um tipo para a posição (None = alerta desligado)"""
+        chaves = (('POSICAO', str(posicao.get('id')), tipo),
+                  ('ESTRATEGIA', posicao.get('estrategia') or '', tipo),
+                  ('GLOBAL', '', tipo))
+        for chave in chaves:
+            if chave in self._regras:
+                return self._regras[chave]
+        return REGRAS_PADRAO.get(tipo)
+
+    # ========================================================================
+    # AVALIAÇÃO
+    # ========================================================================
+
+    def _metricas(self, posicoes: List[Dict]) -> Dict[str, np.ndarray]:
+        hoje = np.datetime64(self._hoje or date.today(), 'D')
+        vencimentos = np.array([str(p['vencimento'])[:10] for p in posicoes], dtype='datetime64[D]')
+        return {
+            'lucro_percentual': np.array(
+                [np.nan if p.get('lucro_percentual') is None else p['lucro_percentual'] for p in posicoes],
+                dtype=np.float64
+            ),
+            'dias_restantes': (vencimentos - hoje).astype(np.float64)
+        }
+
+    def avaliar(self, posicoes: List[Dict]) -> Dict[str, np.ndarray]:
+        """
+        Disparos de todas as regras em todas as posições
+
+        Returns:
+            {tipo: array de bool (uma entrada por posição)}
+        """
+        if not posicoes:
+            return {tipo: np.zeros(0, dtype=bool) for tipo in TIPOS_REGRA}
+
+        metricas = self._metricas(posicoes)
+        with self._lock:
+            limites = {
+                tipo: np.array([self.limite(p, tipo) for p in posicoes], dtype=np.float64)  # None -> NaN
+                for tipo in TIPOS_REGRA
+            }
+
+        disparos = {}
+        for tipo, (metrica, acima) in TIPOS_REGRA.items():
+            valor = metricas[metrica]
+            with np.errstate(invalid='ignore'):
+                disparos[tipo] = (valor >= limites[tipo]) if acima else (valor <= limites[tipo])
+        return disparos
+
+    def status(self, posicoes: List[Dict]) -> List[str]:
+        """status_alerta de cada posição (mesma lógica de v_posicoes_ativas)"""
+        disparos = self.avaliar(posicoes)
+        status = np.full(len(posicoes), STATUS_NEUTRO, dtype=object)
+        for tipo in reversed(list(STATUS_POR_TIPO)):  # o primeiro da lista prevalece
+            status[disparos[tipo]] = STATUS_POR_TIPO[tipo]
+        return status.tolist()
+
+    def processar(self, posicoes: List[Dict]) -> List[Dict]:
+        """
+        Avalia e envia os alertas disparados (deduplicados pelo EstadoAlertas)
+
+        Returns:
+            Eventos enviados: {'tipo', 'posicao_id', 'ativo', 'valor', 'limite'}
+        """
+        from alertas_telegram import alerta_fechar_60_lucro, alerta_stop_loss, alerta_vencimento_proximo
+
+        if not posicoes:
+            return []
+        disparos = self.avaliar(posicoes)
+        metricas = self._metricas(posicoes)
+
+        enviados = []
+        for tipo, (metrica, _) in TIPOS_REGRA.items():
+            for i in np.flatnonzero(disparos[tipo]):
+                posicao = posicoes[i]
+                if tipo == 'LUCRO_60':
+                    ok = alerta_fechar_60_lucro(posicao, self.estado)
+                elif tipo == 'STOP_LOSS':
+                    ok = alerta_stop_loss(posicao, self.estado)
+                else:
+                    ok = alerta_vencimento_proximo(posicao, int(metricas['dias_restantes'][i]), self.estado)
+                if ok:
+                    enviados.append({
+                        'tipo': tipo,
+                        'posicao_id': posicao.get('id'),
+                        'ativo': posicao.get('ativo'),
+                        'valor': float(metricas[metrica][i]),
+                        'limite': self.limite(posicao, tipo)
+                    })
+        return enviados
+
+    # ========================================================================
+    # POSIÇÕES
+    # ========================================================================
+
+    def fechar_posicao(self, posicao_id: str, motivo: str, resultado_final: float) -> bool:
+        """Fecha a posição no backend e esquece os alertas já enviados para ela"""
+        if self.db is not None and not self.db.fechar_posicao(posicao_id, motivo, resultado_final):
+            return False
+        if self.estado is not None:
+            self.estado.esquecer(str(posicao_id))
+        return True
+
+
+# Teste
+if __name__ == "__main__":
+    motor = MotorRegras(hoje=date(2026, 10, 19))
+    motor.definir('ESTRATEGIA', 'TRAVA_ALTA_PUT', 'LUCRO_60', 50)
+    motor.definir('POSICAO', 'p3', 'STOP_LOSS', None)  # sem stop nesta posição
+
+    posicoes = [
+        {'id': 'p1', 'ativo': 'PETR4', 'estrategia': 'VENDA_PUT', 'vencimento': '2026-11-20', 'lucro_percentual': 62},
+        {'id': 'p2', 'ativo': 'VALE3', 'estrategia': 'TRAVA_ALTA_PUT', 'vencimento': '2026-11-20', 'lucro_percentual': 55},
+        {'id': 'p3', 'ativo': 'BBAS3', 'estrategia': 'VENDA_PUT', 'vencimento': '2026-11-20', 'lucro_percentual': -45},
+        {'id': 'p4', 'ativo': 'ITUB4', 'estrategia': 'VENDA_COBERTA', 'vencimento': '2026-10-23', 'lucro_percentual': 10},
+    ]
+    for posicao, status in zip(posicoes, motor.status(posicoes)):
+        print(f"{posicao['id']} {posicao['estrategia']:<15} {posicao['lucro_percentual']:>5}% → {status}")
+
+    n = 20000
+    grandes = [dict(posicoes[i % 4], id=f"x{i}") for i in range(n)]
+    import time
+    inicio = time.perf_counter()
+    motor.avaliar(grandes)
+    print(f"{n} posições avaliadas em {(time.perf_counter() - inicio) * 1000:.1f}ms")
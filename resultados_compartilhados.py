@@ -0,0 +1,282 @@
+"""
+Resultados Compartilhados - RCO Scanner
+========================================
+Estado compartilhado entre todas as sessões do processo
+
+- RepositorioResultados: último resultado de cada chave, com versão
+- SingleFlight: chamadas simultâneas para a mesma chave viram uma só
+  (também para streams: os seguidores recebem as partes do líder)
+"""
+
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class EntradaResultado(NamedTuple):
+    """Resultado publicado (imutável)"""
+    valor: Any
+    versao: int
+    atualizado_em: datetime
+
+    @property
+    def idade_segundos(self) -> float:
+        return (datetime.now() - self.atualizado_em).total_seconds()
+
+
+class _Voo:
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.resultado: Any = None
+        self.erro: Optional[BaseException] = None
+        self.participantes = 1
+
+
+class _Transmissao:
+    def __init__(self):
+        self.mudou = threading.Condition()
+        self.partes: List[Any] = []
+        self.fim = False
+        self.interrompida = False  # o líder parou de consumir antes do fim
+        self.erro: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce chamadas simultâneas: enquanto `fn` roda para uma chave,
+    outras chamadas com a mesma chave esperam e recebem o mesmo resultado
+    """
+
+    def __init__(self):
+        self._voos: Dict[str, _Voo] = {}
+        self._transmissoes: Dict[str, _Transmissao] = {}
+        self._lock = threading.Lock()
+        self.coalescidas = 0
+
+    def executar(self, chave: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            voo = self._voos.get(chave)
+            if voo is not None:
+                voo.participantes += 1
+                self.coalescidas += 1
+                lider = False
+            else:
+                voo = _Voo()
+                self._voos[chave] = voo
+                lider = True
+
+        if not lider:
+            voo.pronto.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado
+
+        try:
+            voo.resultado = fn()
+            return voo.resultado
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._voos[chave]
+            voo.pronto.set()
+
+    def transmitir(self, chave: str, gerar: Callable[[], Iterator[Any]], pular: int = 0) -> Iterator[Any]:
+        """
+        Como executar, para geradores: o líder consome `gerar()` e cada parte
+        é repassada, na ordem, a quem pediu a mesma chave enquanto ele rodava
+
+        Se o líder parar antes do fim, os seguidores continuam com uma
+        transmissão nova, pulando as partes que já receberam.
+        """
+        with self._lock:
+            transmissao = self._transmissoes.get(chave)
+            if transmissao is not None:
+                self.coalescidas += 1
+                lider = False
+            else:
+                transmissao = _Transmissao()
+                self._transmissoes[chave] = transmissao
+                lider = True
+
+        if lider:
+            yield from self._liderar(chave, transmissao, gerar, pular)
+            return
+
+        recebidas = 0
+        while True:
+            with transmissao.mudou:
+                while recebidas >= len(transmissao.partes) and not transmissao.fim:
+                    transmissao.mudou.wait()
+                if recebidas < len(transmissao.partes):
+                    parte = transmissao.partes[recebidas]
+                elif transmissao.erro is not None:
+                    raise transmissao.erro
+                else:
+                    break
+            recebidas += 1
+            if recebidas > pular:
+                yield parte
+
+        if transmissao.interrompida:
+            yield from self.transmitir(chave, gerar, max(recebidas, pular))
+
+    def _liderar(self, chave: str, transmissao: _Transmissao, gerar: Callable[[], Iterator[Any]],
+                 pular: int) -> Iterator[Any]:
+        completa = False
+        try:
+            for i, parte in enumerate(gerar()):
+                with transmissao.mudou:
+                    transmissao.partes.append(parte)
+                    transmissao.mudou.notify_all()
+                if i >= pular:
+                    yield parte
+            completa = True
+        except Exception as e:
+            transmissao.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._transmissoes[chave]
+            with transmissao.mudou:
+                transmissao.fim = True
+                transmissao.interrompida = not completa and transmissao.erro is None
+                transmissao.mudou.notify_all()
+
+
+class RepositorioResultados:
+    """Último resultado por chave, versionado (versão cresce a cada publicação)"""
+
+    def __init__(self):
+        self._entradas: Dict[str, EntradaResultado] = {}
+        self._versao = 0
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight()
+        self._revalidando = set()
+
+    def publicar(self, chave: str, valor: Any, atualizado_em: datetime = None) -> int:
+        """Publica um novo resultado e devolve a versão atribuída"""
+        with self._lock:
+            self._versao += 1
+            self._entradas[chave] = EntradaResultado(valor, self._versao, atualizado_em or datetime.now())
+            return self._versao
+
+    def obter(self, chave: str, idade_max: float = None) -> Optional[EntradaResultado]:
+        """Resultado atual da chave (None se não houver ou se mais velho que `idade_max` s)"""
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        if idade_max is not None and entrada.idade_segundos > idade_max:
+            return None
+        return entrada
+
+    def versao(self, chave: str) -> int:
+        """Versão atual da chave (0 se nunca publicada)"""
+        entrada = self._entradas.get(chave)
+        return entrada.versao if entrada else 0
+
+    def invalidar(self, chave: str):
+        """Remove a chave (próxima leitura recalcula)"""
+        with self._lock:
+            self._entradas.pop(chave, None)
+
+    def obter_ou_calcular(self, chave: str, calcular: Callable[[], Any],
+                          idade_max: float = None) -> EntradaResultado:
+        """
+        Resultado da chave se ainda válido; senão calcula, publica e devolve
+
+        Sessões que pedirem a mesma chave ao mesmo tempo esperam um único cálculo.
+        """
+        entrada = self.obter(chave, idade_max)
+        if entrada is not None:
+            return entrada
+
+        def calcular_e_publicar():
+            # Outra chamada pode ter publicado enquanto esperávamos
+            atual = self.obter(chave, idade_max)
+            if atual is not None:
+                return atual
+            self.publicar(chave, calcular())
+            return self._entradas[chave]
+
+        return self._single_flight.executar(chave, calcular_e_publicar)
+
+    def obter_ou_revalidar(self, chave: str, calcular: Callable[[], Any],
+                           idade_max: float) -> EntradaResultado:
+        """
+        Como obter_ou_calcular, mas uma entrada vencida volta na hora e é
+        recalculada em segundo plano (uma thread por chave)
+
+        Só espera o cálculo quando a chave não tem nenhum resultado.
+        """
+        entrada = self.obter(chave)
+        if entrada is None:
+            return self.obter_ou_calcular(chave, calcular, idade_max)
+        if entrada.idade_segundos > idade_max:
+            self._revalidar(chave, calcular)
+        return entrada
+
+    def _revalidar(self, chave: str, calcular: Callable[[], Any]):
+        with self._lock:
+            if chave in self._revalidando:
+                return
+            self._revalidando.add(chave)
+
+        def recalcular():
+            try:
+                self.publicar(chave, calcular())
+            except Exception as e:
+                logger.error(f"❌ Erro recalculando {chave}: {e}")
+            finally:
+                with self._lock:
+                    self._revalidando.discard(chave)
+
+        threading.Thread(target=recalcular, name=f'revalidar:{chave}', daemon=True).start()
+
+
+# Instância do processo (compartilhada por todas as sessões do Streamlit)
+repositorio = RepositorioResultados()
+
+
+# Teste
+if __name__ == "__main__":
+    sf = SingleFlight()
+    chamadas = []
+
+    def buscar_lento():
+        chamadas.append(1)
+        time.sleep(0.3)
+        return {'ativo': 'PETR4'}
+
+    threads = [threading.Thread(target=sf.executar, args=('PETR4', buscar_lento)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print(f"5 chamadas simultâneas → {len(chamadas)} busca(s), {sf.coalescidas} coalescidas")
+
+    def vencimentos_lentos():
+        chamadas.append(1)
+        for venc in ('2024-02-16', '2024-03-15', '2024-04-19'):
+            time.sleep(0.1)
+            yield venc
+
+    recebidos = []
+    threads = [threading.Thread(target=lambda: recebidos.append(list(sf.transmitir('VALE3', vencimentos_lentos))))
+               for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"3 streams simultâneos → {len(chamadas) - 1} busca(s), {[len(r) for r in recebidos]} partes cada")
+
+    v1 = repositorio.publicar('scan_multiplo', [1, 2, 3])
+    v2 = repositorio.publicar('scan_multiplo', [4, 5])
+    print(f"Versões: {v1} → {v2} | atual: {repositorio.obter('scan_multiplo').valor}")
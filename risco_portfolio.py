@@ -0,0 +1,273 @@
+"""
+Risco do Portfólio - RCO Scanner
+=================================
+Gregas agregadas e cenários de choque das posições abertas
+
+As pernas ficam em blocos por ativo (arrays NumPy). Abrir ou fechar uma
+posição recalcula só o bloco do ativo afetado; o total é a soma dos
+blocos. A grade de choques (spot × vol) reprecifica todas as pernas de
+uma vez por broadcasting.
+
+Convenções: delta em ações equivalentes, gama por R$ 1 no ativo, vega em
+R$ por ponto de vol, theta em R$ por dia corrido. Venda coberta inclui a
+ação (delta 1 por ação).
+"""
+
+import threading
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from black_scholes import TAXA_JUROS_PADRAO, gregas, preco, prazo_anos
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# posicoes_abertas não guarda o tipo da opção; vem da estratégia
+TIPO_POR_ESTRATEGIA = {
+    'VENDA_COBERTA': 'CALL',
+    'VENDA_PUT': 'PUT',
+    'TRAVA_ALTA_PUT': 'PUT',
+}
+
+GREGAS = ('delta', 'gama', 'vega', 'theta')
+
+CHOQUES_SPOT_PADRAO = (-0.10, -0.05, -0.02, 0.0, 0.02, 0.05, 0.10)
+CHOQUES_VOL_PADRAO = (-10.0, -5.0, 0.0, 5.0, 10.0)  # pontos de vol
+
+
+def pernas_da_posicao(posicao: Dict) -> List[Dict]:
+    """Pernas (quantidade com sinal: + comprado, - vendido) de uma posição"""
+    tipo = TIPO_POR_ESTRATEGIA.get(posicao['estrategia'], 'PUT')
+    vencimento = date.fromisoformat(str(posicao['vencimento'])[:10])
+    pernas = []
+
+    for n in (1, 2):
+        codigo = posicao.get(f'codigo_opcao_{n}')
+        if not codigo:
+            continue
+        sinal = -1 if posicao.get(f'direcao_{n}', 'VENDA') == 'VENDA' else 1
+        pernas.append({
+            'codigo': codigo,
+            'tipo': tipo,
+            'strike': float(posicao.get(f'strike_{n}') or 0),
+            'quantidade': sinal * int(posicao.get(f'quantidade_{n}') or 100),
+            'vencimento': vencimento
+        })
+
+    if posicao['estrategia'] == 'VENDA_COBERTA':
+        pernas.append({
+            'codigo': posicao['ativo'],
+            'tipo': 'ACAO',
+            'strike': 0.0,
+            'quantidade': int(posicao.get('quantidade_1') or 100),
+            'vencimento': vencimento
+        })
+    return pernas
+
+
+class _BlocoAtivo:
+    """Pernas de um ativo em arrays + gregas já somadas"""
+
+    def __init__(self, ativo: str):
+        self.ativo = ativo
+        self.spot: Optional[float] = None
+        self.ivs: Dict[str, float] = {}   # codigo -> IV (%)
+        self.pernas: Dict[str, List[Dict]] = {}  # posicao_id -> pernas
+        self.arrays: Dict[str, np.ndarray] = {}
+        self.gregas = dict.fromkeys(GREGAS, 0.0)
+
+    def montar(self, hoje: date, iv_padrao: float):
+        pernas = [p for lista in self.pernas.values() for p in lista]
+        self.arrays = {
+            'strike': np.array([p['strike'] for p in pernas], dtype=np.float64),
+            'quantidade': np.array([p['quantidade'] for p in pernas], dtype=np.float64),
+            'eh_call': np.array([p['tipo'] == 'CALL' for p in pernas], dtype=bool),
+            'eh_acao': np.array([p['tipo'] == 'ACAO' for p in pernas], dtype=bool),
+            'prazo': prazo_anos([(p['vencimento'] - hoje).days for p in pernas]),
+            'iv': np.array([self.ivs.get(p['codigo'], iv_padrao) for p in pernas], dtype=np.float64) / 100,
+        }
+
+
+class AgregadorRisco:
+    """Gregas por ativo e total, com atualização incremental"""
+
+    def __init__(self, r: float = TAXA_JUROS_PADRAO, iv_padrao: float = 35.0, hoje: date = None):
+        """`hoje` fixa a data base (testes); padrão: data do dia a cada cálculo"""
+        self.r = r
+        self.iv_padrao = iv_padrao
+        self._hoje = hoje
+        self._blocos: Dict[str, _BlocoAtivo] = {}
+        self._ativo_da_posicao: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    # ========================================================================
+    # POSIÇÕES E MERCADO
+    # ========================================================================
+
+    def adicionar(self, posicao: Dict):
+        """Inclui (ou substitui) uma posição; recalcula só o ativo dela"""
+        posicao_id = str(posicao['id'])
+        with self._lock:
+            if posicao_id in self._ativo_da_posicao:
+                self.remover(posicao_id)
+            bloco = self._blocos.setdefault(posicao['ativo'], _BlocoAtivo(posicao['ativo']))
+            bloco.pernas[posicao_id] = pernas_da_posicao(posicao)
+            self._ativo_da_posicao[posicao_id] = posicao['ativo']
+            self._recalcular(bloco)
+
+    def remover(self, posicao_id: str):
+        """Retira uma posição fechada; recalcula só o ativo dela"""
+        posicao_id = str(posicao_id)
+        with self._lock:
+            ativo = self._ativo_da_posicao.pop(posicao_id, None)
+            if ativo is None:
+                return
+            bloco = self._blocos[ativo]
+            bloco.pernas.pop(posicao_id, None)
+            if not bloco.pernas:
+                del self._blocos[ativo]
+            else:
+                self._recalcular(bloco)
+
+    def sincronizar(self, posicoes: List[Dict]):
+        """Aplica a diferença entre as posições atuais e a lista recebida"""
+        ids = {str(p['id']) for p in posicoes}
+        with self._lock:
+            for posicao_id in list(self._ativo_da_posicao):
+                if posicao_id not in ids:
+                    self.remover(posicao_id)
+            for posicao in posicoes:
+                if str(posicao['id']) not in self._ativo_da_posicao:
+                    self.adicionar(posicao)
+
+    def atualizar_mercado(self, ativo: str, spot: float, ivs: Dict[str, float] = None):
+        """Novo spot (e IVs por código, em %) de um ativo"""
+        with self._lock:
+            bloco = self._blocos.get(ativo)
+            if bloco is None:
+                return
+            bloco.spot = float(spot)
+            if ivs:
+                bloco.ivs.update(ivs)
+            self._recalcular(bloco)
+
+    def ativos(self) -> List[str]:
+        return sorted(self._blocos)
+
+    def _recalcular(self, bloco: _BlocoAtivo):
+        bloco.montar(self._hoje or date.today(), self.iv_padrao)
+        if bloco.spot is None:
+            bloco.gregas = dict.fromkeys(GREGAS, 0.0)
+            return
+
+        a = bloco.arrays
+        g = gregas(bloco.spot, a['strike'], a['prazo'], a['iv'], a['eh_call'], self.r)
+        q = a['quantidade']
+        acao = a['eh_acao']
+        bloco.gregas = {
+            'delta': float(np.sum(np.where(acao, 1.0, g['delta']) * q)),
+            'gama': float(np.sum(np.where(acao, 0.0, g['gama']) * q)),
+            'vega': float(np.sum(np.where(acao, 0.0, g['vega']) * q)),
+            'theta': float(np.sum(np.where(acao, 0.0, g['theta']) * q)),
+        }
+
+    # ========================================================================
+    # CONSULTAS
+    # ========================================================================
+
+    def gregas_por_ativo(self) -> Dict[str, Dict[str, float]]:
+        """{ativo: {delta, gama, vega, theta}} + 'TOTAL' (só ativos com spot)"""
+        with self._lock:
+            resultado = {ativo: dict(b.gregas) for ativo, b in self._blocos.items() if b.spot is not None}
+        resultado['TOTAL'] = {g: sum(v[g] for v in resultado.values()) for g in GREGAS}
+        return resultado
+
+    def grade_choques(self, choques_spot=CHOQUES_SPOT_PADRAO,
+                      choques_vol=CHOQUES_VOL_PADRAO) -> Dict[str, np.ndarray]:
+        """
+        P&L (R$) sob choques de spot (fração) × vol (pontos), por ativo e total
+
+        Returns:
+            {ativo: matriz (len(choques_spot) × len(choques_vol))} + 'TOTAL'
+            (o choque é aplicado a todos os ativos ao mesmo tempo)
+        """
+        ds = np.asarray(choques_spot, dtype=np.float64)[:, None, None]
+        dv = np.asarray(choques_vol, dtype=np.float64)[None, :, None] / 100
+        resultado = {}
+
+        with self._lock:
+            for ativo, bloco in self._blocos.items():
+                if bloco.spot is None or not len(bloco.arrays['strike']):
+                    continue
+                a = bloco.arrays
+                spot_choque = bloco.spot * (1 + ds)
+                iv_choque = np.maximum(a['iv'] + dv, 0.01)
+
+                hoje = preco(bloco.spot, a['strike'], a['prazo'], a['iv'], a['eh_call'], self.r)
+                choque = preco(spot_choque, a['strike'], a['prazo'], iv_choque, a['eh_call'], self.r)
+                hoje = np.where(a['eh_acao'], bloco.spot, hoje)
+                choque = np.where(a['eh_acao'], spot_choque, choque)
+
+                resultado[ativo] = ((choque - hoje) * a['quantidade']).sum(axis=-1)
+
+        resultado['TOTAL'] = sum(resultado.values()) if resultado else np.zeros((len(ds), dv.shape[1]))
+        return resultado
+
+
+def mercado_da_chain(opcoes: Dict) -> Optional[Dict]:
+    """spot e IVs por código a partir de uma chain do scanner"""
+    if 'erro' in opcoes:
+        return None
+    return {
+        'spot': float(opcoes['preco_atual']),
+        'ivs': {o['codigo']: o['iv'] for o in opcoes['calls'] + opcoes['puts'] if o.get('iv')}
+    }
+
+
+def mercado_das_cotacoes(cotacoes: Dict[str, Dict]) -> Optional[Dict]:
+    """
+    spot e IVs por código a partir de cotações avulsas (monitor de posições
+    ou snapshot), no formato de mercado_da_chain
+
+    O spot vem da cotação ao vivo ('preco_ativo') se houver; senão do snapshot.
+    """
+    spots = [c['preco_ativo'] for c in cotacoes.values() if c.get('preco_ativo')]
+    spots = spots or [c['preco_atual'] for c in cotacoes.values() if c.get('preco_atual')]
+    if not spots:
+        return None
+    return {
+        'spot': float(spots[0]),
+        'ivs': {codigo: c['iv'] for codigo, c in cotacoes.items() if c.get('iv')}
+    }
+
+
+# Teste
+if __name__ == "__main__":
+    agregador = AgregadorRisco(hoje=date(2026, 10, 19))
+    agregador.adicionar({
+        'id': 1, 'ativo': 'PETR4', 'estrategia': 'VENDA_PUT', 'vencimento': '2026-11-20',
+        'codigo_opcao_1': 'PETRW360', 'strike_1': 36.0, 'quantidade_1': 100, 'direcao_1': 'VENDA'
+    })
+    agregador.adicionar({
+        'id': 2, 'ativo': 'PETR4', 'estrategia': 'TRAVA_ALTA_PUT', 'vencimento': '2026-11-20',
+        'codigo_opcao_1': 'PETRW370', 'strike_1': 37.0, 'quantidade_1': 100, 'direcao_1': 'VENDA',
+        'codigo_opcao_2': 'PETRW360', 'strike_2': 36.0, 'quantidade_2': 100, 'direcao_2': 'COMPRA'
+    })
+    agregador.adicionar({
+        'id': 3, 'ativo': 'VALE3', 'estrategia': 'VENDA_COBERTA', 'vencimento': '2026-11-20',
+        'codigo_opcao_1': 'VALEK640', 'strike_1': 64.0, 'quantidade_1': 100, 'direcao_1': 'VENDA'
+    })
+    agregador.atualizar_mercado('PETR4', 38.0, {'PETRW360': 36.0, 'PETRW370': 34.0})
+    agregador.atualizar_mercado('VALE3', 61.5)
+
+    for ativo, g in agregador.gregas_por_ativo().items():
+        print(f"{ativo:6} " + ' '.join(f"{k} {v:>8.2f}" for k, v in g.items()))
+
+    grade = agregador.grade_choques()
+    print(f"\nP&L total (spot × vol):\n{np.round(grade['TOTAL'], 0)}")
+
+    agregador.remover(2)
+    print(f"\nSem a trava: delta PETR4 {agregador.gregas_por_ativo()['PETR4']['delta']:.1f}")
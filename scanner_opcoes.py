@@ -5,41 +5,441 @@ Busca opções reais da B3 (PETRC402, VALEP350, etc)
 Identifica setups RCO conforme curso Jimmy Carvalho
 """
 
-import yfinance as yf
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
 import re
+import time
 import logging
 
+from resultados_compartilhados import SingleFlight
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ESTRATEGIAS = ('VENDA_COBERTA', 'VENDA_PUT', 'TRAVA_ALTA_PUT')
+JANELA_VENCIMENTOS = (20, 90)              # dias até o vencimento buscados (foco RCO)
+IDADE_MAX_DESATUALIZADO = 4 * 24 * 3600.0  # segundos; cobre fim de semana prolongado
+
+# Filtros e pesos dos setups RCO (ScannerOpcoesB3(parametros={...}) sobrescreve)
+PARAMETROS_PADRAO = {
+    # Filtros comuns
+    'iv_min': 30,
+    'dias_min': 30,
+    'dias_max': 60,
+    'volume_min': 10,
+    'oi_min': 50,
+    'score_min': 60,
+    
+    # Venda coberta
+    'delta_min_coberta': 20,
+    'delta_max_coberta': 40,
+    'delta_ideal_coberta': 30,
+    'peso_retorno_coberta': 10,
+    
+    # Venda de put
+    'delta_min_put': 25,
+    'delta_max_put': 40,
+    'delta_ideal_put': 35,
+    'desconto_min': 3,
+    'peso_retorno_put': 8,
+    'peso_desconto_put': 3,
+    
+    # Trava de alta
+    'volume_min_trava': 50,
+    'oi_min_trava': 100,
+    'spread_min': 0.5,
+    'spread_max': 1.0,
+    'rr_min': 0.25,
+    'peso_rr_trava': 100,
+    'rr_bonus_trava': 0.33,
+}
+
+
+class LoteScan(NamedTuple):
+    """Setups de um vencimento de um ativo (ou marcador de fim do ativo)"""
+    ativo: str
+    vencimento: Optional[str]
+    setups: List[Dict]
+    fim_ativo: bool = False
+    erro: Optional[str] = None
+
+
+def primeiros_acima(setups: Iterator[Dict], k: int, score_min: int = 80) -> List[Dict]:
+    """
+    Consome um stream de setups até achar `k` com score >= `score_min`
+    
+    Fecha o stream ao parar: os ativos/vencimentos restantes nem são buscados.
+    """
+    encontrados = []
+    try:
+        for setup in setups:
+            if setup['score'] >= score_min:
+                encontrados.append(setup)
+                if len(encontrados) >= k:
+                    break
+    finally:
+        if hasattr(setups, 'close'):
+            setups.close()
+    return encontrados
+
 
 class ScannerOpcoesB3:
     """Scanner de opções reais da B3"""
     
-    def __init__(self):
+    def __init__(self, ttl_cache_opcoes: float = 60, armazem_snapshots=None,
+                 superficie_vol=None, suavizar_iv: bool = True, parametros: Dict = None,
+                 fonte_dados: Callable = None, servir_desatualizado: bool = True,
+                 idade_max_desatualizado: Optional[float] = IDADE_MAX_DESATUALIZADO,
+                 diretorio_snapshots: Optional[str] = None):
         self.ativos_base = ['PETR4', 'VALE3', 'BBAS3', 'ITUB4', 'BOVA11']
-        self.cache_opcoes = {}
-        
+        self.parametros = {**PARAMETROS_PADRAO, **(parametros or {})}
+        self.cache_opcoes = {}  # ativo -> (instante, opções)
+        self.ttl_cache_opcoes = ttl_cache_opcoes
+        self._single_flight = SingleFlight()
+        # Opcional (snapshots.ArmazemSnapshots): grava cada chain buscada no Yahoo.
+        # Com `diretorio_snapshots` ('' = diretório padrão) o armazém (e o numpy)
+        # só é criado no primeiro uso
+        self._armazem_snapshots = armazem_snapshots
+        self._diretorio_snapshots = diretorio_snapshots
+        # IV do smile ajustado por ativo/vencimento (superficie_vol.SuperficieVol)
+        self.superficie_vol = superficie_vol
+        self.suavizar_iv = suavizar_iv
+        # Fábrica de tickers no formato do yfinance (padrão: yf.Ticker);
+        # gerador_sintetico.GeradorChains serve chains sintéticas para testes de carga
+        # e busca_resiliente.FonteResiliente põe prazos/retentativas/disjuntor no Yahoo
+        self.fonte_dados = fonte_dados
+        # Fonte fora do ar: usa o último snapshot do ativo, marcado 'desatualizado'
+        self.servir_desatualizado = servir_desatualizado
+        # Snapshot mais velho que isso (segundos) não é servido; None = sem limite
+        self.idade_max_desatualizado = idade_max_desatualizado
+        self.desatualizados_servidos = 0
+        
+    @property
+    def armazem_snapshots(self):
+        if self._armazem_snapshots is None and self._diretorio_snapshots is not None:
+            from snapshots import ArmazemSnapshots
+            self._armazem_snapshots = ArmazemSnapshots(self._diretorio_snapshots or None)
+        return self._armazem_snapshots
+    
+    @armazem_snapshots.setter
+    def armazem_snapshots(self, armazem):
+        self._armazem_snapshots = armazem
+    
     def buscar_opcoes_disponiveis(self, ativo: str) -> Dict:
         """
         Busca TODAS as opções disponíveis de um ativo
         
         Retorna códigos REAIS: PETRC402, VALEP350, etc
+        
+        Chamadas simultâneas para o mesmo ativo (várias sessões/abas) fazem
+        uma única busca no Yahoo; o resultado fica em cache por
+        `ttl_cache_opcoes` segundos (os três identificar_* de um scan
+        reaproveitam a mesma chain). Chain com vencimento que falhou
+        ('parcial') não entra no cache nem no snapshot.
+        """
+        em_cache = self._em_cache(ativo)
+        if em_cache is not None:
+            return em_cache
+        
+        def buscar():
+            opcoes = self._buscar_opcoes_yahoo(ativo)
+            if 'erro' in opcoes:
+                return self._chain_desatualizada(ativo) or opcoes
+            self._guardar_snapshot(opcoes)
+            self.aplicar_smile(opcoes)
+            if not opcoes.get('parcial'):
+                self.cache_opcoes[ativo] = (time.monotonic(), opcoes)
+            return opcoes
+        
+        return self._single_flight.executar(ativo, buscar)
+    
+    def _em_cache(self, ativo: str) -> Optional[Dict]:
+        """Chain em cache do ativo, se ainda dentro do ttl"""
+        em_cache = self.cache_opcoes.get(ativo)
+        if em_cache and time.monotonic() - em_cache[0] < self.ttl_cache_opcoes:
+            return em_cache[1]
+        return None
+    
+    def invalidar_cache(self, ativo: str = None):
+        """Descarta a chain em cache de um ativo (ou de todos)"""
+        if ativo is None:
+            self.cache_opcoes.clear()
+        else:
+            self.cache_opcoes.pop(ativo, None)
+    
+    def iterar_chain(self, ativo: str) -> Iterator[Dict]:
+        """
+        Chain de um ativo, um vencimento por vez
+        
+        Usa o cache se a chain estiver válida; senão busca no Yahoo. Streams
+        simultâneos do mesmo ativo fazem uma única busca (o primeiro repassa
+        cada vencimento aos outros). A chain só vai para o cache e para o
+        snapshot se a busca for até o fim sem vencimento com falha: uma
+        chain truncada não substitui a foto do dia.
+        """
+        em_cache = self._em_cache(ativo)
+        if em_cache is not None:
+            yield from self._por_vencimento(em_cache)
+            return
+        
+        yield from self._single_flight.transmitir(ativo, lambda: self._transmitir_chain(ativo))
+    
+    def _transmitir_chain(self, ativo: str) -> Iterator[Dict]:
+        """Partes vindas do cache, do Yahoo ou do último snapshot; cache/snapshot se completa"""
+        # De novo aqui: seguidores que retomam uma transmissão interrompida chegam direto
+        em_cache = self._em_cache(ativo)
+        if em_cache is not None:
+            yield from self._por_vencimento(em_cache)
+            return
+        
+        completa = None
+        for parte in self._iterar_chain_yahoo(ativo):
+            if 'erro' in parte:
+                # Nada entregue ainda: vale o último snapshot, se houver
+                antiga = None if completa and completa['vencimentos'] else self._chain_desatualizada(ativo)
+                if antiga:
+                    yield from self._por_vencimento(antiga)
+                else:
+                    yield parte
+                return
+            if completa is None:
+                completa = {**parte, 'vencimentos': [], 'calls': [], 'puts': []}
+            if parte.get('parcial'):
+                completa['parcial'] = True
+            self.aplicar_smile(parte)
+            completa['vencimentos'].extend(parte['vencimentos'])
+            completa['calls'].extend(parte['calls'])
+            completa['puts'].extend(parte['puts'])
+            if parte['vencimentos']:
+                yield parte
+        
+        # Só chega aqui quem consumiu tudo (parar antes fecha o gerador no yield)
+        if completa is not None and completa['vencimentos'] and not completa.get('parcial'):
+            self.cache_opcoes[ativo] = (time.monotonic(), completa)
+            self._guardar_snapshot(completa)
+    
+    @staticmethod
+    def _por_vencimento(opcoes: Dict) -> Iterator[Dict]:
+        """Uma parte da chain por vencimento (mantém as marcas de desatualizado)"""
+        extras = {k: opcoes[k] for k in ('desatualizado', 'capturado_em') if k in opcoes}
+        for venc in opcoes['vencimentos']:
+            yield {
+                'ativo': opcoes['ativo'],
+                'preco_atual': opcoes['preco_atual'],
+                'vencimentos': [venc],
+                'calls': [c for c in opcoes['calls'] if c['vencimento'] == venc],
+                'puts': [p for p in opcoes['puts'] if p['vencimento'] == venc],
+                **extras
+            }
+    
+    def chain_do_snapshot(self, ativo: str, idade_max: Optional[float] = None) -> Optional[Dict]:
+        """
+        Último snapshot do ativo (smile aplicado), marcado como desatualizado
+        
+        Prazos recontados a partir de hoje e só os vencimentos que uma busca
+        nova traria (JANELA_VENCIMENTOS). None se o snapshot for mais velho
+        que `idade_max` segundos (padrão: idade_max_desatualizado) ou se
+        nenhum vencimento sobrar.
+        """
+        if self.armazem_snapshots is None:
+            return None
+        try:
+            ultimo = self.armazem_snapshots.mais_recente(ativo)
+        except Exception as e:
+            logger.error(f"❌ Erro lendo snapshot {ativo}: {e}")
+            return None
+        if ultimo is None or 'erro' in ultimo[1]:
+            return None
+        
+        opcoes = ultimo[1]
+        idade_max = self.idade_max_desatualizado if idade_max is None else idade_max
+        idade = (datetime.now() - datetime.fromisoformat(opcoes['capturado_em'])).total_seconds()
+        if idade_max is not None and idade > idade_max:
+            logger.warning(f"⚠️ Snapshot de {ativo} ({opcoes['capturado_em'][:16]}) velho demais para servir")
+            return None
+        
+        self._recontar_prazos(opcoes)
+        if not opcoes['vencimentos']:
+            return None
+        opcoes['desatualizado'] = True
+        return self.aplicar_smile(opcoes)
+    
+    @staticmethod
+    def _recontar_prazos(opcoes: Dict):
+        """dias_vencimento a partir de agora; descarta vencimentos fora da janela de busca"""
+        agora = datetime.now()
+        dias_min, dias_max = JANELA_VENCIMENTOS
+        prazos = {v: (datetime.strptime(v, '%Y-%m-%d') - agora).days for v in opcoes['vencimentos']}
+        validos = {v for v, dias in prazos.items() if dias_min <= dias <= dias_max}
+        opcoes['vencimentos'] = [v for v in opcoes['vencimentos'] if v in validos]
+        for lado in ('calls', 'puts'):
+            opcoes[lado] = [
+                {**linha, 'dias_vencimento': prazos[linha['vencimento']]}
+                for linha in opcoes[lado] if linha['vencimento'] in validos
+            ]
+    
+    def _chain_desatualizada(self, ativo: str) -> Optional[Dict]:
+        """Último snapshot do ativo quando a fonte não responde (se servir_desatualizado)"""
+        opcoes = self.chain_do_snapshot(ativo) if self.servir_desatualizado else None
+        if opcoes is None:
+            return None
+        self.desatualizados_servidos += 1
+        logger.warning(f"⚠️ {ativo}: fonte indisponível, usando snapshot de {opcoes['capturado_em'][:16]}")
+        return opcoes
+    
+    def metricas_busca(self) -> Dict:
+        """Latências/contadores da fonte (se ela medir) + chains desatualizadas servidas"""
+        metricas = self.fonte_dados.metricas() if hasattr(self.fonte_dados, 'metricas') else {}
+        return {**metricas, 'desatualizados': self.desatualizados_servidos}
+    
+    def aplicar_smile(self, opcoes: Dict) -> Dict:
+        """
+        Troca a IV de cada contrato pela do smile do ativo/vencimento
+        (preenche strikes sem IV; a original fica em 'iv_mercado')
+        """
+        if not self.suavizar_iv or 'erro' in opcoes:
+            return opcoes
+        if self.superficie_vol is None:
+            from superficie_vol import SuperficieVol
+            self.superficie_vol = SuperficieVol()
+        try:
+            self.superficie_vol.aplicar(opcoes)
+        except Exception as e:
+            logger.warning(f"⚠️ Smile não ajustado para {opcoes.get('ativo')}: {e}")
+        return opcoes
+    
+    def _guardar_snapshot(self, opcoes: Dict):
+        """Grava a chain no histórico de snapshots (se configurado e se não for parcial)"""
+        if self.armazem_snapshots is None or opcoes.get('parcial'):
+            return
+        try:
+            self.armazem_snapshots.salvar(opcoes)
+        except Exception as e:
+            logger.error(f"❌ Erro gravando snapshot {opcoes.get('ativo')}: {e}")
+    
+    def setups(self, opcoes: Dict, estrategias=ESTRATEGIAS) -> List[Dict]:
+        """
+        Setups das estratégias sobre uma chain (ou parte dela), por score
+        
+        Chain de snapshot passa a marca 'desatualizado' (e capturado_em) para os setups.
+        """
+        buscadores = {
+            'VENDA_COBERTA': self.setups_venda_coberta,
+            'VENDA_PUT': self.setups_venda_put,
+            'TRAVA_ALTA_PUT': self.setups_trava_alta
+        }
+        
+        setups = []
+        for estrategia in estrategias:
+            setups.extend(buscadores[estrategia](opcoes))
+        setups.sort(key=lambda x: x['score'], reverse=True)
+        if opcoes.get('desatualizado'):
+            for setup in setups:
+                setup['desatualizado'] = True
+                setup['capturado_em'] = opcoes['capturado_em']
+        return setups
+    
+    def escanear_lotes(self, ativos: List[str], estrategias=ESTRATEGIAS) -> Iterator[LoteScan]:
+        """
+        Scan em streaming: um LoteScan por vencimento processado, em ordem
+        de chegada, e um LoteScan(fim_ativo=True) ao terminar cada ativo
+        """
+        for ativo in ativos:
+            erro = None
+            try:
+                for parte in self.iterar_chain(ativo):
+                    if 'erro' in parte:
+                        break
+                    
+                    setups = self.setups(parte, estrategias)
+                    
+                    yield LoteScan(ativo, parte['vencimentos'][0], setups)
+            except Exception as e:
+                logger.warning(f"⚠️ Erro em {ativo}: {e}")
+                erro = str(e)[:100]
+            
+            yield LoteScan(ativo, None, [], fim_ativo=True, erro=erro)
+    
+    def escanear_stream(self, ativos: List[str], estrategias=ESTRATEGIAS) -> Iterator[Dict]:
+        """Setups pontuados assim que cada vencimento de cada ativo é processado"""
+        for lote in self.escanear_lotes(ativos, estrategias):
+            yield from lote.setups
+    
+    def _buscar_opcoes_yahoo(self, ativo: str) -> Dict:
+        """Busca a chain completa no Yahoo Finance (sem cache)"""
+        todas_opcoes = None
+        for parte in self._iterar_chain_yahoo(ativo):
+            if 'erro' in parte:
+                return parte
+            if todas_opcoes is None:
+                todas_opcoes = parte
+                continue
+            if parte.get('parcial'):
+                todas_opcoes['parcial'] = True
+            todas_opcoes['vencimentos'].extend(parte['vencimentos'])
+            todas_opcoes['calls'].extend(parte['calls'])
+            todas_opcoes['puts'].extend(parte['puts'])
+        return todas_opcoes
+
+    def buscar_vencimentos(self, ativo: str, vencimentos: List[str]) -> Dict:
+        """
+        Só os vencimentos pedidos (AAAA-MM-DD), sem o filtro de prazo do scan
+
+        Para monitorar posições: uma chamada de option_chain por vencimento
+        em vez da chain inteira. Não passa pelo cache nem grava snapshot
+        (a chain parcial não substitui a foto do dia).
+        """
+        if self.fonte_dados is None:
+            import yfinance as yf
+            self.fonte_dados = yf.Ticker
+
+        try:
+            ticker = self.fonte_dados(f"{ativo}.SA")
+            hist = ticker.history(period="1d")
+            if hist.empty:
+                return {'erro': 'Sem dados'}
+            preco_ativo = hist['Close'].iloc[-1]
+        except Exception as e:
+            logger.error(f"Erro buscando preço {ativo}: {e}")
+            return {'erro': str(e)}
+
+        opcoes = {'ativo': ativo, 'preco_atual': preco_ativo, 'vencimentos': [], 'calls': [], 'puts': []}
+        for venc_str in sorted(set(vencimentos)):
+            try:
+                parte = self._parte_vencimento(ativo, preco_ativo, venc_str, ticker.option_chain(venc_str))
+            except Exception as e:
+                logger.error(f"Erro buscando vencimento {ativo} {venc_str}: {e}")
+                continue
+            opcoes['vencimentos'].extend(parte['vencimentos'])
+            opcoes['calls'].extend(parte['calls'])
+            opcoes['puts'].extend(parte['puts'])
+        return opcoes
+
+    def _iterar_chain_yahoo(self, ativo: str) -> Iterator[Dict]:
         """
+        Busca a chain no Yahoo Finance um vencimento por vez (sem cache)
+        
+        O primeiro item traz só o preço (listas vazias); cada item seguinte
+        é a parte da chain de um vencimento. Em falha gera {'erro': ...};
+        se só alguns vencimentos falharem, o último item (listas vazias)
+        vem com 'parcial': True.
+        """
+        if self.fonte_dados is None:
+            # Import tardio: yfinance (e pandas/numpy) só carregam no primeiro scan
+            import yfinance as yf
+            self.fonte_dados = yf.Ticker
+        
         ticker_yf = f"{ativo}.SA"
         
         try:
-            ticker = yf.Ticker(ticker_yf)
+            ticker = self.fonte_dados(ticker_yf)
             
             # Pegar preço atual
             hist = ticker.history(period="1d")
             if hist.empty:
                 logger.warning(f"Sem dados para {ativo}")
-                return {'erro': 'Sem dados'}
+                yield {'erro': 'Sem dados'}
+                return
             
             preco_ativo = hist['Close'].iloc[-1]
             
@@ -48,12 +448,14 @@ class ScannerOpcoesB3:
                 vencimentos = ticker.options
             except:
                 logger.warning(f"Sem opções disponíveis para {ativo}")
-                return {'erro': 'Sem opções'}
+                yield {'erro': 'Sem opções'}
+                return
             
             if not vencimentos:
-                return {'erro': 'Sem vencimentos'}
+                yield {'erro': 'Sem vencimentos'}
+                return
             
-            todas_opcoes = {
+            yield {
                 'ativo': ativo,
                 'preco_atual': preco_ativo,
                 'vencimentos': [],
@@ -62,95 +464,122 @@ class ScannerOpcoesB3:
             }
             
             # Para cada vencimento
+            tentados = falhas = 0
             for venc_str in vencimentos:
+                parte = None
                 try:
                     venc_date = datetime.strptime(venc_str, '%Y-%m-%d')
                     dias_venc = (venc_date - datetime.now()).days
                     
                     # Filtrar apenas 20-90 dias (foco RCO)
-                    if dias_venc < 20 or dias_venc > 90:
+                    if dias_venc < JANELA_VENCIMENTOS[0] or dias_venc > JANELA_VENCIMENTOS[1]:
                         continue
                     
                     # Buscar chain
-                    chain = ticker.option_chain(venc_str)
-                    
-                    # Processar CALLS
-                    for _, row in chain.calls.iterrows():
-                        # Extrair código real da opção
-                        codigo = row.get('contractSymbol', '')
-                        # Limpar código (remover .SA)
-                        codigo = codigo.replace('.SA', '')
-                        
-                        if not codigo:
-                            continue
-                        
-                        call = {
-                            'codigo': codigo,  # Ex: PETRC402
-                            'tipo': 'CALL',
-                            'ativo': ativo,
-                            'strike': row['strike'],
-                            'vencimento': venc_str,
-                            'vencimento_date': venc_date,
-                            'dias_vencimento': dias_venc,
-                            'ultimo_preco': row['lastPrice'],
-                            'bid': row.get('bid', 0),
-                            'ask': row.get('ask', 0),
-                            'volume': row.get('volume', 0),
-                            'open_interest': row.get('openInterest', 0),
-                            'iv': row.get('impliedVolatility', 0) * 100,
-                            'itm': preco_ativo > row['strike'],
-                            'dist_preco_pct': ((row['strike'] - preco_ativo) / preco_ativo) * 100
-                        }
-                        
-                        # Calcular delta aproximado
-                        call['delta'] = self._calcular_delta_aproximado(
-                            'call', preco_ativo, call['strike'], dias_venc, call['iv']/100
-                        )
-                        
-                        todas_opcoes['calls'].append(call)
-                    
-                    # Processar PUTS
-                    for _, row in chain.puts.iterrows():
-                        codigo = row.get('contractSymbol', '').replace('.SA', '')
-                        
-                        if not codigo:
-                            continue
-                        
-                        put = {
-                            'codigo': codigo,  # Ex: PETRP385
-                            'tipo': 'PUT',
-                            'ativo': ativo,
-                            'strike': row['strike'],
-                            'vencimento': venc_str,
-                            'vencimento_date': venc_date,
-                            'dias_vencimento': dias_venc,
-                            'ultimo_preco': row['lastPrice'],
-                            'bid': row.get('bid', 0),
-                            'ask': row.get('ask', 0),
-                            'volume': row.get('volume', 0),
-                            'open_interest': row.get('openInterest', 0),
-                            'iv': row.get('impliedVolatility', 0) * 100,
-                            'itm': preco_ativo < row['strike'],
-                            'dist_preco_pct': ((preco_ativo - row['strike']) / preco_ativo) * 100
-                        }
-                        
-                        put['delta'] = self._calcular_delta_aproximado(
-                            'put', preco_ativo, put['strike'], dias_venc, put['iv']/100
-                        )
-                        
-                        todas_opcoes['puts'].append(put)
-                    
-                    todas_opcoes['vencimentos'].append(venc_str)
+                    tentados += 1
+                    parte = self._parte_vencimento(
+                        ativo, preco_ativo, venc_str, ticker.option_chain(venc_str)
+                    )
                     
                 except Exception as e:
                     logger.error(f"Erro processando vencimento {venc_str}: {e}")
+                    falhas += 1
                     continue
+                
+                yield parte
             
-            return todas_opcoes
+            if tentados and falhas == tentados:
+                yield {'erro': 'Falha em todos os vencimentos'}
+            elif falhas:
+                yield {'ativo': ativo, 'preco_atual': preco_ativo, 'vencimentos': [], 'calls': [], 'puts': [],
+                       'parcial': True}
             
         except Exception as e:
             logger.error(f"Erro buscando opções {ativo}: {e}")
-            return {'erro': str(e)}
+            yield {'erro': str(e)}
+    
+    def _parte_vencimento(self, ativo: str, preco_ativo: float, venc_str: str, chain) -> Dict:
+        """Converte option_chain(venc_str) do yfinance no formato de buscar_opcoes_disponiveis"""
+        venc_date = datetime.strptime(venc_str, '%Y-%m-%d')
+        dias_venc = (venc_date - datetime.now()).days
+        
+        todas_opcoes = {
+            'ativo': ativo,
+            'preco_atual': preco_ativo,
+            'vencimentos': [],
+            'calls': [],
+            'puts': []
+        }
+        
+        # Processar CALLS
+        for _, row in chain.calls.iterrows():
+            # Extrair código real da opção
+            codigo = row.get('contractSymbol', '')
+            # Limpar código (remover .SA)
+            codigo = codigo.replace('.SA', '')
+            
+            if not codigo:
+                continue
+            
+            call = {
+                'codigo': codigo,  # Ex: PETRC402
+                'tipo': 'CALL',
+                'ativo': ativo,
+                'strike': row['strike'],
+                'vencimento': venc_str,
+                'vencimento_date': venc_date,
+                'dias_vencimento': dias_venc,
+                'ultimo_preco': row['lastPrice'],
+                'bid': row.get('bid', 0),
+                'ask': row.get('ask', 0),
+                'volume': row.get('volume', 0),
+                'open_interest': row.get('openInterest', 0),
+                'iv': row.get('impliedVolatility', 0) * 100,
+                'itm': preco_ativo > row['strike'],
+                'dist_preco_pct': ((row['strike'] - preco_ativo) / preco_ativo) * 100
+            }
+            
+            # Calcular delta aproximado
+            call['delta'] = self._calcular_delta_aproximado(
+                'call', preco_ativo, call['strike'], dias_venc, call['iv']/100
+            )
+            
+            todas_opcoes['calls'].append(call)
+        
+        # Processar PUTS
+        for _, row in chain.puts.iterrows():
+            codigo = row.get('contractSymbol', '').replace('.SA', '')
+            
+            if not codigo:
+                continue
+            
+            put = {
+                'codigo': codigo,  # Ex: PETRP385
+                'tipo': 'PUT',
+                'ativo': ativo,
+                'strike': row['strike'],
+                'vencimento': venc_str,
+                'vencimento_date': venc_date,
+                'dias_vencimento': dias_venc,
+                'ultimo_preco': row['lastPrice'],
+                'bid': row.get('bid', 0),
+                'ask': row.get('ask', 0),
+                'volume': row.get('volume', 0),
+                'open_interest': row.get('openInterest', 0),
+                'iv': row.get('impliedVolatility', 0) * 100,
+                'itm': preco_ativo < row['strike'],
+                'dist_preco_pct': ((preco_ativo - row['strike']) / preco_ativo) * 100
+            }
+            
+            put['delta'] = self._calcular_delta_aproximado(
+                'put', preco_ativo, put['strike'], dias_venc, put['iv']/100
+            )
+            
+            todas_opcoes['puts'].append(put)
+        
+        todas_opcoes['vencimentos'].append(venc_str)
+        
+        return todas_opcoes
     
     def _calcular_delta_aproximado(self, tipo: str, S: float, K: float, dias: int, iv: float) -> float:
         """Calcula delta aproximado"""
@@ -180,17 +609,23 @@ class ScannerOpcoesB3:
         if 'erro' in opcoes:
             return []
         
+        return self.setups_venda_coberta(opcoes)[:5]  # Top 5
+    
+    def setups_venda_coberta(self, opcoes: Dict) -> List[Dict]:
+        """Todas as vendas cobertas de uma chain (ou parte dela), por score"""
+        ativo = opcoes['ativo']
+        p = self.parametros
         oportunidades = []
         
         for call in opcoes['calls']:
             # Filtros RCO
-            if call['iv'] < 30:  # IV mínima
+            if call['iv'] < p['iv_min']:  # IV mínima
                 continue
             
-            if call['dias_vencimento'] < 30 or call['dias_vencimento'] > 60:
+            if call['dias_vencimento'] < p['dias_min'] or call['dias_vencimento'] > p['dias_max']:
                 continue
             
-            if call['volume'] < 10 and call['open_interest'] < 50:  # Liquidez
+            if call['volume'] < p['volume_min'] and call['open_interest'] < p['oi_min']:  # Liquidez
                 continue
             
             if call['bid'] <= 0:  # Sem preço bid
@@ -198,7 +633,7 @@ class ScannerOpcoesB3:
             
             # Delta ideal (25-35)
             delta_abs = abs(call['delta'])
-            if delta_abs < 20 or delta_abs > 40:
+            if delta_abs < p['delta_min_coberta'] or delta_abs > p['delta_max_coberta']:
                 continue
             
             # Calcular retorno
@@ -208,7 +643,7 @@ class ScannerOpcoesB3:
             # Score
             score = self._calcular_score_venda_coberta(call, retorno_mensal, opcoes['preco_atual'])
             
-            if score < 60:  # Score mínimo
+            if score < p['score_min']:  # Score mínimo
                 continue
             
             setup = {
@@ -233,7 +668,7 @@ class ScannerOpcoesB3:
                 'resultado_liquido': call['bid'] * 100,
                 'risco_maximo': None,  # Risco é queda da ação
                 'retorno_percentual': retorno_pct,
-                'probabilidade_sucesso': 100 - delta_abs,  # Prob OTM
+                'probabilidade_sucesso': None,  # POP lognormal (_aplicar_probabilidades)
                 
                 # Dados
                 'vencimento': call['vencimento'],
@@ -247,8 +682,9 @@ class ScannerOpcoesB3:
             oportunidades.append(setup)
         
         # Ordenar por score
+        self._aplicar_probabilidades(oportunidades)
         oportunidades.sort(key=lambda x: x['score'], reverse=True)
-        return oportunidades[:5]  # Top 5
+        return oportunidades
     
     def identificar_venda_put(self, ativo: str) -> List[Dict]:
         """
@@ -264,17 +700,23 @@ class ScannerOpcoesB3:
         if 'erro' in opcoes:
             return []
         
+        return self.setups_venda_put(opcoes)[:5]
+    
+    def setups_venda_put(self, opcoes: Dict) -> List[Dict]:
+        """Todas as vendas de put de uma chain (ou parte dela), por score"""
+        ativo = opcoes['ativo']
+        p = self.parametros
         oportunidades = []
         
         for put in opcoes['puts']:
             # Filtros
-            if put['iv'] < 30:
+            if put['iv'] < p['iv_min']:
                 continue
             
-            if put['dias_vencimento'] < 30 or put['dias_vencimento'] > 60:
+            if put['dias_vencimento'] < p['dias_min'] or put['dias_vencimento'] > p['dias_max']:
                 continue
             
-            if put['volume'] < 10 and put['open_interest'] < 50:
+            if put['volume'] < p['volume_min'] and put['open_interest'] < p['oi_min']:
                 continue
             
             if put['bid'] <= 0:
@@ -282,14 +724,14 @@ class ScannerOpcoesB3:
             
             # Delta ideal (-25 a -35)
             delta_abs = abs(put['delta'])
-            if delta_abs < 25 or delta_abs > 40:
+            if delta_abs < p['delta_min_put'] or delta_abs > p['delta_max_put']:
                 continue
             
             # Calcular PM e desconto
             pm = put['strike'] - put['bid']
             desconto_pct = ((opcoes['preco_atual'] - pm) / opcoes['preco_atual']) * 100
             
-            if desconto_pct < 3:  # Mínimo 3% desconto
+            if desconto_pct < p['desconto_min']:  # Mínimo 3% desconto
                 continue
             
             # Retorno
@@ -299,7 +741,7 @@ class ScannerOpcoesB3:
             # Score
             score = self._calcular_score_venda_put(put, retorno_mensal, desconto_pct)
             
-            if score < 60:
+            if score < p['score_min']:
                 continue
             
             setup = {
@@ -321,7 +763,7 @@ class ScannerOpcoesB3:
                 'resultado_liquido': put['bid'] * 100,
                 'risco_maximo': put['strike'] * 100,
                 'retorno_percentual': retorno_pct,
-                'probabilidade_sucesso': 100 - delta_abs,
+                'probabilidade_sucesso': None,
                 
                 'vencimento': put['vencimento'],
                 'dias_vencimento': put['dias_vencimento'],
@@ -335,8 +777,9 @@ class ScannerOpcoesB3:
             
             oportunidades.append(setup)
         
+        self._aplicar_probabilidades(oportunidades)
         oportunidades.sort(key=lambda x: x['score'], reverse=True)
-        return oportunidades[:5]
+        return oportunidades
     
     def identificar_trava_alta(self, ativo: str) -> List[Dict]:
         """
@@ -352,14 +795,20 @@ class ScannerOpcoesB3:
         if 'erro' in opcoes:
             return []
         
+        return self.setups_trava_alta(opcoes)[:5]
+    
+    def setups_trava_alta(self, opcoes: Dict) -> List[Dict]:
+        """Todas as travas de alta de uma chain (ou parte dela), por score"""
+        ativo = opcoes['ativo']
+        p = self.parametros
         oportunidades = []
         
         # Agrupar puts por vencimento
         puts_por_venc = {}
         for put in opcoes['puts']:
-            if put['iv'] < 30:
+            if put['iv'] < p['iv_min']:
                 continue
-            if put['volume'] < 50 and put['open_interest'] < 100:  # Liquidez maior para travas
+            if put['volume'] < p['volume_min_trava'] and put['open_interest'] < p['oi_min_trava']:  # Liquidez maior para travas
                 continue
             
             venc = put['vencimento']
@@ -377,7 +826,7 @@ class ScannerOpcoesB3:
                 for put_comp in puts_list[i+1:]:
                     # Spread máximo R$1 para ações até R$25
                     spread = put_vend['strike'] - put_comp['strike']
-                    if spread > 1.0 or spread < 0.5:
+                    if spread > p['spread_max'] or spread < p['spread_min']:
                         continue
                     
                     # Calcular crédito
@@ -392,7 +841,7 @@ class ScannerOpcoesB3:
                     risco_retorno = credito / prejuizo_max
                     
                     # Filtrar por risco/retorno (mínimo 0,25 = 1:4)
-                    if risco_retorno < 0.25:
+                    if risco_retorno < p['rr_min']:
                         continue
                     
                     retorno_pct = (credito / prejuizo_max) * 100
@@ -400,7 +849,7 @@ class ScannerOpcoesB3:
                     # Score
                     score = self._calcular_score_trava(risco_retorno, retorno_pct, put_vend['iv'])
                     
-                    if score < 60:
+                    if score < p['score_min']:
                         continue
                     
                     setup = {
@@ -430,7 +879,7 @@ class ScannerOpcoesB3:
                         'resultado_liquido': credito * 100,
                         'risco_maximo': prejuizo_max * 100,
                         'retorno_percentual': retorno_pct,
-                        'probabilidade_sucesso': 65,  # Estimado
+                        'probabilidade_sucesso': None,
                         'risco_retorno': risco_retorno,
                         
                         'vencimento': venc,
@@ -443,21 +892,31 @@ class ScannerOpcoesB3:
                     
                     oportunidades.append(setup)
         
+        self._aplicar_probabilidades(oportunidades)
         oportunidades.sort(key=lambda x: x['score'], reverse=True)
-        return oportunidades[:5]
+        return oportunidades
+    
+    def _aplicar_probabilidades(self, oportunidades: List[Dict]):
+        """Probabilidade de lucro no vencimento (lognormal, IV do setup)"""
+        if not oportunidades:
+            return
+        from probabilidade import pop_lote
+        
+        for setup, prob in zip(oportunidades, pop_lote(oportunidades)):
+            setup['probabilidade_sucesso'] = float(prob)
     
     def _calcular_score_venda_coberta(self, call: Dict, ret_mensal: float, preco_ativo: float) -> int:
         """Calcula score para venda coberta"""
         score = 0
         
         # Retorno mensal (0-40 pts)
-        score += min(ret_mensal * 10, 40)
+        score += min(ret_mensal * self.parametros['peso_retorno_coberta'], 40)
         
         # IV alta (0-20 pts)
         score += min(call['iv'] / 2, 20)
         
         # Delta próximo 30 (0-20 pts)
-        delta_ideal = 30
+        delta_ideal = self.parametros['delta_ideal_coberta']
         delta_diff = abs(abs(call['delta']) - delta_ideal)
         score += max(0, 20 - delta_diff)
         
@@ -474,16 +933,16 @@ class ScannerOpcoesB3:
         score = 0
         
         # Retorno mensal (0-30 pts)
-        score += min(ret_mensal * 8, 30)
+        score += min(ret_mensal * self.parametros['peso_retorno_put'], 30)
         
         # Desconto (0-30 pts)
-        score += min(desconto * 3, 30)
+        score += min(desconto * self.parametros['peso_desconto_put'], 30)
         
         # IV alta (0-20 pts)
         score += min(put['iv'] / 2, 20)
         
         # Delta próximo 35 (0-20 pts)
-        delta_diff = abs(abs(put['delta']) - 35)
+        delta_diff = abs(abs(put['delta']) - self.parametros['delta_ideal_put'])
         score += max(0, 20 - delta_diff)
         
         return int(min(score, 100))
@@ -493,7 +952,7 @@ class ScannerOpcoesB3:
         score = 0
         
         # Risco/Retorno (0-40 pts)
-        score += min(rr * 100, 40)
+        score += min(rr * self.parametros['peso_rr_trava'], 40)
         
         # Retorno % (0-30 pts)
         score += min(ret_pct, 30)
@@ -502,7 +961,7 @@ class ScannerOpcoesB3:
         score += min(iv / 2, 20)
         
         # Bonus se R/R > 0.33 (0-10 pts)
-        if rr >= 0.33:
+        if rr >= self.parametros['rr_bonus_trava']:
             score += 10
         
         return int(min(score, 100))
@@ -0,0 +1,243 @@
+"""
+Snapshots de Chains - RCO Scanner
+==================================
+Histórico das chains de opções em disco, uma foto por ativo por dia
+
+Cada snapshot é um .npz colunar (um array por campo) em
+dados/snapshots/<ATIVO>/<AAAA-MM-DD>.npz. O scanner grava a chain a cada
+busca no Yahoo (a última do dia prevalece); backtest e análises leem daqui.
+"""
+
+import io
+import os
+import logging
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DIRETORIO_PADRAO = os.path.join('dados', 'snapshots')
+
+COLUNAS_TEXTO = ('codigo', 'tipo', 'vencimento')
+COLUNAS_NUMERICAS = ('strike', 'bid', 'ask', 'ultimo_preco', 'volume', 'open_interest', 'iv', 'delta')
+
+
+def como_data(valor) -> date:
+    """date a partir de date, datetime ou texto AAAA-MM-DD"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+class ArmazemSnapshots:
+    """Leitura e gravação de snapshots de chains"""
+
+    def __init__(self, diretorio: str = None):
+        self.diretorio = diretorio or os.getenv('RCO_SNAPSHOTS_DIR', DIRETORIO_PADRAO)
+
+    def _caminho(self, ativo: str, data: date) -> str:
+        return os.path.join(self.diretorio, ativo, f"{data.isoformat()}.npz")
+
+    # ========================================================================
+    # GRAVAÇÃO
+    # ========================================================================
+
+    def salvar(self, opcoes: Dict, data: date = None, capturado_em: datetime = None) -> Optional[str]:
+        """
+        Grava a chain (formato de buscar_opcoes_disponiveis) como snapshot do dia
+
+        Returns:
+            Caminho do arquivo ou None se a chain estiver vazia/com erro
+        """
+        if 'erro' in opcoes or not (opcoes.get('calls') or opcoes.get('puts')):
+            return None
+
+        capturado_em = capturado_em or datetime.now()
+        data = como_data(data or capturado_em)
+        linhas = opcoes['calls'] + opcoes['puts']
+
+        arrays = {
+            'preco_atual': np.array(float(opcoes['preco_atual'])),
+            'capturado_em': np.array(capturado_em.isoformat())
+        }
+        for coluna in COLUNAS_TEXTO:
+            arrays[coluna] = np.array([str(linha.get(coluna) or '') for linha in linhas])
+        for coluna in COLUNAS_NUMERICAS:
+            arrays[coluna] = np.array([linha.get(coluna) or 0 for linha in linhas], dtype=np.float64)
+        # Snapshot guarda a IV cotada, não a do smile
+        arrays['iv'] = np.array([linha.get('iv_mercado', linha.get('iv')) or 0 for linha in linhas], dtype=np.float64)
+
+        caminho = self._caminho(opcoes['ativo'], data)
+        try:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            buffer = io.BytesIO()
+            np.savez_compressed(buffer, **arrays)
+            temporario = caminho + '.tmp'
+            with open(temporario, 'wb') as f:
+                f.write(buffer.getvalue())
+            os.replace(temporario, caminho)
+            return caminho
+        except Exception as e:
+            logger.error(f"❌ Erro gravando snapshot {opcoes['ativo']}: {e}")
+            return None
+
+    # ========================================================================
+    # LEITURA
+    # ========================================================================
+
+    def ativos(self) -> List[str]:
+        """Ativos com pelo menos um snapshot"""
+        if not os.path.isdir(self.diretorio):
+            return []
+        return sorted(
+            nome for nome in os.listdir(self.diretorio)
+            if os.path.isdir(os.path.join(self.diretorio, nome))
+        )
+
+    def datas(self, ativo: str, inicio: date = None, fim: date = None) -> List[date]:
+        """Datas com snapshot do ativo (ordenadas), opcionalmente num intervalo"""
+        pasta = os.path.join(self.diretorio, ativo)
+        if not os.path.isdir(pasta):
+            return []
+
+        datas = []
+        for nome in os.listdir(pasta):
+            if not nome.endswith('.npz'):
+                continue
+            try:
+                data = date.fromisoformat(nome[:-4])
+            except ValueError:
+                continue
+            if (inicio is None or data >= como_data(inicio)) and (fim is None or data <= como_data(fim)):
+                datas.append(data)
+        return sorted(datas)
+
+    def modificado_em(self, ativo: str, data: date) -> Optional[float]:
+        """mtime do arquivo do snapshot (muda quando o dia é regravado); None se não existir"""
+        try:
+            return os.path.getmtime(self._caminho(ativo, como_data(data)))
+        except OSError:
+            return None
+
+    def carregar_colunas(self, ativo: str, data: date) -> Optional[Dict[str, np.ndarray]]:
+        """Snapshot cru: um array por coluna + 'preco_atual' e 'capturado_em' escalares"""
+        caminho = self._caminho(ativo, como_data(data))
+        try:
+            with np.load(caminho, allow_pickle=False) as npz:
+                colunas = {nome: npz[nome] for nome in npz.files}
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"❌ Snapshot ilegível {caminho}: {e}")
+            return None
+
+        colunas['preco_atual'] = float(colunas['preco_atual'])
+        colunas['capturado_em'] = str(colunas['capturado_em'])
+        return colunas
+
+    def carregar_periodo(self, ativo: str, inicio: date = None, fim: date = None) -> Dict[date, Dict]:
+        """Snapshots crus do intervalo, lidos uma vez só: {data: colunas}"""
+        periodo = {}
+        for data in self.datas(ativo, inicio, fim):
+            colunas = self.carregar_colunas(ativo, data)
+            if colunas is not None:
+                periodo[data] = colunas
+        return periodo
+
+    def carregar(self, ativo: str, data: date, colunas: Dict = None) -> Dict:
+        """
+        Snapshot no formato de buscar_opcoes_disponiveis (prazos contados
+        a partir da data do snapshot), pronto para os setups_* do scanner
+
+        `colunas` evita reler o arquivo quando o snapshot cru já está em memória.
+        """
+        data = como_data(data)
+        if colunas is None:
+            colunas = self.carregar_colunas(ativo, data)
+        if colunas is None:
+            return {'erro': 'Sem snapshot'}
+
+        preco = colunas['preco_atual']
+        opcoes = {
+            'ativo': ativo,
+            'preco_atual': preco,
+            'capturado_em': colunas['capturado_em'],
+            'vencimentos': sorted(set(colunas['vencimento'].tolist())),
+            'calls': [],
+            'puts': []
+        }
+
+        prazos = {v: (date.fromisoformat(v) - data).days for v in opcoes['vencimentos']}
+        for i in range(len(colunas['codigo'])):
+            linha = {coluna: colunas[coluna][i].item() for coluna in COLUNAS_TEXTO + COLUNAS_NUMERICAS}
+            linha['ativo'] = ativo
+            linha['dias_vencimento'] = prazos[linha['vencimento']]
+            if linha['tipo'] == 'CALL':
+                linha['itm'] = preco > linha['strike']
+                linha['dist_preco_pct'] = ((linha['strike'] - preco) / preco) * 100
+                opcoes['calls'].append(linha)
+            else:
+                linha['itm'] = preco < linha['strike']
+                linha['dist_preco_pct'] = ((preco - linha['strike']) / preco) * 100
+                opcoes['puts'].append(linha)
+
+        return opcoes
+
+    def mais_recente(self, ativo: str) -> Optional[Tuple[date, Dict]]:
+        """(data, chain) do snapshot mais novo do ativo"""
+        datas = self.datas(ativo)
+        if not datas:
+            return None
+        return datas[-1], self.carregar(ativo, datas[-1])
+
+    def carregar_tabela(self, ativo: str, inicio: date = None, fim: date = None,
+                        periodo: Dict[date, Dict] = None):
+        """
+        Todos os snapshots do intervalo num DataFrame longo (uma linha por
+        opção por dia, com colunas 'data' e 'preco_atual')
+
+        `periodo` (de carregar_periodo) evita reler os arquivos.
+        """
+        import pandas as pd
+
+        if periodo is None:
+            periodo = self.carregar_periodo(ativo, inicio, fim)
+
+        partes = []
+        for data, colunas in sorted(periodo.items()):
+            n = len(colunas['codigo'])
+            partes.append(pd.DataFrame({
+                'data': np.full(n, np.datetime64(data, 'D')),
+                'preco_atual': np.full(n, colunas['preco_atual']),
+                **{coluna: colunas[coluna] for coluna in COLUNAS_TEXTO + COLUNAS_NUMERICAS}
+            }))
+
+        if not partes:
+            return pd.DataFrame(columns=['data', 'preco_atual', *COLUNAS_TEXTO, *COLUNAS_NUMERICAS])
+        return pd.concat(partes, ignore_index=True)
+
+
+# Teste
+if __name__ == "__main__":
+    import tempfile
+
+    armazem = ArmazemSnapshots(tempfile.mkdtemp())
+    chain = {
+        'ativo': 'PETR4',
+        'preco_atual': 38.5,
+        'calls': [{'codigo': 'PETRK400', 'tipo': 'CALL', 'vencimento': '2026-11-20', 'strike': 40.0,
+                   'bid': 0.8, 'ask': 0.85, 'ultimo_preco': 0.82, 'volume': 120, 'open_interest': 800,
+                   'iv': 34.0, 'delta': 36.0}],
+        'puts': [{'codigo': 'PETRW370', 'tipo': 'PUT', 'vencimento': '2026-11-20', 'strike': 37.0,
+                  'bid': 0.7, 'ask': 0.74, 'ultimo_preco': 0.71, 'volume': 90, 'open_interest': 600,
+                  'iv': 36.0, 'delta': -32.0}]
+    }
+    print(f"Gravado: {armazem.salvar(chain, date(2026, 10, 19))}")
+    data, recarregada = armazem.mais_recente('PETR4')
+    print(f"{data}: {len(recarregada['calls'])} calls, {len(recarregada['puts'])} puts, "
+          f"{recarregada['puts'][0]['dias_vencimento']} dias")
@@ -4,17 +4,19 @@ Cliente Supabase - RCO Scanner
 Integração com banco de dados PostgreSQL (Supabase)
 """
 
-from supabase import create_client, Client
 import os
+import threading
 from typing import Dict, List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
 
+from armazenamento import BackendRCO
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class SupabaseRCO:
+class SupabaseRCO(BackendRCO):
     """Cliente para interagir com Supabase"""
     
     def __init__(self, url: str = None, key: str = None):
@@ -25,8 +27,21 @@ class SupabaseRCO:
         if not self.url or not self.key:
             raise ValueError("SUPABASE_URL e SUPABASE_KEY são obrigatórios")
         
-        self.client: Client = create_client(self.url, self.key)
-        logger.info("✅ Conectado ao Supabase")
+        # Conexão adiada para a primeira consulta (não atrasa o carregamento da página)
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.handler_logs = None
+    
+    @property
+    def client(self):
+        """Cliente Supabase, criado na primeira consulta"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from supabase import create_client
+                    self._client = create_client(self.url, self.key)
+                    logger.info("✅ Conectado ao Supabase")
+        return self._client
     
     # ========================================================================
     # OPORTUNIDADES
@@ -80,37 +95,7 @@ class SupabaseRCO:
         Marca que usuário ENTROU na operação
         Cria registro em posicoes_abertas para monitorar
         """
-        posicao = {
-            'oportunidade_id': oportunidade_id,
-            'ativo': oportunidade['ativo'],
-            'estrategia': oportunidade['estrategia'],
-            'vencimento': oportunidade['vencimento'],
-            
-            # Perna 1
-            'codigo_opcao_1': oportunidade['codigo_opcao_1'],
-            'strike_1': oportunidade['strike_1'],
-            'preco_entrada_1': oportunidade['preco_1'],
-            'quantidade_1': oportunidade['quantidade_1'],
-            'direcao_1': oportunidade['direcao_1'],
-            
-            # Perna 2 (se tiver)
-            'codigo_opcao_2': oportunidade.get('codigo_opcao_2'),
-            'strike_2': oportunidade.get('strike_2'),
-            'preco_entrada_2': oportunidade.get('preco_2'),
-            'quantidade_2': oportunidade.get('quantidade_2'),
-            'direcao_2': oportunidade.get('direcao_2'),
-            
-            # Valores
-            'credito_entrada': oportunidade.get('credito_total', 0),
-            'debito_entrada': oportunidade.get('debito_total', 0),
-            'resultado_entrada': oportunidade.get('resultado_liquido', 0),
-            'risco_maximo': oportunidade.get('risco_maximo'),
-            'lucro_maximo': oportunidade.get('resultado_liquido', 0),  # Para vendas
-            
-            # Status
-            'ativa': True,
-            'dias_aberta': 0
-        }
+        posicao = self._montar_posicao(oportunidade_id, oportunidade)
         
         try:
             result = self.client.table('posicoes_abertas').insert(posicao).execute()
@@ -166,7 +151,7 @@ class SupabaseRCO:
             self.client.table('posicoes_abertas')\
                 .update({
                     'ativa': False,
-                    'data_fechamento': datetime.now().isoformat(),
+                    'data_fechamento': datetime.now(timezone.utc).isoformat(),
                     'motivo_fechamento': motivo,
                     'resultado_final': resultado_final
                 })\
@@ -174,21 +159,7 @@ class SupabaseRCO:
                 .execute()
             
             # Adicionar ao histórico
-            dias_mantida = (datetime.now() - datetime.fromisoformat(posicao['created_at'].replace('Z', '+00:00'))).days
-            
-            historico = {
-                'posicao_id': posicao_id,
-                'ativo': posicao['ativo'],
-                'estrategia': posicao['estrategia'],
-                'data_entrada': posicao['created_at'],
-                'data_saida': datetime.now().isoformat(),
-                'dias_mantida': dias_mantida,
-                'valor_entrada': posicao['resultado_entrada'],
-                'valor_saida': resultado_final,
-                'resultado': resultado_final - posicao['resultado_entrada'],
-                'retorno_percentual': ((resultado_final - posicao['resultado_entrada']) / abs(posicao['resultado_entrada'])) * 100 if posicao['resultado_entrada'] != 0 else 0,
-                'motivo': motivo
-            }
+            historico = self._montar_historico(posicao_id, posicao, motivo, resultado_final)
             
             self.client.table('historico_operacoes').insert(historico).execute()
             
@@ -242,7 +213,7 @@ class SupabaseRCO:
         """Salva/atualiza uma configuração"""
         try:
             self.client.table('configuracoes')\
-                .upsert({'chave': chave, 'valor': valor})\
+                .upsert({'chave': chave, 'valor': valor}, on_conflict='chave')\
                 .execute()
             return True
         except Exception as e:
@@ -258,21 +229,96 @@ class SupabaseRCO:
             logger.error(f"❌ Erro ao obter configs: {e}")
             return {}
     
+    def versao_configs(self) -> Optional[str]:
+        """Maior updated_at + total de linhas, numa consulta só"""
+        try:
+            result = self.client.table('configuracoes')\
+                .select('updated_at', count='exact')\
+                .order('updated_at', desc=True)\
+                .limit(1)\
+                .execute()
+            ultima = result.data[0]['updated_at'] if result.data else None
+            return f"{ultima}|{result.count}"
+        except Exception as e:
+            logger.error(f"❌ Erro ao obter versão das configs: {e}")
+            return None
+    
+    # ========================================================================
+    # ESTADO DOS ALERTAS
+    # ========================================================================
+    
+    def listar_estado_alertas(self) -> List[Dict]:
+        """Lista o último envio de cada alerta (tipo, chave, faixa)"""
+        try:
+            result = self.client.table('alertas_enviados').select('*').execute()
+            return result.data if result.data else []
+        except Exception as e:
+            logger.error(f"❌ Erro ao listar estado dos alertas: {e}")
+            return []
+    
+    def salvar_estado_alerta(self, registro: Dict) -> bool:
+        """Salva/atualiza o último envio de um alerta"""
+        try:
+            self.client.table('alertas_enviados')\
+                .upsert(registro, on_conflict='tipo,chave,faixa')\
+                .execute()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar estado do alerta: {e}")
+            return False
+    
+    # ========================================================================
+    # REGRAS DE ALERTA
+    # ========================================================================
+    
+    def listar_regras_alerta(self) -> List[Dict]:
+        """Lista os limites de alerta (globais, por estratégia e por posição)"""
+        try:
+            result = self.client.table('regras_alerta').select('*').execute()
+            return result.data if result.data else []
+        except Exception as e:
+            logger.error(f"❌ Erro ao listar regras de alerta: {e}")
+            return []
+    
+    def salvar_regra_alerta(self, regra: Dict) -> bool:
+        """Salva/atualiza o limite de um tipo de alerta num escopo"""
+        try:
+            self.client.table('regras_alerta')\
+                .upsert({**regra, 'alvo': regra.get('alvo') or ''}, on_conflict='escopo,alvo,tipo')\
+                .execute()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar regra de alerta: {e}")
+            return False
+    
+    def remover_regra_alerta(self, escopo: str, alvo: str, tipo: str) -> bool:
+        """Apaga uma regra (passa a valer a do escopo menos específico)"""
+        try:
+            self.client.table('regras_alerta')\
+                .delete()\
+                .eq('escopo', escopo)\
+                .eq('alvo', alvo or '')\
+                .eq('tipo', tipo)\
+                .execute()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao remover regra de alerta: {e}")
+            return False
+    
     # ========================================================================
     # LOGS
     # ========================================================================
     
-    def log(self, nivel: str, categoria: str, mensagem: str, dados: Dict = None):
-        """Registra um log"""
+    def inserir_logs(self, registros: List[Dict]) -> bool:
+        """Insere vários logs em um único insert"""
+        if not registros:
+            return True
         try:
-            self.client.table('logs').insert({
-                'nivel': nivel,
-                'categoria': categoria,
-                'mensagem': mensagem,
-                'dados': dados
-            }).execute()
+            self.client.table('logs').insert(registros).execute()
+            return True
         except Exception as e:
-            logger.error(f"❌ Erro ao salvar log: {e}")
+            logger.error(f"❌ Erro ao salvar lote de logs: {e}")
+            return False
 
 
 # Teste
@@ -0,0 +1,206 @@
+"""
+Superfície de Volatilidade - RCO Scanner
+=========================================
+Smile de volatilidade por ativo e vencimento
+
+A IV de cada contrato no Yahoo é ruidosa e falta nos strikes ilíquidos.
+Aqui ajustamos, por ativo/vencimento, uma parábola ponderada na
+log-moneyness (ln K/S): peso pela liquidez, opções OTM valem mais e
+pontos fora da curva (> 3 desvios robustos) são descartados antes do
+ajuste final. Fora da faixa de strikes usados, a IV fica constante
+(sem extrapolar a parábola).
+
+O ajuste fica em cache e só é refeito quando o mercado muda de verdade:
+o spot anda mais que `variacao_spot` ou as IVs novas se afastam da curva
+mais que `erro_max` pontos (desvio robusto).
+"""
+
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIN_PONTOS = 4
+IV_MIN, IV_MAX = 1.0, 300.0  # % - fora disso é lixo de cotação
+
+
+class AjusteSmile(NamedTuple):
+    """Parábola iv(k) = a + b·k + c·k², k = ln(K/S), IV em %"""
+    coeficientes: Tuple[float, float, float]
+    spot: float
+    k_min: float
+    k_max: float
+    n_pontos: int
+    rmse: float
+    ajustado_em: datetime
+
+    def iv(self, strikes, spot: float = None) -> np.ndarray:
+        """IV suavizada (%) para qualquer strike (vetorizada)"""
+        k = np.log(np.asarray(strikes, dtype=np.float64) / (spot or self.spot))
+        k = np.clip(k, self.k_min, self.k_max)
+        a, b, c = self.coeficientes
+        return np.clip(a + b * k + c * k * k, IV_MIN, IV_MAX)
+
+
+def _pontos_validos(spot: float, strikes, ivs, pesos) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    strikes = np.asarray(strikes, dtype=np.float64)
+    ivs = np.asarray(ivs, dtype=np.float64)
+    pesos = np.asarray(pesos, dtype=np.float64)
+    validos = (strikes > 0) & np.isfinite(ivs) & (ivs >= IV_MIN) & (ivs <= IV_MAX) & (pesos > 0)
+    return np.log(strikes[validos] / spot), ivs[validos], pesos[validos]
+
+
+def ajustar_smile(spot: float, strikes, ivs, pesos=None) -> Optional[AjusteSmile]:
+    """
+    Ajusta a parábola ponderada; None se houver menos de MIN_PONTOS válidos
+
+    Args:
+        pesos: confiança de cada ponto (ex: liquidez); padrão 1
+    """
+    if pesos is None:
+        pesos = np.ones(len(strikes))
+    k, iv, w = _pontos_validos(spot, strikes, ivs, pesos)
+    if len(k) < MIN_PONTOS:
+        return None
+
+    def _mq(k, iv, w):
+        X = np.column_stack([np.ones_like(k), k, k * k])
+        raiz_w = np.sqrt(w)
+        coef, *_ = np.linalg.lstsq(X * raiz_w[:, None], iv * raiz_w, rcond=None)
+        return coef, iv - X @ coef
+
+    coef, residuos = _mq(k, iv, w)
+
+    # Descarta outliers (desvio absoluto mediano) e reajusta
+    mad = np.median(np.abs(residuos - np.median(residuos))) * 1.4826
+    if mad > 0:
+        manter = np.abs(residuos) <= 3 * mad
+        if manter.sum() >= MIN_PONTOS and not manter.all():
+            k, iv, w = k[manter], iv[manter], w[manter]
+            coef, residuos = _mq(k, iv, w)
+
+    rmse = float(np.sqrt(np.average(residuos ** 2, weights=w)))
+    return AjusteSmile(tuple(float(c) for c in coef), float(spot), float(k.min()), float(k.max()),
+                       int(len(k)), rmse, datetime.now())
+
+
+def _pesos_liquidez(opcoes: List[Dict], spot: float) -> np.ndarray:
+    """Peso por liquidez (raiz de volume + OI) com bônus para OTM"""
+    liquidez = np.array([(o.get('volume') or 0) + (o.get('open_interest') or 0) for o in opcoes], dtype=np.float64)
+    otm = np.array([(o['strike'] > spot) if o['tipo'] == 'CALL' else (o['strike'] < spot) for o in opcoes])
+    tem_bid = np.array([(o.get('bid') or 0) > 0 for o in opcoes])
+    return np.sqrt(1 + np.nan_to_num(liquidez)) * np.where(otm, 2.0, 1.0) * np.where(tem_bid, 1.0, 0.2)
+
+
+class SuperficieVol:
+    """Cache de smiles por (ativo, vencimento), com reajuste só em mudança material"""
+
+    def __init__(self, variacao_spot: float = 0.02, erro_max: float = 3.0):
+        """
+        Args:
+            variacao_spot: movimento do spot (fração) que força reajuste
+            erro_max: desvio (pontos de IV) das cotações novas contra a curva que força reajuste
+        """
+        self.variacao_spot = variacao_spot
+        self.erro_max = erro_max
+        self._ajustes: Dict[Tuple[str, str], AjusteSmile] = {}
+        self._lock = threading.Lock()
+        self.ajustes_feitos = 0
+        self.ajustes_reaproveitados = 0
+
+    def obter(self, ativo: str, vencimento: str) -> Optional[AjusteSmile]:
+        return self._ajustes.get((ativo, vencimento))
+
+    def _mudou(self, ajuste: AjusteSmile, spot: float, strikes, ivs, pesos) -> bool:
+        if abs(spot / ajuste.spot - 1) > self.variacao_spot:
+            return True
+        k, iv, w = _pontos_validos(spot, strikes, ivs, pesos)
+        if len(k) < MIN_PONTOS:
+            return False
+        previsto = ajuste.iv(np.exp(k) * spot)
+        # Desvio robusto: uma cotação absurda não basta para reajustar
+        erro = 1.4826 * np.median(np.abs(iv - previsto))
+        return erro > max(self.erro_max, 1.5 * ajuste.rmse)
+
+    def atualizar(self, ativo: str, vencimento: str, spot: float, strikes, ivs, pesos=None) -> Optional[AjusteSmile]:
+        """Smile do ativo/vencimento, reajustando só se o mercado mudou"""
+        if pesos is None:
+            pesos = np.ones(len(strikes))
+        chave = (ativo, vencimento)
+        atual = self._ajustes.get(chave)
+
+        if atual is not None and not self._mudou(atual, spot, strikes, ivs, pesos):
+            self.ajustes_reaproveitados += 1
+            return atual
+
+        ajuste = ajustar_smile(spot, strikes, ivs, pesos)
+        if ajuste is None:
+            return atual
+        with self._lock:
+            self._ajustes[chave] = ajuste
+            self.ajustes_feitos += 1
+        return ajuste
+
+    def iv(self, ativo: str, vencimento: str, strikes, spot: float = None) -> Optional[np.ndarray]:
+        """IVs suavizadas (%) para os strikes; None se não houver ajuste"""
+        ajuste = self._ajustes.get((ativo, vencimento))
+        return ajuste.iv(strikes, spot) if ajuste is not None else None
+
+    def aplicar(self, opcoes: Dict) -> Dict:
+        """
+        Suaviza a chain (formato de buscar_opcoes_disponiveis) no lugar:
+        'iv_mercado' guarda a IV original e 'iv' passa a ser a do smile
+        (preenchendo strikes sem IV). Vencimentos sem pontos suficientes
+        ficam com a IV original.
+        """
+        if 'erro' in opcoes:
+            return opcoes
+
+        spot = float(opcoes['preco_atual'])
+        por_vencimento: Dict[str, List[Dict]] = {}
+        for opcao in opcoes['calls'] + opcoes['puts']:
+            if 'iv_mercado' not in opcao:
+                opcao['iv_mercado'] = opcao.get('iv') or 0
+            por_vencimento.setdefault(opcao['vencimento'], []).append(opcao)
+
+        for vencimento, lista in por_vencimento.items():
+            strikes = np.array([o['strike'] for o in lista], dtype=np.float64)
+            ivs = np.array([o['iv_mercado'] for o in lista], dtype=np.float64)
+            ajuste = self.atualizar(opcoes['ativo'], vencimento, spot, strikes, ivs, _pesos_liquidez(lista, spot))
+            if ajuste is None:
+                continue
+            for opcao, iv in zip(lista, ajuste.iv(strikes, spot)):
+                opcao['iv'] = float(iv)
+
+        return opcoes
+
+    def estatisticas(self) -> Dict:
+        return {
+            'smiles': len(self._ajustes),
+            'ajustes_feitos': self.ajustes_feitos,
+            'ajustes_reaproveitados': self.ajustes_reaproveitados
+        }
+
+
+# Teste
+if __name__ == "__main__":
+    rng = np.random.default_rng(1)
+    spot = 38.0
+    strikes = np.round(spot * np.arange(0.8, 1.21, 0.025), 2)
+    verdadeira = 32 - 20 * np.log(strikes / spot) + 60 * np.log(strikes / spot) ** 2
+    ruidosa = verdadeira + rng.normal(0, 2.5, len(strikes))
+    ruidosa[3] = 0      # sem IV
+    ruidosa[7] = 140    # cotação fora
+
+    superficie = SuperficieVol()
+    ajuste = superficie.atualizar('PETR4', '2026-11-20', spot, strikes, ruidosa)
+    print(f"Ajuste: {np.round(ajuste.coeficientes, 1)} | RMSE {ajuste.rmse:.2f} | {ajuste.n_pontos} pontos")
+    print(f"Erro médio vs verdadeira: {np.abs(ajuste.iv(strikes) - verdadeira).mean():.2f} pts")
+
+    superficie.atualizar('PETR4', '2026-11-20', spot * 1.005, strikes, ruidosa + rng.normal(0, 1, len(strikes)))
+    print(f"Estatísticas: {superficie.estatisticas()}")
@@ -0,0 +1,87 @@
+"""
+Tabela de Resultados - RCO Scanner
+===================================
+Resultados do scan como um único DataFrame colunar
+
+Filtro, ordenação e paginação acontecem no servidor (pandas); o
+navegador só recebe a página visível. Detalhes só da linha selecionada.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Coluna interna → título exibido
+COLUNAS_TABELA = {
+    'score': 'Score',
+    'ativo': 'Ativo',
+    'estrategia': 'Estratégia',
+    'codigo_opcao_1': 'Opção 1',
+    'codigo_opcao_2': 'Opção 2',
+    'strike_1': 'Strike',
+    'vencimento': 'Vencimento',
+    'dias_vencimento': 'Dias',
+    'resultado_liquido': 'Crédito (R$)',
+    'risco_maximo': 'Risco (R$)',
+    'retorno_percentual': 'Retorno %',
+    'probabilidade_sucesso': 'Prob. %',
+    'iv': 'IV %',
+}
+
+ORDENACOES = {
+    'Score': 'score',
+    'Retorno %': 'retorno_percentual',
+    'Crédito (R$)': 'resultado_liquido',
+    'Dias': 'dias_vencimento',
+    'Ativo': 'ativo',
+}
+
+
+def montar_dataframe(oportunidades: List[Dict]) -> pd.DataFrame:
+    """
+    Um DataFrame com as colunas da tabela; o índice é a posição na lista
+    original (para buscar os detalhes da linha selecionada)
+    """
+    colunas = list(COLUNAS_TABELA)
+    if not oportunidades:
+        return pd.DataFrame(columns=colunas)
+
+    df = pd.DataFrame.from_records(oportunidades, columns=colunas)
+    df['estrategia'] = df['estrategia'].str.replace('_', ' ', regex=False)
+    return df
+
+
+def filtrar_ordenar_paginar(df: pd.DataFrame, ativos: Sequence[str] = None,
+                            estrategias: Sequence[str] = None, score_min: float = 0,
+                            ordenar_por: str = 'score', crescente: bool = False,
+                            pagina: int = 1, por_pagina: int = 25) -> Tuple[pd.DataFrame, int, int]:
+    """
+    Aplica filtros, ordenação e recorta uma página
+
+    Returns:
+        (página, total de linhas após o filtro, total de páginas)
+    """
+    mascara = df['score'] >= score_min
+    if ativos:
+        mascara &= df['ativo'].isin(ativos)
+    if estrategias:
+        mascara &= df['estrategia'].isin(estrategias)
+
+    filtrado = df[mascara]
+    total = len(filtrado)
+    total_paginas = max(1, -(-total // por_pagina))
+    pagina = min(max(1, pagina), total_paginas)
+
+    # Só precisa ordenar até o fim da página pedida
+    fim = pagina * por_pagina
+    if fim < total and not crescente and pd.api.types.is_numeric_dtype(filtrado[ordenar_por]):
+        ordenado = filtrado.nlargest(fim, ordenar_por, keep='first')
+    else:
+        ordenado = filtrado.sort_values(ordenar_por, ascending=crescente, kind='stable')
+
+    return ordenado.iloc[fim - por_pagina:fim], total, total_paginas
+
+
+def formatar_pagina(pagina: pd.DataFrame) -> pd.DataFrame:
+    """Renomeia colunas para exibição (valores continuam numéricos)"""
+    return pagina.rename(columns=COLUNAS_TABELA)
@@ -0,0 +1,218 @@
+"""
+Tarefas de Scan - RCO Scanner
+==============================
+Execução do scan multi-ativos em segundo plano
+
+O dashboard só dispara a tarefa e consulta o progresso; o scan roda em
+um executor compartilhado pelo processo, sobrevive a reruns/troca de aba
+e pode ser cancelado entre um vencimento e outro. O resultado final é
+publicado no RepositorioResultados, visível para todas as sessões.
+"""
+
+import threading
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from resultados_compartilhados import RepositorioResultados
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class TarefaScan:
+    """Estado de um scan em andamento (progresso, parciais, cancelamento)"""
+
+    def __init__(self, ativos: List[str], limite_por_ativo: int = 2, top: Optional[int] = 10):
+        self.id = uuid.uuid4().hex[:8]
+        self.ativos = list(ativos)
+        self.limite_por_ativo = limite_por_ativo
+        self.top = top
+
+        self.status = 'na_fila'  # na_fila, executando, concluido, cancelado, erro
+        self.iniciado_em: Optional[datetime] = None
+        self.concluido_em: Optional[datetime] = None
+        self.ativo_atual: Optional[str] = None
+        self.processados = 0
+        self.parciais: List[Dict] = []
+        self.resultados: List[Dict] = []
+        self.erros: Dict[str, str] = {}
+        self.metricas: Dict = {}  # latência p50/p99 da busca, retentativas, disjuntor...
+
+        self._cancelar = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def em_andamento(self) -> bool:
+        return self.status in ('na_fila', 'executando')
+
+    @property
+    def cancelada(self) -> bool:
+        return self._cancelar.is_set()
+
+    def cancelar(self):
+        """Pede o cancelamento (vale a partir do próximo vencimento)"""
+        self._cancelar.set()
+
+    def instantaneo(self) -> Dict:
+        """Cópia consistente do estado, para exibir na interface"""
+        with self._lock:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'iniciado_em': self.iniciado_em,
+                'concluido_em': self.concluido_em,
+                'ativo_atual': self.ativo_atual,
+                'processados': self.processados,
+                'total': len(self.ativos),
+                'progresso': self.processados / len(self.ativos) if self.ativos else 1.0,
+                'parciais': sorted(self.parciais, key=lambda x: x['score'], reverse=True)[:self.top],
+                'total_parciais': len(self.parciais),
+                'resultados': list(self.resultados),
+                'erros': dict(self.erros),
+                'metricas': dict(self.metricas)
+            }
+
+
+def _limitar_por_estrategia(setups: List[Dict], limite: int) -> List[Dict]:
+    """As `limite` melhores de cada estratégia"""
+    por_estrategia: Dict[str, List[Dict]] = {}
+    for setup in sorted(setups, key=lambda x: x['score'], reverse=True):
+        lista = por_estrategia.setdefault(setup['estrategia'], [])
+        if len(lista) < limite:
+            lista.append(setup)
+    return [setup for lista in por_estrategia.values() for setup in lista]
+
+
+def escanear_multiplos_ativos(scanner, ativos_lista: List[str], limite_por_ativo: int = 2,
+                              tarefa: TarefaScan = None, top: Optional[int] = 10) -> List[Dict]:
+    """
+    Escaneia múltiplos ativos e retorna top oportunidades (todas se `top` for None)
+    
+    Consome o scan em streaming (scanner.escanear_lotes). Se `tarefa` for
+    informada, cada vencimento processado já aparece nas parciais, e o
+    cancelamento vale a partir do próximo vencimento.
+    """
+    todas_oportunidades = []
+    do_ativo = []
+
+    if tarefa is not None and ativos_lista:
+        with tarefa._lock:
+            tarefa.ativo_atual = ativos_lista[0]
+
+    lotes = scanner.escanear_lotes(ativos_lista)
+    try:
+        for lote in lotes:
+            if tarefa is not None and tarefa.cancelada:
+                break
+
+            if not lote.fim_ativo:
+                do_ativo.extend(lote.setups)
+                if tarefa is not None:
+                    with tarefa._lock:
+                        tarefa.parciais.extend(lote.setups)
+                continue
+
+            # Ativo concluído: fica só o limite por estratégia
+            todas_oportunidades.extend(_limitar_por_estrategia(do_ativo, limite_por_ativo))
+            do_ativo = []
+
+            if tarefa is not None:
+                metricas = scanner.metricas_busca() if hasattr(scanner, 'metricas_busca') else {}
+                with tarefa._lock:
+                    tarefa.metricas = metricas
+                    if lote.erro:
+                        tarefa.erros[lote.ativo] = lote.erro
+                    tarefa.parciais = list(todas_oportunidades)
+                    tarefa.processados += 1
+                    proximo = tarefa.processados
+                    tarefa.ativo_atual = ativos_lista[proximo] if proximo < len(ativos_lista) else None
+    finally:
+        lotes.close()
+
+    # Ordenar por score
+    todas_oportunidades.sort(key=lambda x: x['score'], reverse=True)
+
+    return todas_oportunidades[:top]
+
+
+class ExecutorScan:
+    """Executor de scans compartilhado pelo processo (um scan por vez)"""
+
+    def __init__(self, scanner, max_workers: int = 1, repositorio: RepositorioResultados = None,
+                 chave_resultado: str = 'scan_multiplo'):
+        self.scanner = scanner
+        self.repositorio = repositorio
+        self.chave_resultado = chave_resultado
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scan')
+        self._lock = threading.Lock()
+        self._atual: Optional[TarefaScan] = None
+        self._ultima_concluida: Optional[TarefaScan] = None
+
+    def iniciar(self, ativos: List[str], limite_por_ativo: int = 2, top: Optional[int] = 10,
+                ao_concluir: Callable[[TarefaScan], None] = None) -> TarefaScan:
+        """
+        Dispara um scan em segundo plano
+
+        Se já houver um scan rodando, devolve o existente em vez de duplicar.
+        `ao_concluir` roda na thread do scan ao final (ex: salvar no banco).
+        """
+        with self._lock:
+            if self._atual is not None and self._atual.em_andamento:
+                return self._atual
+
+            tarefa = TarefaScan(ativos, limite_por_ativo, top)
+            self._atual = tarefa
+
+        self._executor.submit(self._executar, tarefa, ao_concluir)
+        logger.info(f"🚀 Scan {tarefa.id} enviado ({len(ativos)} ativos)")
+        return tarefa
+
+    def _executar(self, tarefa: TarefaScan, ao_concluir: Optional[Callable]):
+        with tarefa._lock:
+            tarefa.status = 'executando'
+            tarefa.iniciado_em = datetime.now()
+
+        try:
+            resultados = escanear_multiplos_ativos(
+                self.scanner, tarefa.ativos, tarefa.limite_por_ativo, tarefa=tarefa, top=tarefa.top
+            )
+            with tarefa._lock:
+                tarefa.resultados = resultados
+                tarefa.status = 'cancelado' if tarefa.cancelada else 'concluido'
+        except Exception as e:
+            logger.error(f"❌ Scan {tarefa.id} falhou: {e}")
+            with tarefa._lock:
+                tarefa.status = 'erro'
+                tarefa.erros['_scan'] = str(e)[:200]
+        finally:
+            with tarefa._lock:
+                tarefa.concluido_em = datetime.now()
+                tarefa.ativo_atual = None
+
+        if tarefa.status == 'concluido':
+            with self._lock:
+                self._ultima_concluida = tarefa
+            if self.repositorio is not None:
+                self.repositorio.publicar(self.chave_resultado, tarefa.resultados, tarefa.concluido_em)
+            if ao_concluir is not None:
+                try:
+                    ao_concluir(tarefa)
+                except Exception as e:
+                    logger.error(f"❌ Erro pós-scan {tarefa.id}: {e}")
+
+        logger.info(f"✅ Scan {tarefa.id}: {tarefa.status} ({len(tarefa.resultados)} oportunidades)")
+
+    def tarefa_atual(self) -> Optional[TarefaScan]:
+        """Último scan disparado (em andamento ou não)"""
+        return self._atual
+
+    def em_andamento(self) -> bool:
+        tarefa = self._atual
+        return tarefa is not None and tarefa.em_andamento
+
+    def ultima_concluida(self) -> Optional[TarefaScan]:
+        """Último scan que terminou sem cancelamento/erro"""
+        return self._ultima_concluida
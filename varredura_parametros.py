@@ -0,0 +1,314 @@
+"""
+Varredura de Parâmetros - RCO Scanner
+======================================
+Avalia uma grade de filtros e pesos dos setups contra o histórico
+
+Cada combinação da grade (ex: iv_min × score_min) vira um
+ScannerOpcoesB3(parametros=...) que roda sobre os snapshots gravados;
+os setups escolhidos são levados ao vencimento (valor intrínseco pelo
+spot do último snapshot até a data) e o relatório traz taxa de acerto,
+retorno sobre a margem e resultado por combinação.
+
+Os snapshots são consolidados uma vez em arrays .npy (um por coluna, IV
+já suavizada pelo smile) e cada processo do pool os abre com mmap: a
+memória é compartilhada pelo sistema e nenhum worker relê os .npz.
+
+Uso:
+    python varredura_parametros.py PETR4 VALE3 --grade iv_min=25,30,35 score_min=60,70
+"""
+
+import os
+import json
+import argparse
+import itertools
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from scanner_opcoes import ScannerOpcoesB3, PARAMETROS_PADRAO, ESTRATEGIAS
+from snapshots import ArmazemSnapshots, COLUNAS_TEXTO, COLUNAS_NUMERICAS, como_data
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUANTIDADE_PADRAO = 100
+ARQUIVO_INDICE = 'indice.json'
+
+
+# ============================================================================
+# CONSOLIDAÇÃO (uma vez por varredura)
+# ============================================================================
+
+def preparar_dados(armazem: ArmazemSnapshots, ativos: List[str] = None, inicio=None, fim=None,
+                   diretorio: str = None) -> Optional[str]:
+    """
+    Junta os snapshots do intervalo em <diretorio>/<coluna>.npy + indice.json
+
+    O índice guarda, por ativo, as datas com o intervalo de linhas e o spot
+    de cada uma. A IV gravada é a do smile (a mesma que o scanner usa ao vivo).
+
+    Returns:
+        Diretório consolidado ou None se não houver snapshots
+    """
+    from superficie_vol import SuperficieVol
+
+    diretorio = diretorio or tempfile.mkdtemp(prefix='rco_varredura_')
+    inicio = como_data(inicio) if inicio else None
+    fim = como_data(fim) if fim else None
+
+    colunas = {c: [] for c in COLUNAS_TEXTO + COLUNAS_NUMERICAS}
+    indice = {}
+    linha = 0
+
+    for ativo in ativos or armazem.ativos():
+        superficie = SuperficieVol()
+        datas = []
+        for data, cru in sorted(armazem.carregar_periodo(ativo, inicio, fim).items()):
+            opcoes = superficie.aplicar(armazem.carregar(ativo, data, cru))
+            if 'erro' in opcoes:
+                continue
+            linhas = opcoes['calls'] + opcoes['puts']
+            for c in colunas:
+                colunas[c].extend(o[c] for o in linhas)
+            datas.append({
+                'data': data.isoformat(),
+                'inicio': linha,
+                'fim': linha + len(linhas),
+                'preco_atual': opcoes['preco_atual'],
+                'capturado_em': opcoes['capturado_em']
+            })
+            linha += len(linhas)
+        if datas:
+            indice[ativo] = datas
+
+    if not indice:
+        logger.warning("⚠️ Nenhum snapshot no intervalo")
+        return None
+
+    os.makedirs(diretorio, exist_ok=True)
+    for c, valores in colunas.items():
+        dtype = np.float64 if c in COLUNAS_NUMERICAS else None
+        np.save(os.path.join(diretorio, f"{c}.npy"), np.array(valores, dtype=dtype))
+    with open(os.path.join(diretorio, ARQUIVO_INDICE), 'w', encoding='utf-8') as f:
+        json.dump(indice, f)
+
+    logger.info(f"✅ {linha} linhas de {sum(len(d) for d in indice.values())} snapshots em {diretorio}")
+    return diretorio
+
+
+class DadosConsolidados:
+    """Colunas consolidadas abertas com mmap (somente leitura)"""
+
+    def __init__(self, diretorio: str):
+        with open(os.path.join(diretorio, ARQUIVO_INDICE), encoding='utf-8') as f:
+            self.indice = json.load(f)
+        self._armazem = ArmazemSnapshots(diretorio)
+        self.colunas = {
+            c: np.load(os.path.join(diretorio, f"{c}.npy"), mmap_mode='r')
+            for c in COLUNAS_TEXTO + COLUNAS_NUMERICAS
+        }
+        # Spot por data para liquidar no vencimento
+        self.spots = {
+            ativo: (np.array([d['data'] for d in datas], dtype='datetime64[D]'),
+                    np.array([d['preco_atual'] for d in datas], dtype=np.float64))
+            for ativo, datas in self.indice.items()
+        }
+
+    def chain(self, ativo: str, entrada: Dict) -> Dict:
+        """Chain da data no formato de buscar_opcoes_disponiveis"""
+        fatia = slice(entrada['inicio'], entrada['fim'])
+        cru = {c: v[fatia] for c, v in self.colunas.items()}
+        cru['preco_atual'] = entrada['preco_atual']
+        cru['capturado_em'] = entrada['capturado_em']
+        return self._armazem.carregar(ativo, entrada['data'], cru)
+
+    def spot_no_vencimento(self, ativo: str, vencimentos: np.ndarray) -> np.ndarray:
+        """Spot do último snapshot até cada vencimento; NaN se o histórico acaba antes"""
+        datas, spots = self.spots[ativo]
+        posicao = np.searchsorted(datas, vencimentos, side='right') - 1
+        resultado = spots[np.maximum(posicao, 0)]
+        return np.where(vencimentos <= datas[-1], resultado, np.nan)
+
+
+# ============================================================================
+# AVALIAÇÃO (um conjunto de parâmetros)
+# ============================================================================
+
+_DADOS: Optional[DadosConsolidados] = None
+_OPCOES_AVALIACAO: Dict = {}
+
+
+def _iniciar_worker(diretorio: str, opcoes_avaliacao: Dict):
+    global _DADOS, _OPCOES_AVALIACAO
+    _DADOS = DadosConsolidados(diretorio)
+    _OPCOES_AVALIACAO = opcoes_avaliacao
+
+
+def avaliar(dados: DadosConsolidados, parametros: Dict, por_estrategia: int = 1,
+            intervalo_entrada: int = 5, estrategias=ESTRATEGIAS) -> Dict:
+    """
+    Roda os setups com `parametros` nas datas de entrada e liquida no vencimento
+
+    Returns:
+        {'parametros', 'operacoes', 'taxa_acerto', 'retorno_medio', 'resultado_total', 'por_estrategia'}
+    """
+    from otimizador_carteira import margem_setup
+
+    # IV já vem suavizada da consolidação
+    scanner = ScannerOpcoesB3(suavizar_iv=False, parametros=parametros)
+    buscadores = {
+        'VENDA_COBERTA': scanner.setups_venda_coberta,
+        'VENDA_PUT': scanner.setups_venda_put,
+        'TRAVA_ALTA_PUT': scanner.setups_trava_alta
+    }
+
+    escolhidos = []
+    for ativo, datas in dados.indice.items():
+        setups_ativo = []
+        for entrada in datas[::intervalo_entrada]:
+            opcoes = dados.chain(ativo, entrada)
+            for estrategia in estrategias:
+                setups_ativo.extend(buscadores[estrategia](opcoes)[:por_estrategia])
+        if not setups_ativo:
+            continue
+
+        vencimentos = np.array([s['vencimento'] for s in setups_ativo], dtype='datetime64[D]')
+        spot_final = dados.spot_no_vencimento(ativo, vencimentos)
+        for setup, spot in zip(setups_ativo, spot_final):
+            if not np.isnan(spot):
+                escolhidos.append((setup, float(spot)))
+
+    resumo = {'parametros': parametros, 'operacoes': 0, 'taxa_acerto': 0.0,
+              'retorno_medio': 0.0, 'resultado_total': 0.0, 'por_estrategia': {}}
+    if not escolhidos:
+        return resumo
+
+    setups = [s for s, _ in escolhidos]
+    spot = np.array([v for _, v in escolhidos])
+
+    def coluna(chave):
+        return np.array([s.get(chave) or 0 for s in setups], dtype=np.float64)
+
+    strike_1, strike_2 = coluna('strike_1'), coluna('strike_2')
+    eh_call = np.array([s['tipo_opcao_1'] == 'CALL' for s in setups])
+    tem_2 = np.array([bool(s.get('codigo_opcao_2')) for s in setups])
+    coberta = np.array([s['estrategia'] == 'VENDA_COBERTA' for s in setups])
+    quantidade = np.array([s.get('quantidade_1') or QUANTIDADE_PADRAO for s in setups], dtype=np.float64)
+
+    intrinseco = np.where(eh_call, np.maximum(spot - strike_1, 0), np.maximum(strike_1 - spot, 0))
+    intrinseco -= np.where(tem_2, np.maximum(strike_2 - spot, 0), 0.0)
+    pnl = coluna('preco_1') - coluna('preco_2') - intrinseco
+    pnl += np.where(coberta, spot - coluna('preco_ativo_atual'), 0.0)  # ação da venda coberta
+    resultado = pnl * quantidade
+
+    margem = np.array([margem_setup(s) for s in setups], dtype=np.float64)
+    retorno = np.where(margem > 0, resultado / np.where(margem > 0, margem, 1) * 100, 0.0)
+    estrategia = np.array([s['estrategia'] for s in setups])
+
+    def _linha(mascara) -> Dict:
+        return {
+            'operacoes': int(mascara.sum()),
+            'taxa_acerto': round(float((resultado[mascara] > 0).mean() * 100), 1),
+            'retorno_medio': round(float(retorno[mascara].mean()), 2),
+            'resultado_total': round(float(resultado[mascara].sum()), 2)
+        }
+
+    resumo.update(_linha(np.ones(len(setups), dtype=bool)))
+    resumo['por_estrategia'] = {str(e): _linha(estrategia == e) for e in np.unique(estrategia)}
+    return resumo
+
+
+def _avaliar_no_worker(parametros: Dict) -> Dict:
+    try:
+        return avaliar(_DADOS, parametros, **_OPCOES_AVALIACAO)
+    except Exception as e:
+        logger.error(f"❌ Erro avaliando {parametros}: {e}")
+        return {'parametros': parametros, 'erro': str(e)}
+
+
+# ============================================================================
+# VARREDURA
+# ============================================================================
+
+def combinacoes(grade: Dict[str, List]) -> List[Dict]:
+    """Produto cartesiano da grade {parametro: [valores]}"""
+    desconhecidos = set(grade) - set(PARAMETROS_PADRAO)
+    if desconhecidos:
+        raise ValueError(f"Parâmetros desconhecidos: {', '.join(sorted(desconhecidos))}")
+    nomes = list(grade)
+    return [dict(zip(nomes, valores)) for valores in itertools.product(*(grade[n] for n in nomes))]
+
+
+def varrer(grade: Dict[str, List], diretorio_dados: str, processos: int = None,
+           por_estrategia: int = 1, intervalo_entrada: int = 5) -> List[Dict]:
+    """
+    Avalia cada combinação da grade em paralelo sobre os dados consolidados
+
+    Args:
+        diretorio_dados: saída de preparar_dados
+        processos: tamanho do pool (None = núcleos da máquina; 1 = sem pool)
+
+    Returns:
+        Resumos de avaliar(), do maior para o menor retorno médio (sem operações por último)
+    """
+    lista = combinacoes(grade)
+    opcoes_avaliacao = {'por_estrategia': por_estrategia, 'intervalo_entrada': intervalo_entrada}
+
+    if processos == 1 or len(lista) == 1:
+        _iniciar_worker(diretorio_dados, opcoes_avaliacao)
+        resultados = [_avaliar_no_worker(p) for p in lista]
+    else:
+        with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_worker,
+                                 initargs=(diretorio_dados, opcoes_avaliacao)) as executor:
+            resultados = list(executor.map(_avaliar_no_worker, lista))
+
+    validos = [r for r in resultados if 'erro' not in r]
+    validos.sort(key=lambda r: (r['operacoes'] > 0, r['retorno_medio'], r['taxa_acerto']), reverse=True)
+    return validos + [r for r in resultados if 'erro' in r]
+
+
+def ler_grade(itens: List[str]) -> Dict[str, List]:
+    """['iv_min=25,30', 'score_min=60,70'] → {'iv_min': [25, 30], 'score_min': [60, 70]}"""
+    grade = {}
+    for item in itens:
+        nome, _, valores = item.partition('=')
+        if not valores:
+            raise ValueError(f"Use parametro=v1,v2: {item}")
+        grade[nome.strip()] = [float(v) if '.' in v else int(v) for v in valores.split(',')]
+    return grade
+
+
+# Teste
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description='Varredura de filtros/pesos dos setups RCO')
+    parser.add_argument('ativos', nargs='*', help='Ativos (padrão: todos com snapshot)')
+    parser.add_argument('--grade', nargs='+', default=['iv_min=25,30,35', 'score_min=60,70,80'],
+                        help=f"parametro=v1,v2 ... ({', '.join(PARAMETROS_PADRAO)})")
+    parser.add_argument('--inicio', help='AAAA-MM-DD')
+    parser.add_argument('--fim', help='AAAA-MM-DD')
+    parser.add_argument('--processos', type=int, default=None)
+    parser.add_argument('--intervalo', type=int, default=5, help='abre setups a cada N snapshots')
+    args = parser.parse_args()
+
+    try:
+        grade = ler_grade(args.grade)
+        combinacoes(grade)
+    except ValueError as e:
+        parser.error(str(e))
+
+    diretorio = preparar_dados(ArmazemSnapshots(), args.ativos, args.inicio, args.fim)
+    if diretorio:
+        inicio = time.perf_counter()
+        resultados = varrer(grade, diretorio, args.processos, intervalo_entrada=args.intervalo)
+        print(f"📊 {len(resultados)} combinações em {time.perf_counter() - inicio:.1f}s\n")
+        for r in resultados:
+            if 'erro' in r:
+                print(f"❌ {r['parametros']}: {r['erro']}")
+                continue
+            print(f"{r['parametros']}  ops {r['operacoes']:>4} | acerto {r['taxa_acerto']:>5.1f}% | "
+                  f"retorno {r['retorno_medio']:>6.2f}% | R$ {r['resultado_total']:>10.2f}")